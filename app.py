@@ -1,177 +1,340 @@
+import time
+_STARTED = time.perf_counter()
 import streamlit as st
-import pandas as pd
-import plotly.graph_objs as go
+from streamlit.errors import StreamlitAPIException
+from contextlib import contextmanager
 from typing import Optional, Dict
-from src.services.bm_customer_service import CustomerService, CustomerServiceError
-from src.services.bm_account_service import AccountService, AccountServiceError
-from src.services.bm_transaction_service import TransactionService, TransactionServiceError
-from src.services.bm_loan_service import LoanService, LoanServiceError
-from src.services.bm_loan_repayment_service import LoanRepaymentService, LoanRepaymentServiceError
-from src.services.bm_employee_service import EmployeeService, EmployeeServiceError
+from src.config import get_startup_timing, run_async
+from src.dao.bm_round_trips import track_round_trips
+from src.dao.bm_query_stats import get_query_stats, reset_query_stats
+from src.services.bm_registry import ServiceRegistry
 
 
 st.title("🏦 Bank Management System")
 
 
-# Initialize all services
-customer_service = CustomerService()
-account_service = AccountService()
-employee_service = EmployeeService()
-transaction_service = TransactionService()
-loan_service = LoanService()
-loan_repayment_service = LoanRepaymentService()
+@st.cache_resource
+def _services():
+    # Built once per process; each service is constructed on first use
+    return ServiceRegistry()
+
+services = _services()
+
+# Reads are cached per argument; writes clear only the entries they affect,
+# so a fragment rerun after a form submit refetches just that data.
+CACHE_TTL = 60
+
+# Columns each view renders; reads ask the backend for these only
+CUSTOMER_PICKER_COLUMNS = "customer_id,name"
+ACCOUNT_PICKER_COLUMNS = "account_id,account_type"
+CUSTOMER_COLUMNS = "customer_id,name,email,phone,city"
+ACCOUNT_COLUMNS = "account_id,account_type,balance,status,created_at"
+LOAN_COLUMNS = "loan_id,loan_type,amount,interest_rate,tenure_months,outstanding,status,created_at"
+TRANSACTION_COLUMNS = "transaction_id,transaction_type,amount,transaction_date"
+TRANSACTION_TYPES = ["DEPOSIT", "WITHDRAW"]
+# Transactions shown per window of an account's history
+HISTORY_PAGE_SIZE = 50
+REPAYMENT_LOAN_COLUMNS = "loan_id,loan_type,amount,outstanding,status"
+REPAYMENT_COLUMNS = "repayment_id,amount,interest,principal,payment_date,status"
+# role is added by sql/003_dashboard_summary.sql where the table lacked it
+EMPLOYEE_COLUMNS = "employee_id,name,email,phone,department,role"
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _fetch_customers():
+    return services.customer_service.list_customers(columns=CUSTOMER_COLUMNS)
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _fetch_customer_matches(query):
+    return services.customer_service.find_customers(query, columns=CUSTOMER_PICKER_COLUMNS)
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _fetch_accounts(customer_id=None):
+    if customer_id:
+        return services.account_service.list_accounts(customer_id, ACCOUNT_COLUMNS)
+    return services.account_service.list_all_accounts(ACCOUNT_COLUMNS)
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _fetch_account_options(customer_id):
+    return services.account_service.list_accounts(customer_id, ACCOUNT_PICKER_COLUMNS)
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _fetch_loans(customer_id=None):
+    if customer_id:
+        return services.loan_service.get_loan_status_by_customer(customer_id, LOAN_COLUMNS)
+    return services.loan_service.get_all_loans(LOAN_COLUMNS)
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _fetch_amortization(loan_id):
+    return services.loan_service.get_amortization_schedule(loan_id)
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _fetch_history(account_id, cursor=None, start=None, end=None, types=None):
+    # One window of the account's history with its running balance
+    return services.transaction_service.get_account_history(
+        account_id, cursor, HISTORY_PAGE_SIZE, start, end, types, TRANSACTION_COLUMNS
+    )
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _fetch_repayments(loan_id=None):
+    if loan_id:
+        return services.loan_repayment_service.list_repayments_for_loan(loan_id, REPAYMENT_COLUMNS)
+    return services.loan_repayment_service.list_all_repayments(REPAYMENT_COLUMNS)
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _fetch_employees():
+    return services.employee_service.list_employees(columns=EMPLOYEE_COLUMNS)
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _fetch_dashboard(preview_table):
+    # Summary and the raw-data preview fetched concurrently
+    return run_async(services.async_dashboard_service.load_dashboard(preview_table, preview_columns=PREVIEW_COLUMNS[preview_table]))
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _fetch_preview(table):
+    return services.dashboard_service.preview_table(table, columns=PREVIEW_COLUMNS[table])
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _fetch_customer_repayments(customer_id):
+    # Loans, then all of their repayments concurrently
+    return run_async(services.async_loan_repayment_service.get_customer_repayments(
+        customer_id, REPAYMENT_LOAN_COLUMNS, REPAYMENT_COLUMNS
+    ))
 
 def load_customers():
     try:
-        return customer_service.list_customers()
-    except CustomerServiceError as e:
+        return _fetch_customers()
+    except services.errors.CustomerServiceError as e:
         st.error(f"Failed to load customers: {e}")
         return []
 
+def search_customers(query):
+    try:
+        return _fetch_customer_matches(query.strip())
+    except services.errors.CustomerServiceError as e:
+        st.error(f"Failed to search customers: {e}")
+        return []
+
+def select_customer():
+    # Typeahead picker: fetches one page of matches instead of every customer
+    query = st.text_input("Search Customer", placeholder="Name, email or customer ID")
+    customers = search_customers(query)
+    if not customers:
+        st.warning("No matching customers found.")
+        return None
+    cust_options = [f"{c['customer_id']} - {c['name']}" for c in customers]
+    selected_cust = st.selectbox("Select Customer", cust_options)
+    return int(selected_cust.split(" - ")[0]) if selected_cust else None
+
 def load_accounts(customer_id=None):
     try:
-        if customer_id:
-            return account_service.list_accounts(customer_id)
-        else:
-            return account_service.list_all_accounts()
-    except AccountServiceError as e:
+        return _fetch_accounts(customer_id)
+    except services.errors.AccountServiceError as e:
+        st.error(f"Failed to load accounts: {e}")
+        return []
+
+def load_account_options(customer_id):
+    try:
+        return _fetch_account_options(customer_id)
+    except services.errors.AccountServiceError as e:
         st.error(f"Failed to load accounts: {e}")
         return []
 
 def load_loans(customer_id=None):
     try:
-        if customer_id:
-            return loan_service.get_loan_status_by_customer(customer_id)
-        else:
-            return loan_service.get_all_loans()
-    except LoanServiceError as e:
+        return _fetch_loans(customer_id)
+    except services.errors.LoanServiceError as e:
         st.error(f"Failed to load loans: {e}")
         return []
 
-def load_transactions(account_id=None):
+def load_history(account_id, cursor=None, start=None, end=None, types=None):
     try:
-        if account_id:
-            return transaction_service.get_transaction_history(account_id)
-        else:
-            return transaction_service.get_all_transactions()
-    except TransactionServiceError as e:
+        return _fetch_history(account_id, cursor, start, end, types)
+    except services.errors.TransactionServiceError as e:
         st.error(f"Failed to load transactions: {e}")
-        return []
+        return {"rows": [], "total": 0, "next_cursor": None}
 
 def load_repayments(loan_id=None):
     try:
-        if loan_id:
-            return loan_repayment_service.list_repayments_for_loan(loan_id)
-        else:
-            return loan_repayment_service.list_all_repayments()
-    except LoanRepaymentServiceError as e:
+        return _fetch_repayments(loan_id)
+    except services.errors.LoanRepaymentServiceError as e:
         st.error(f"Failed to load repayments: {e}")
         return []
 
 def load_employees():
     try:
-        return employee_service.list_employees()
-    except EmployeeServiceError as e:
+        return _fetch_employees()
+    except services.errors.EmployeeServiceError as e:
         st.error(f"Failed to load employees: {e}")
         return []
 
+def load_dashboard(preview_table):
+    try:
+        return _fetch_dashboard(preview_table)
+    except services.errors.DashboardServiceError as e:
+        st.error(f"Failed to load dashboard: {e}")
+        return {"summary": {}, "preview": []}
+
+def load_customer_repayments(customer_id):
+    try:
+        return _fetch_customer_repayments(customer_id)
+    except services.errors.LoanRepaymentServiceError as e:
+        st.error(f"Failed to load loans and repayments: {e}")
+        return {"loans": [], "repayments": {}}
+
+def done(message):
+    # Report a successful write and rerun only the enclosing fragment
+    _fetch_dashboard.clear()
+    st.session_state["flash"] = message
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        # Submitted during a full-script run (first render), so rerun everything
+        st.rerun()
+
+def show_flash():
+    message = st.session_state.pop("flash", None)
+    if message:
+        st.success(message)
+
+@contextmanager
+def query_meter():
+    # Backend queries issued by this (fragment) run; toggled from the sidebar
+    with track_round_trips() as tracker:
+        yield
+    if st.session_state.get("show_query_counts"):
+        st.caption(f"{tracker.total} backend queries, {tracker.bytes / 1024:,.1f} KB of rows on this run")
+
+def query_stats_panel():
+    # Process-wide per-table query counts, latencies and the slow-query log
+    import pandas as pd
+    stats = get_query_stats()
+    with st.sidebar.expander("Query stats", expanded=True):
+        if not stats["operations"]:
+            st.caption("No queries recorded yet")
+        else:
+            rows = [{k: op[k] for k in ("table", "operation", "count", "errors", "rows", "bytes", "avg_ms", "max_ms")}
+                    for op in stats["operations"]]
+            st.dataframe(pd.DataFrame(rows), hide_index=True)
+            histogram = pd.DataFrame(
+                [op["histogram"] for op in stats["operations"]],
+                columns=stats["buckets"],
+                index=[f"{op['operation']} {op['table']}" for op in stats["operations"]],
+            )
+            st.caption("Latency histogram (queries per bucket)")
+            st.dataframe(histogram)
+        st.caption(f"Slow queries (>= {stats['slow_ms']:.0f} ms): {len(stats['slow_queries'])}")
+        if stats["slow_queries"]:
+            st.dataframe(pd.DataFrame(stats["slow_queries"][::-1]), hide_index=True)
+        if st.button("Reset query stats"):
+            reset_query_stats()
+            st.rerun()
+
 def dashboard():
-    st.header("📊 Dashboard")
+    # pandas and plotly are only needed for the charts, so they load with this page
+    import pandas as pd
+    import plotly.graph_objs as go
 
-    customers = load_customers()
-    accounts = load_accounts()
-    loans = load_loans()
-    transactions = load_transactions()
-    repayments = load_repayments()
-    employees_list = load_employees()
+    st.header("📊 Dashboard")
 
-    df_customers = pd.DataFrame(customers)
-    df_accounts = pd.DataFrame(accounts)
-    df_loans = pd.DataFrame(loans)
-    df_transactions = pd.DataFrame(transactions)
-    df_repayments = pd.DataFrame(repayments)
-    employees = pd.DataFrame(employees_list)
+    # All counts and breakdowns come pre-aggregated from the database, fetched
+    # together with the preview of the currently selected raw-data table
+    table_option = st.session_state.get("raw_table_option", "Customers")
+    data = load_dashboard(RAW_TABLES[table_option])
+    summary = data["summary"]
+    counts = summary.get("counts", {})
 
     col1, col2, col3, col4, col5, col6 = st.columns(6)
-    col1.metric("Customers", len(df_customers))
-    col2.metric("Active Accounts", len(df_accounts[df_accounts['status'] == "Active"]) if not df_accounts.empty else 0)
-    col3.metric("Total Loans", len(df_loans))
-    col4.metric("Transactions", len(df_transactions))
-    col5.metric("Repayments", len(df_repayments))
-    col6.metric("Employees", len(employees))
-
-    if not df_accounts.empty and 'account_type' in df_accounts.columns:
-        account_types = df_accounts['account_type'].value_counts()
-        fig = go.Figure(data=[go.Pie(labels=account_types.index, values=account_types.values, hole=0.4)])
+    col1.metric("Customers", counts.get("customers", 0))
+    col2.metric("Active Accounts", counts.get("active_accounts", 0))
+    col3.metric("Total Loans", counts.get("loans", 0))
+    col4.metric("Transactions", counts.get("transactions", 0))
+    col5.metric("Repayments", counts.get("repayments", 0))
+    col6.metric("Employees", counts.get("employees", 0))
+
+    account_types = summary.get("account_types") or []
+    if account_types:
+        fig = go.Figure(data=[go.Pie(labels=[g["account_type"] for g in account_types], values=[g["count"] for g in account_types], hole=0.4)])
         st.subheader("Account Types Distribution")
         st.plotly_chart(fig, use_container_width=True)
 
-    if not df_loans.empty and 'loan_type' in df_loans.columns:
-        loan_types = df_loans['loan_type'].value_counts()
+    loan_types = summary.get("loan_types") or []
+    if loan_types:
         colors = ['#636EFA', '#EF553B', '#00CC96', '#AB63FA', '#FFA15A', '#19D3F3']
         fig = go.Figure(data=[go.Bar(
-            x=loan_types.index,
-            y=loan_types.values,
+            x=[g["loan_type"] for g in loan_types],
+            y=[g["count"] for g in loan_types],
             marker_color=colors[:len(loan_types)]
         )])
         st.subheader("Loans by Type")
         st.plotly_chart(fig, use_container_width=True)
 
-    if not df_transactions.empty and 'transaction_date' in df_transactions.columns:
-        df_transactions['transaction_date'] = pd.to_datetime(df_transactions['transaction_date'], errors='coerce', utc=True)
-        df_transactions['transaction_date'] = df_transactions['transaction_date'].dt.tz_localize(None)
-        df_transactions['month'] = df_transactions['transaction_date'].dt.to_period('M')
-        trend_data = df_transactions.groupby(['month', 'transaction_type']).size().unstack(fill_value=0)
+    monthly_trend = summary.get("monthly_trend") or []
+    if monthly_trend:
+        trend_data = pd.DataFrame(monthly_trend).pivot(index="month", columns="transaction_type", values="count").fillna(0)
         fig = go.Figure()
         for transaction_type in trend_data.columns:
             fig.add_trace(go.Scatter(x=trend_data.index.astype(str), y=trend_data[transaction_type], mode='lines+markers', name=transaction_type))
         st.subheader("Monthly Transaction Trend")
         st.plotly_chart(fig, use_container_width=True)
 
-    if not df_repayments.empty and 'status' in df_repayments.columns:
-        repayment_status = df_repayments['status'].value_counts()
-        fig = go.Figure(data=[go.Pie(labels=repayment_status.index, values=repayment_status.values)])
+    repayment_status = summary.get("repayment_status") or []
+    if repayment_status:
+        fig = go.Figure(data=[go.Pie(labels=[g["status"] for g in repayment_status], values=[g["count"] for g in repayment_status])])
         st.subheader("Loan Repayment Status")
         st.plotly_chart(fig, use_container_width=True)
 
-    if not employees.empty and 'role' in employees.columns:
-        role_counts = employees['role'].value_counts()
+    role_counts = summary.get("employee_roles") or []
+    if role_counts:
         colors = ['#636EFA', '#EF553B', '#00CC96', '#AB63FA', '#FFA15A', '#19D3F3']
         fig = go.Figure(data=[go.Bar(
-            x=role_counts.index,
-            y=role_counts.values,
+            x=[g["role"] for g in role_counts],
+            y=[g["count"] for g in role_counts],
             marker_color=colors[:len(role_counts)]
         )])
         st.subheader("Employee Roles Distribution")
         st.plotly_chart(fig, use_container_width=True)
 
+    raw_data_panel(table_option, data["preview"])
+
+
+RAW_TABLES = {
+    "Customers": "bm_customers",
+    "Accounts": "bm_accounts",
+    "Loans": "bm_loans",
+    "Transactions": "bm_transactions",
+    "Repayments": "bm_loan_repayments",
+    "Employees": "bm_employees",
+}
+
+# Raw-data preview columns per table: long free text and bookkeeping columns are left out
+PREVIEW_COLUMNS = {
+    "bm_customers": "customer_id,name,email,phone,city,created_at",
+    "bm_accounts": "account_id,customer_id,account_type,balance,status,created_at",
+    "bm_loans": "loan_id,customer_id,loan_type,amount,interest_rate,tenure_months,outstanding,status,created_at",
+    "bm_transactions": "transaction_id,account_id,transaction_type,amount,transaction_date",
+    "bm_loan_repayments": "repayment_id,loan_id,amount,interest,principal,payment_date,status",
+    "bm_employees": "employee_id,name,email,department,role,created_at",
+}
+
+@st.fragment
+def raw_data_panel(initial_option, initial_rows):
+    import pandas as pd
     st.subheader("View Raw Data")
-    table_option = st.selectbox("Select Table to View", options=["Customers", "Accounts", "Loans", "Transactions", "Repayments", "Employees"])
-    if table_option == "Customers":
-        st.dataframe(df_customers)
-    elif table_option == "Accounts":
-        st.dataframe(df_accounts)
-    elif table_option == "Loans":
-        st.dataframe(df_loans)
-    elif table_option == "Transactions":
-        st.dataframe(df_transactions)
-    elif table_option == "Repayments":
-        st.dataframe(df_repayments)
-    elif table_option == "Employees":
-        employees = load_employees()
-        st.dataframe(pd.DataFrame(employees))
-
-
-def main():
-    menu = st.sidebar.selectbox("Menu", ["Dashboard", "Customers", "Accounts", "Loans", "Transactions", "Loan Repayments", "Employees"])
-
-    if menu == "Dashboard":
-        dashboard()
-
-    elif menu == "Customers":
-        st.header("Customers")
-        customers = load_customers()
-        st.dataframe(customers)
+    table_option = st.selectbox("Select Table to View", options=list(RAW_TABLES), key="raw_table_option")
+    # Only the selected table is fetched, newest rows first
+    try:
+        rows = initial_rows if table_option == initial_option else _fetch_preview(RAW_TABLES[table_option])
+        st.dataframe(pd.DataFrame(rows))
+        st.caption("Showing the 100 most recent rows.")
+    except services.errors.DashboardServiceError as e:
+        st.error(f"Failed to load {table_option.lower()}: {e}")
+
+
+@st.fragment
+def customers_panel():
+    with query_meter():
+        show_flash()
+        st.dataframe(load_customers())
         with st.expander("Add Customer"):
             with st.form("add_customer"):
                 name = st.text_input("Name")
@@ -182,145 +345,170 @@ def main():
                 submit = st.form_submit_button("Add")
                 if submit:
                     try:
-                        customer_service.create_customer(name, email, phone or None, city or None, address or None)
-                        st.success("Customer added successfully!")
-                    except CustomerServiceError as e:
+                        services.customer_service.create_customer(name, email, phone or None, city or None, address or None)
+                        _fetch_customers.clear()
+                        _fetch_customer_matches.clear()
+                        done("Customer added successfully!")
+                    except services.errors.CustomerServiceError as e:
                         st.error(f"Failed to add customer: {e}")
 
-    elif menu == "Accounts":
-        st.header("Accounts")
-        customers = load_customers()
-        cust_options = [f"{c['customer_id']} - {c['name']}" for c in customers]
-        selected_cust = st.selectbox("Select Customer", cust_options)
-        if selected_cust:
-            cust_id = int(selected_cust.split(" - ")[0])
-            accounts = load_accounts(cust_id)
-            st.dataframe(accounts)
-            with st.expander("Open Account"):
-                with st.form("open_account"):
-                    account_type = st.selectbox("Account Type", ["Savings", "Checking", "Current"])
-                    submit = st.form_submit_button("Open Account")
-                    if submit:
-                        try:
-                            account_service.open_account(cust_id, account_type)
-                            st.success("Account opened successfully!")
-                        except AccountServiceError as e:
-                            st.error(f"Failed to open account: {e}")
-
-    elif menu == "Loans":
-        st.header("Loans")
-        customers = load_customers()
-        cust_options = [f"{c['customer_id']} - {c['name']}" for c in customers]
-        selected_cust = st.selectbox("Select Customer", cust_options)
-        if selected_cust:
-            cust_id = int(selected_cust.split(" - ")[0])
-            loans = load_loans(cust_id)
-            st.dataframe(loans)
-            with st.expander("Apply Loan"):
-                with st.form("apply_loan"):
-                    loan_type = st.text_input("Loan Type")
-                    amount = st.number_input("Amount", min_value=0.01, format="%.2f")
-                    interest_rate = st.number_input("Interest Rate (%)", min_value=0.01, format="%.2f")
-                    submit = st.form_submit_button("Apply")
-                    if submit:
-                        try:
-                            loan_service.apply_for_loan(cust_id, loan_type, amount, interest_rate)
-                            st.success("Loan application submitted!")
-                        except LoanServiceError as e:
-                            st.error(f"Failed to apply loan: {e}")
-
-    elif menu == "Transactions":
-        st.header("Transactions")
-
-        # Load customers
-        customers = load_customers()
-        if not customers:
-            st.warning("No customers found.")
-        else:
-            cust_options = [f"{c['customer_id']} - {c['name']}" for c in customers]
-            selected_cust = st.selectbox("Select Customer", cust_options)
-            if selected_cust:
-                cust_id = int(selected_cust.split(" - ")[0])
-                accounts = load_accounts(cust_id)
-                if not accounts:
-                    st.warning(f"No accounts found for customer {cust_id}")
-                else:
-                    acc_options = [f"{a['account_id']} - {a['account_type']}" for a in accounts]
-                    selected_acc = st.selectbox("Select Account", acc_options)
-                    if selected_acc:
-                        acc_id = int(selected_acc.split(" - ")[0])
-                        transactions = load_transactions(acc_id)
-                        st.dataframe(transactions)
-
-                        # Deposit form
-                        st.subheader("💰 Deposit Money")
-                        with st.form("deposit_form"):
-                            dep_amount = st.number_input("Deposit Amount", min_value=0.01, format="%.2f")
-                            dep_submit = st.form_submit_button("Deposit")
-                            if dep_submit:
-                                try:
-                                    transaction_service.deposit(acc_id, dep_amount)
-                                    st.success("Deposit successful!")
-                                except Exception as e:
-                                    st.error(f"Deposit failed: {e}")
-
-                        # Withdraw form
-                        st.subheader("💸 Withdraw Money")
-                        with st.form("withdraw_form"):
-                            wd_amount = st.number_input("Withdraw Amount", min_value=0.01, format="%.2f")
-                            wd_submit = st.form_submit_button("Withdraw")
-                            if wd_submit:
-                                try:
-                                    transaction_service.withdraw(acc_id, wd_amount)
-                                    st.success("Withdrawal successful!")
-                                except Exception as e:
-                                    st.error(f"Withdrawal failed: {e}")
-
-                        # Transfer form
-                        st.subheader("💳 Transfer Money")
-                        with st.form("transfer_form"):
-                            to_acc = st.number_input("To Account ID", min_value=1)
-                            trans_amount = st.number_input("Transfer Amount", min_value=0.01, format="%.2f")
-                            trans_submit = st.form_submit_button("Transfer")
-                            if trans_submit:
-                                try:
-                                    transaction_service.transfer(acc_id, int(to_acc), trans_amount)
-                                    st.success("Transfer successful!")
-                                except Exception as e:
-                                    st.error(f"Transfer failed: {e}")
-
-    elif menu == "Loan Repayments":
-        st.header("Loan Repayments")
-        customers = load_customers()
-        cust_options = [f"{c['customer_id']} - {c['name']}" for c in customers]
-        selected_cust = st.selectbox("Select Customer", cust_options)
-        if selected_cust:
-            cust_id = int(selected_cust.split(" - ")[0])
-            loans = load_loans(cust_id)
+@st.fragment
+def accounts_panel(cust_id):
+    with query_meter():
+        show_flash()
+        st.dataframe(load_accounts(cust_id))
+        with st.expander("Open Account"):
+            with st.form("open_account"):
+                account_type = st.selectbox("Account Type", ["Savings", "Checking", "Current"])
+                submit = st.form_submit_button("Open Account")
+                if submit:
+                    try:
+                        services.account_service.open_account(cust_id, account_type)
+                        _fetch_accounts.clear(cust_id)
+                        _fetch_account_options.clear(cust_id)
+                        done("Account opened successfully!")
+                    except services.errors.AccountServiceError as e:
+                        st.error(f"Failed to open account: {e}")
+
+@st.fragment
+def loans_panel(cust_id):
+    from src.dao.bm_loan_dao import DEFAULT_TENURE_MONTHS
+    with query_meter():
+        show_flash()
+        loans = load_loans(cust_id)
+        st.dataframe(loans)
+        if loans:
+            st.subheader("Repayment Schedule")
             loan_options = [f"{l['loan_id']} - {l['loan_type']}" for l in loans]
-            selected_loan = st.selectbox("Select Loan", loan_options)
-            if selected_loan:
-                loan_id = int(selected_loan.split(" - ")[0])
+            selected_loan = st.selectbox("Select Loan", loan_options, key="schedule_loan")
+            try:
+                schedule = _fetch_amortization(int(selected_loan.split(" - ")[0]))
+                if schedule:
+                    st.metric("Monthly Installment (EMI)", f"{schedule[0]['payment']:,.2f}")
+                    st.dataframe(schedule)
+            except services.errors.LoanServiceError as e:
+                st.error(f"Failed to build repayment schedule: {e}")
+        with st.expander("Apply Loan"):
+            with st.form("apply_loan"):
+                loan_type = st.text_input("Loan Type")
+                amount = st.number_input("Amount", min_value=0.01, format="%.2f")
+                interest_rate = st.number_input("Interest Rate (%)", min_value=0.01, format="%.2f")
+                tenure_months = st.number_input("Tenure (months)", min_value=1, value=DEFAULT_TENURE_MONTHS, step=1)
+                submit = st.form_submit_button("Apply")
+                if submit:
+                    try:
+                        services.loan_service.apply_for_loan(cust_id, loan_type, amount, interest_rate, int(tenure_months))
+                        _fetch_loans.clear(cust_id)
+                        done("Loan application submitted!")
+                    except services.errors.LoanServiceError as e:
+                        st.error(f"Failed to apply loan: {e}")
+
+def transaction_history(acc_id):
+    # Newest first, one window at a time; the cursors of the windows above the
+    # current one are kept so "Newer" can step back without re-reading them
+    col_from, col_to, col_types = st.columns(3)
+    start = col_from.date_input("From", value=None, key="history_from")
+    end = col_to.date_input("To", value=None, key="history_to")
+    types = col_types.multiselect("Type", TRANSACTION_TYPES, key="history_types")
+    key = (acc_id, start, end, tuple(types))
+    if st.session_state.get("history_key") != key:
+        st.session_state.history_key = key
+        st.session_state.history_cursors = [None]
+    cursors = st.session_state.history_cursors
+    window = load_history(acc_id, cursors[-1], start, end, sorted(types) or None)
+    rows = window["rows"]
+    st.dataframe(rows)
+    if not rows:
+        return
+    first = (len(cursors) - 1) * HISTORY_PAGE_SIZE + 1
+    col_newer, col_caption, col_older = st.columns([1, 3, 1])
+    col_caption.caption(f"{first}–{first + len(rows) - 1} of {window['total']}")
+    # Callbacks run before the fragment reruns, so the new window renders on this click
+    col_newer.button("Newer", disabled=len(cursors) == 1, key="history_newer", on_click=cursors.pop)
+    col_older.button("Older", disabled=window["next_cursor"] is None, key="history_older",
+                     on_click=cursors.append, args=(window["next_cursor"],))
+
+@st.fragment
+def account_activity_panel(cust_id, acc_id):
+    with query_meter():
+        show_flash()
+        transaction_history(acc_id)
+
+        # Deposit form
+        st.subheader("💰 Deposit Money")
+        with st.form("deposit_form"):
+            dep_amount = st.number_input("Deposit Amount", min_value=0.01, format="%.2f")
+            dep_submit = st.form_submit_button("Deposit")
+            if dep_submit:
+                try:
+                    services.transaction_service.deposit(acc_id, dep_amount)
+                    _fetch_history.clear()
+                    _fetch_accounts.clear(cust_id)
+                    done("Deposit successful!")
+                except services.errors.TransactionServiceError as e:
+                    st.error(f"Deposit failed: {e}")
+
+        # Withdraw form
+        st.subheader("💸 Withdraw Money")
+        with st.form("withdraw_form"):
+            wd_amount = st.number_input("Withdraw Amount", min_value=0.01, format="%.2f")
+            wd_submit = st.form_submit_button("Withdraw")
+            if wd_submit:
+                try:
+                    services.transaction_service.withdraw(acc_id, wd_amount)
+                    _fetch_history.clear()
+                    _fetch_accounts.clear(cust_id)
+                    done("Withdrawal successful!")
+                except services.errors.TransactionServiceError as e:
+                    st.error(f"Withdrawal failed: {e}")
+
+        # Transfer form
+        st.subheader("💳 Transfer Money")
+        with st.form("transfer_form"):
+            to_acc = st.number_input("To Account ID", min_value=1)
+            trans_amount = st.number_input("Transfer Amount", min_value=0.01, format="%.2f")
+            trans_submit = st.form_submit_button("Transfer")
+            if trans_submit:
                 try:
-                    repayments = loan_repayment_service.list_repayments_for_loan(loan_id)
-                    st.dataframe(repayments)
-                    with st.expander("Make Repayment"):
-                        with st.form("make_repayment"):
-                            amount = st.number_input("Amount", min_value=0.01, format="%.2f")
-                            submit = st.form_submit_button("Repay")
-                            if submit:
-                                try:
-                                    loan_repayment_service.make_repayment(loan_id, amount)
-                                    st.success("Repayment successful!")
-                                except LoanRepaymentServiceError as e:
-                                    st.error(f"Repayment failed: {e}")
-                except LoanRepaymentServiceError as e:
-                    st.error(f"Failed to load repayments: {e}")
-
-    elif menu == "Employees":
-        st.header("Employees")
-        employees = load_employees()
-        st.dataframe(employees)
+                    services.transaction_service.transfer(acc_id, int(to_acc), trans_amount)
+                    _fetch_history.clear()
+                    # The destination may belong to any customer
+                    _fetch_accounts.clear()
+                    done("Transfer successful!")
+                except services.errors.TransactionServiceError as e:
+                    st.error(f"Transfer failed: {e}")
+
+@st.fragment
+def repayments_panel(cust_id, loan_id):
+    with query_meter():
+        show_flash()
+        data = load_customer_repayments(cust_id)
+        loan = next((l for l in data["loans"] if l["loan_id"] == loan_id), {})
+        if loan:
+            outstanding = loan["amount"] if loan.get("outstanding") is None else loan["outstanding"]
+            col1, col2 = st.columns(2)
+            col1.metric("Outstanding", f"{outstanding:,.2f}")
+            col2.metric("Loan Status", loan.get("status") or "-")
+        st.dataframe(data["repayments"].get(loan_id, []))
+        with st.expander("Make Repayment"):
+            with st.form("make_repayment"):
+                amount = st.number_input("Amount", min_value=0.01, format="%.2f")
+                submit = st.form_submit_button("Repay")
+                if submit:
+                    try:
+                        services.loan_repayment_service.make_repayment(loan_id, amount)
+                        _fetch_repayments.clear(loan_id)
+                        _fetch_customer_repayments.clear(cust_id)
+                        _fetch_loans.clear(cust_id)
+                        done("Repayment successful!")
+                    except services.errors.LoanRepaymentServiceError as e:
+                        st.error(f"Repayment failed: {e}")
+
+@st.fragment
+def employees_panel():
+    with query_meter():
+        show_flash()
+        st.dataframe(load_employees())
         with st.expander("Add Employee"):
             with st.form("add_employee"):
                 name = st.text_input("Name")
@@ -331,11 +519,77 @@ def main():
                 submit = st.form_submit_button("Add")
                 if submit:
                     try:
-                        employee_service.add_employee(name, role, email, phone or None, password)
-                        st.success("Employee added successfully!")
-                    except EmployeeServiceError as e:
+                        services.employee_service.add_employee(name, role, email, phone or None, password)
+                        _fetch_employees.clear()
+                        done("Employee added successfully!")
+                    except services.errors.EmployeeServiceError as e:
                         st.error(f"Failed to add employee: {e}")
 
 
+def main():
+    menu = st.sidebar.selectbox("Menu", ["Dashboard", "Customers", "Accounts", "Loans", "Transactions", "Loan Repayments", "Employees"])
+    st.sidebar.checkbox("Show query counts", key="show_query_counts")
+    show_query_stats = st.sidebar.checkbox("Show query stats", key="show_query_stats")
+
+    with query_meter():
+        if menu == "Dashboard":
+            dashboard()
+
+        elif menu == "Customers":
+            st.header("Customers")
+            customers_panel()
+
+        elif menu == "Accounts":
+            st.header("Accounts")
+            cust_id = select_customer()
+            if cust_id:
+                accounts_panel(cust_id)
+
+        elif menu == "Loans":
+            st.header("Loans")
+            cust_id = select_customer()
+            if cust_id:
+                loans_panel(cust_id)
+
+        elif menu == "Transactions":
+            st.header("Transactions")
+
+            cust_id = select_customer()
+            if cust_id:
+                accounts = load_account_options(cust_id)
+                if not accounts:
+                    st.warning(f"No accounts found for customer {cust_id}")
+                else:
+                    acc_options = [f"{a['account_id']} - {a['account_type']}" for a in accounts]
+                    selected_acc = st.selectbox("Select Account", acc_options)
+                    if selected_acc:
+                        acc_id = int(selected_acc.split(" - ")[0])
+                        account_activity_panel(cust_id, acc_id)
+
+        elif menu == "Loan Repayments":
+            st.header("Loan Repayments")
+            cust_id = select_customer()
+            if cust_id:
+                data = load_customer_repayments(cust_id)
+                loan_options = [f"{l['loan_id']} - {l['loan_type']}" for l in data["loans"]]
+                selected_loan = st.selectbox("Select Loan", loan_options)
+                if selected_loan:
+                    loan_id = int(selected_loan.split(" - ")[0])
+                    repayments_panel(cust_id, loan_id)
+
+        elif menu == "Employees":
+            st.header("Employees")
+            employees_panel()
+
+    # Rendered last so it includes the queries of this run
+    if show_query_stats:
+        query_stats_panel()
+
+    if get_startup_timing():
+        # The first run after start-up is the cold start; later reruns reuse loaded modules
+        elapsed = (time.perf_counter() - _STARTED) * 1000
+        st.sidebar.caption(f"Script run: {elapsed:.0f} ms | services built: {', '.join(services.built()) or 'none'}")
+
+
 if __name__ == "__main__":
     main()
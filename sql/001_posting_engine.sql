@@ -0,0 +1,107 @@
+-- sql/001_posting_engine.sql
+-- Posting engine: each call applies the ledger insert and the balance change in
+-- one transaction, so deposit/withdraw/transfer cost one round trip and the
+-- row lock taken by UPDATE serialises concurrent tellers on the same account.
+-- Called from TransactionDAO via supabase.rpc(); src/dao/bm_sqlite_client.py
+-- implements the same functions for offline use.
+
+create or replace function bm_post_deposit(p_account_id bigint, p_amount numeric)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_balance numeric;
+    v_txn bm_transactions;
+begin
+    if p_amount is null or p_amount <= 0 then
+        raise exception 'Deposit amount must be positive';
+    end if;
+
+    update bm_accounts
+       set balance = coalesce(balance, 0) + p_amount
+     where account_id = p_account_id
+    returning balance into v_balance;
+    if not found then
+        raise exception 'Account not found';
+    end if;
+
+    insert into bm_transactions (account_id, transaction_type, amount, transaction_date)
+    values (p_account_id, 'DEPOSIT', p_amount, now())
+    returning * into v_txn;
+
+    return jsonb_build_object(
+        'account_id', p_account_id,
+        'new_balance', v_balance,
+        'transaction', to_jsonb(v_txn)
+    );
+end;
+$$;
+
+create or replace function bm_post_withdraw(p_account_id bigint, p_amount numeric)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_balance numeric;
+    v_txn bm_transactions;
+begin
+    if p_amount is null or p_amount <= 0 then
+        raise exception 'Withdraw amount must be positive';
+    end if;
+
+    -- The funds check is part of the update, so two withdrawals can't both pass it
+    update bm_accounts
+       set balance = balance - p_amount
+     where account_id = p_account_id
+       and coalesce(balance, 0) >= p_amount
+    returning balance into v_balance;
+    if not found then
+        if exists (select 1 from bm_accounts where account_id = p_account_id) then
+            raise exception 'Insufficient balance';
+        end if;
+        raise exception 'Account not found';
+    end if;
+
+    insert into bm_transactions (account_id, transaction_type, amount, transaction_date)
+    values (p_account_id, 'WITHDRAW', p_amount, now())
+    returning * into v_txn;
+
+    return jsonb_build_object(
+        'account_id', p_account_id,
+        'new_balance', v_balance,
+        'transaction', to_jsonb(v_txn)
+    );
+end;
+$$;
+
+create or replace function bm_post_transfer(p_from_account_id bigint, p_to_account_id bigint, p_amount numeric)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_from jsonb;
+    v_to jsonb;
+begin
+    if p_amount is null or p_amount <= 0 then
+        raise exception 'Transfer amount must be positive';
+    end if;
+
+    -- Lock both rows in a fixed order so opposite transfers can't deadlock
+    perform 1 from bm_accounts
+     where account_id in (p_from_account_id, p_to_account_id)
+     order by account_id
+       for update;
+
+    v_from := bm_post_withdraw(p_from_account_id, p_amount);
+    v_to := bm_post_deposit(p_to_account_id, p_amount);
+
+    return jsonb_build_object(
+        'from_account_id', p_from_account_id,
+        'to_account_id', p_to_account_id,
+        'amount', p_amount,
+        'from_balance', v_from -> 'new_balance',
+        'to_balance', v_to -> 'new_balance',
+        'transactions', jsonb_build_array(v_from -> 'transaction', v_to -> 'transaction')
+    );
+end;
+$$;
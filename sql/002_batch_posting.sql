@@ -0,0 +1,55 @@
+-- sql/002_batch_posting.sql
+-- Batch posting for TransactionService.post_batch(). The client has already
+-- validated the batch and netted it per account; this applies it in one call:
+-- bulk insert of the ledger rows plus one balance update per touched account.
+--
+-- p_transactions: [{"account_id", "transaction_type", "amount"}, ...]
+-- p_deltas:       [{"account_id", "delta", "required"}, ...]
+--   "required" is the lowest starting balance for which every intermediate
+--   balance in the batch stays >= 0; if any account no longer meets it the
+--   whole batch is rejected and the client re-plans it.
+
+create or replace function bm_post_batch(p_transactions jsonb, p_deltas jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_updated integer;
+begin
+    -- Lock touched rows in a fixed order so concurrent batches can't deadlock
+    perform 1 from bm_accounts
+     where account_id in (select (d ->> 'account_id')::bigint from jsonb_array_elements(p_deltas) d)
+     order by account_id
+       for update;
+
+    with d as (
+        select (e ->> 'account_id')::bigint as account_id,
+               (e ->> 'delta')::numeric as delta,
+               (e ->> 'required')::numeric as required
+          from jsonb_array_elements(p_deltas) e
+    )
+    update bm_accounts a
+       set balance = coalesce(a.balance, 0) + d.delta
+      from d
+     where a.account_id = d.account_id
+       and coalesce(a.balance, 0) >= d.required;
+    get diagnostics v_updated = row_count;
+    if v_updated <> jsonb_array_length(p_deltas) then
+        raise exception 'Batch balance check failed';
+    end if;
+
+    insert into bm_transactions (account_id, transaction_type, amount, transaction_date)
+    select (t ->> 'account_id')::bigint, t ->> 'transaction_type', (t ->> 'amount')::numeric, now()
+      from jsonb_array_elements(p_transactions) with ordinality as x(t, n)
+     order by n;
+
+    return jsonb_build_object(
+        'posted', jsonb_array_length(p_transactions),
+        'balances', (
+            select coalesce(jsonb_agg(jsonb_build_object('account_id', account_id, 'balance', balance)), '[]'::jsonb)
+              from bm_accounts
+             where account_id in (select (d ->> 'account_id')::bigint from jsonb_array_elements(p_deltas) d)
+        )
+    );
+end;
+$$;
@@ -0,0 +1,57 @@
+-- sql/003_dashboard_summary.sql
+-- Everything the Streamlit dashboard renders, aggregated server-side in one
+-- call so the payload is a few KB no matter how large the tables get.
+
+-- Older schemas have no role column; the dashboard, the employee pages and the
+-- projections in app.py read it, and sql functions need it to compile
+alter table bm_employees add column if not exists role text;
+
+create or replace function bm_dashboard_summary()
+returns jsonb
+language sql
+stable
+as $$
+    select jsonb_build_object(
+        'counts', jsonb_build_object(
+            'customers', (select count(*) from bm_customers),
+            'accounts', (select count(*) from bm_accounts),
+            'active_accounts', (select count(*) from bm_accounts where upper(status) = 'ACTIVE'),
+            'loans', (select count(*) from bm_loans),
+            'transactions', (select count(*) from bm_transactions),
+            'repayments', (select count(*) from bm_loan_repayments),
+            'employees', (select count(*) from bm_employees)
+        ),
+        'totals', jsonb_build_object(
+            'balance', (select coalesce(sum(balance), 0) from bm_accounts),
+            'loan_amount', (select coalesce(sum(amount), 0) from bm_loans),
+            'repaid', (select coalesce(sum(amount), 0) from bm_loan_repayments),
+            'deposits', (select coalesce(sum(amount), 0) from bm_transactions where transaction_type = 'DEPOSIT'),
+            'withdrawals', (select coalesce(sum(amount), 0) from bm_transactions where transaction_type = 'WITHDRAW')
+        ),
+        'account_types', (
+            select coalesce(jsonb_agg(jsonb_build_object('account_type', account_type, 'count', n) order by n desc), '[]'::jsonb)
+              from (select account_type, count(*) as n from bm_accounts group by account_type) g
+        ),
+        'loan_types', (
+            select coalesce(jsonb_agg(jsonb_build_object('loan_type', loan_type, 'count', n) order by n desc), '[]'::jsonb)
+              from (select loan_type, count(*) as n from bm_loans group by loan_type) g
+        ),
+        'repayment_status', (
+            select coalesce(jsonb_agg(jsonb_build_object('status', status, 'count', n) order by n desc), '[]'::jsonb)
+              from (select status, count(*) as n from bm_loan_repayments group by status) g
+        ),
+        'employee_roles', (
+            select coalesce(jsonb_agg(jsonb_build_object('role', role, 'count', n) order by n desc), '[]'::jsonb)
+              from (select role, count(*) as n from bm_employees where role is not null group by role) g
+        ),
+        'monthly_trend', (
+            select coalesce(jsonb_agg(jsonb_build_object('month', month, 'transaction_type', transaction_type, 'count', n, 'amount', total) order by month, transaction_type), '[]'::jsonb)
+              from (
+                  select to_char(date_trunc('month', transaction_date), 'YYYY-MM') as month,
+                         transaction_type, count(*) as n, sum(amount) as total
+                    from bm_transactions
+                   group by 1, 2
+              ) g
+        )
+    );
+$$;
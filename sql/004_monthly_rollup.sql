@@ -0,0 +1,99 @@
+-- sql/004_monthly_rollup.sql
+-- Persisted (month, transaction_type) -> count/sum rollup of bm_transactions,
+-- maintained incrementally from a high-water mark on transaction_id by
+-- TransactionRollupDAO.refresh(); rebuild() recomputes it from scratch.
+
+create table if not exists bm_transaction_rollup_monthly (
+    month text not null,
+    transaction_type text not null,
+    txn_count bigint not null default 0,
+    total_amount numeric not null default 0,
+    primary key (month, transaction_type)
+);
+
+create table if not exists bm_rollup_state (
+    name text primary key,
+    high_water_mark bigint not null default 0,
+    updated_at timestamptz not null default now()
+);
+
+-- Adds p_deltas ([{"month", "transaction_type", "count", "amount"}, ...]) to the
+-- rollup and advances the high-water mark from p_old_hwm to p_new_hwm in one
+-- transaction. If another refresher already moved the mark, nothing is applied
+-- and the current mark is returned with applied = false. p_reset clears the
+-- rollup first (rebuild).
+create or replace function bm_apply_rollup_delta(p_name text, p_old_hwm bigint, p_new_hwm bigint, p_deltas jsonb, p_reset boolean default false)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_hwm bigint;
+begin
+    insert into bm_rollup_state (name, high_water_mark) values (p_name, 0)
+    on conflict (name) do nothing;
+    select high_water_mark into v_hwm from bm_rollup_state where name = p_name for update;
+
+    if p_reset then
+        delete from bm_transaction_rollup_monthly;
+    elsif v_hwm <> p_old_hwm then
+        return jsonb_build_object('applied', false, 'high_water_mark', v_hwm);
+    end if;
+
+    insert into bm_transaction_rollup_monthly (month, transaction_type, txn_count, total_amount)
+    select d ->> 'month', d ->> 'transaction_type', (d ->> 'count')::bigint, (d ->> 'amount')::numeric
+      from jsonb_array_elements(p_deltas) d
+    on conflict (month, transaction_type) do update
+       set txn_count = bm_transaction_rollup_monthly.txn_count + excluded.txn_count,
+           total_amount = bm_transaction_rollup_monthly.total_amount + excluded.total_amount;
+
+    update bm_rollup_state set high_water_mark = p_new_hwm, updated_at = now() where name = p_name;
+    return jsonb_build_object('applied', true, 'high_water_mark', p_new_hwm);
+end;
+$$;
+
+-- The dashboard trend and deposit/withdrawal totals now read the rollup instead
+-- of grouping bm_transactions
+create or replace function bm_dashboard_summary()
+returns jsonb
+language sql
+stable
+as $$
+    select jsonb_build_object(
+        'counts', jsonb_build_object(
+            'customers', (select count(*) from bm_customers),
+            'accounts', (select count(*) from bm_accounts),
+            'active_accounts', (select count(*) from bm_accounts where upper(status) = 'ACTIVE'),
+            'loans', (select count(*) from bm_loans),
+            'transactions', (select count(*) from bm_transactions),
+            'repayments', (select count(*) from bm_loan_repayments),
+            'employees', (select count(*) from bm_employees)
+        ),
+        'totals', jsonb_build_object(
+            'balance', (select coalesce(sum(balance), 0) from bm_accounts),
+            'loan_amount', (select coalesce(sum(amount), 0) from bm_loans),
+            'repaid', (select coalesce(sum(amount), 0) from bm_loan_repayments),
+            'deposits', (select coalesce(sum(total_amount), 0) from bm_transaction_rollup_monthly where transaction_type = 'DEPOSIT'),
+            'withdrawals', (select coalesce(sum(total_amount), 0) from bm_transaction_rollup_monthly where transaction_type = 'WITHDRAW')
+        ),
+        'account_types', (
+            select coalesce(jsonb_agg(jsonb_build_object('account_type', account_type, 'count', n) order by n desc), '[]'::jsonb)
+              from (select account_type, count(*) as n from bm_accounts group by account_type) g
+        ),
+        'loan_types', (
+            select coalesce(jsonb_agg(jsonb_build_object('loan_type', loan_type, 'count', n) order by n desc), '[]'::jsonb)
+              from (select loan_type, count(*) as n from bm_loans group by loan_type) g
+        ),
+        'repayment_status', (
+            select coalesce(jsonb_agg(jsonb_build_object('status', status, 'count', n) order by n desc), '[]'::jsonb)
+              from (select status, count(*) as n from bm_loan_repayments group by status) g
+        ),
+        'employee_roles', (
+            select coalesce(jsonb_agg(jsonb_build_object('role', role, 'count', n) order by n desc), '[]'::jsonb)
+              from (select role, count(*) as n from bm_employees where role is not null group by role) g
+        ),
+        'monthly_trend', (
+            select coalesce(jsonb_agg(jsonb_build_object('month', month, 'transaction_type', transaction_type, 'count', txn_count, 'amount', total_amount) order by month, transaction_type), '[]'::jsonb)
+              from bm_transaction_rollup_monthly
+        )
+    );
+$$;
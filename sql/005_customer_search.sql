@@ -0,0 +1,9 @@
+-- sql/005_customer_search.sql
+-- Indexes behind CustomerDAO.find_customers(): trigram GIN indexes serve both
+-- prefix (ilike 'q%') and substring (ilike '%q%') matches on name and email.
+
+create extension if not exists pg_trgm;
+
+create index if not exists bm_customers_name_trgm_idx on bm_customers using gin (name gin_trgm_ops);
+create index if not exists bm_customers_email_trgm_idx on bm_customers using gin (email gin_trgm_ops);
+create index if not exists bm_customers_name_idx on bm_customers (name, customer_id);
@@ -0,0 +1,25 @@
+-- sql/006_account_versions.sql
+-- Row version on bm_accounts for optimistic (compare-and-swap) balance updates.
+-- OptimisticTransactionDAO writes "balance = new, version = v + 1 where
+-- version = v"; the trigger bumps the version for every other balance writer
+-- (the posting functions, bm_post_batch, manual fixes) so a stale cached
+-- version always loses the compare instead of overwriting newer money.
+
+alter table bm_accounts add column if not exists version bigint not null default 0;
+
+create or replace function bm_bump_account_version()
+returns trigger
+language plpgsql
+as $$
+begin
+    if new.balance is distinct from old.balance and new.version = old.version then
+        new.version := old.version + 1;
+    end if;
+    return new;
+end;
+$$;
+
+drop trigger if exists bm_accounts_version_trg on bm_accounts;
+create trigger bm_accounts_version_trg
+    before update of balance on bm_accounts
+    for each row execute function bm_bump_account_version();
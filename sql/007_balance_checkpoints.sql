@@ -0,0 +1,25 @@
+-- sql/007_balance_checkpoints.sql
+-- Per-account balance snapshots at fixed interval boundaries, written by
+-- BalanceCheckpointDAO.create_checkpoint(). balance_as_of() starts from the
+-- nearest snapshot at or before the requested time and replays only the
+-- transactions after it; a bm_balance_checkpoint_runs row marks a boundary
+-- whose snapshot is complete (written last), for the all-accounts variant.
+
+create table if not exists bm_balance_checkpoints (
+    account_id bigint not null references bm_accounts(account_id),
+    checkpoint_at timestamptz not null,
+    balance numeric not null default 0,
+    primary key (account_id, checkpoint_at)
+);
+
+create table if not exists bm_balance_checkpoint_runs (
+    checkpoint_at timestamptz primary key,
+    accounts bigint not null default 0,
+    transactions bigint not null default 0,
+    created_at timestamptz not null default now()
+);
+
+-- Replay ranges: one account's transactions after a snapshot, and all
+-- transactions between two boundaries
+create index if not exists bm_transactions_account_date_idx on bm_transactions (account_id, transaction_date);
+create index if not exists bm_transactions_date_idx on bm_transactions (transaction_date);
@@ -0,0 +1,7 @@
+-- sql/008_loan_tenure.sql
+-- Loan term in months, needed to build EMI schedules (src/services/bm_amortization.py).
+-- Existing loans get the same 12-month default LoanDAO.apply_loan() uses.
+
+alter table bm_loans add column if not exists tenure_months integer not null default 12;
+alter table bm_loans drop constraint if exists bm_loans_tenure_months_check;
+alter table bm_loans add constraint bm_loans_tenure_months_check check (tenure_months > 0);
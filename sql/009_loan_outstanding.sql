@@ -0,0 +1,172 @@
+-- sql/009_loan_outstanding.sql
+-- Outstanding principal kept on bm_loans and updated in the same transaction
+-- as every repayment write, so "how much is left" is a single-row read.
+-- Only PAID repayments count. Each one first pays a month's interest on the
+-- outstanding principal (interest_rate / 12, as in the EMI schedule of
+-- src/services/bm_amortization.py) and the rest repays principal; the split is
+-- stored on the repayment so a status change can reverse it exactly. A loan is
+-- CLOSED automatically once less than a cent of principal is left, and
+-- repayments a cent or more beyond the payoff amount are rejected.
+-- LoanDAO.reconcile_outstanding() recomputes the figure from the stored
+-- principal parts to verify (and optionally repair) it.
+
+alter table bm_loans add column if not exists outstanding numeric;
+alter table bm_loan_repayments add column if not exists interest numeric;
+alter table bm_loan_repayments add column if not exists principal numeric;
+
+-- Split of one PAID repayment against the outstanding principal; shared by the
+-- functions below and the backfill
+create or replace function bm_split_repayment(p_amount numeric, p_outstanding numeric, p_annual_rate numeric,
+                                              out interest numeric, out principal numeric, out outstanding numeric)
+language plpgsql
+immutable
+as $$
+begin
+    interest := round(p_outstanding * coalesce(p_annual_rate, 0) / 1200, 9);
+    principal := p_amount - interest;
+    if principal - p_outstanding >= 0.01 then
+        raise exception 'Repayment exceeds payoff amount of %', round(p_outstanding + interest, 2);
+    end if;
+    if p_outstanding - principal < 0.01 then
+        principal := p_outstanding;
+    end if;
+    interest := p_amount - principal;
+    outstanding := p_outstanding - principal;
+end;
+$$;
+
+-- Replay PAID repayments without a split, oldest first, to derive it and the
+-- outstanding balance; loans without repayments start at their full amount
+do $$
+declare
+    v_loan bm_loans;
+    v_repayment bm_loan_repayments;
+    v_outstanding numeric;
+    v_interest numeric;
+    v_principal numeric;
+begin
+    for v_loan in
+        select * from bm_loans l
+         where exists (select 1 from bm_loan_repayments r
+                        where r.loan_id = l.loan_id and upper(r.status) = 'PAID' and r.principal is null)
+    loop
+        v_outstanding := v_loan.amount;
+        for v_repayment in
+            select * from bm_loan_repayments
+             where loan_id = v_loan.loan_id and upper(status) = 'PAID'
+             order by payment_date, repayment_id
+        loop
+            select s.interest, s.principal, s.outstanding into v_interest, v_principal, v_outstanding
+              from bm_split_repayment(v_repayment.amount, v_outstanding, v_loan.interest_rate) s;
+            update bm_loan_repayments set interest = v_interest, principal = v_principal
+             where repayment_id = v_repayment.repayment_id;
+        end loop;
+        update bm_loans
+           set outstanding = v_outstanding,
+               status = case when v_outstanding = 0 then 'CLOSED' else status end
+         where loan_id = v_loan.loan_id;
+    end loop;
+end;
+$$;
+
+update bm_loans set outstanding = amount where outstanding is null;
+
+create or replace function bm_apply_loan_repayment(p_loan_id bigint, p_amount numeric,
+                                                   p_payment_date timestamptz default null,
+                                                   p_status text default 'PAID')
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_loan bm_loans;
+    v_outstanding numeric;
+    v_interest numeric;
+    v_principal numeric;
+    v_status text;
+    v_repayment bm_loan_repayments;
+begin
+    if p_amount is null or p_amount <= 0 then
+        raise exception 'Repayment amount must be positive';
+    end if;
+
+    select * into v_loan from bm_loans where loan_id = p_loan_id for update;
+    if not found then
+        raise exception 'Loan not found';
+    end if;
+
+    v_outstanding := coalesce(v_loan.outstanding, v_loan.amount);
+    if upper(coalesce(p_status, 'PAID')) = 'PAID' then
+        select s.interest, s.principal, s.outstanding into v_interest, v_principal, v_outstanding
+          from bm_split_repayment(p_amount, v_outstanding, v_loan.interest_rate) s;
+    end if;
+
+    update bm_loans
+       set outstanding = v_outstanding,
+           status = case when v_outstanding = 0 then 'CLOSED' else status end
+     where loan_id = p_loan_id
+    returning status into v_status;
+
+    insert into bm_loan_repayments (loan_id, amount, payment_date, status, interest, principal)
+    values (p_loan_id, p_amount, coalesce(p_payment_date, now()), coalesce(p_status, 'PAID'),
+            v_interest, v_principal)
+    returning * into v_repayment;
+
+    return jsonb_build_object(
+        'repayment', to_jsonb(v_repayment),
+        'loan_id', p_loan_id,
+        'outstanding', v_outstanding,
+        'loan_status', v_status
+    );
+end;
+$$;
+
+-- Moving a repayment out of PAID puts its principal part back into the
+-- outstanding balance; moving one into PAID splits it against the current
+-- balance. A CLOSED loan that owes money again becomes ACTIVE.
+create or replace function bm_set_repayment_status(p_repayment_id bigint, p_status text)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_repayment bm_loan_repayments;
+    v_loan bm_loans;
+    v_outstanding numeric;
+    v_interest numeric;
+    v_principal numeric;
+    v_was_paid boolean;
+    v_now_paid boolean;
+begin
+    select * into v_repayment from bm_loan_repayments where repayment_id = p_repayment_id for update;
+    if not found then
+        return null;
+    end if;
+    select * into v_loan from bm_loans where loan_id = v_repayment.loan_id for update;
+
+    v_outstanding := coalesce(v_loan.outstanding, v_loan.amount);
+    v_was_paid := upper(coalesce(v_repayment.status, '')) = 'PAID';
+    v_now_paid := upper(coalesce(p_status, '')) = 'PAID';
+    v_interest := v_repayment.interest;
+    v_principal := v_repayment.principal;
+    if v_was_paid and not v_now_paid then
+        v_outstanding := v_outstanding + coalesce(v_principal, v_repayment.amount);
+        v_interest := null;
+        v_principal := null;
+    elsif v_now_paid and not v_was_paid then
+        select s.interest, s.principal, s.outstanding into v_interest, v_principal, v_outstanding
+          from bm_split_repayment(v_repayment.amount, v_outstanding, v_loan.interest_rate) s;
+    end if;
+
+    update bm_loans
+       set outstanding = v_outstanding,
+           status = case when v_outstanding = 0 then 'CLOSED'
+                         when upper(status) = 'CLOSED' then 'ACTIVE'
+                         else status end
+     where loan_id = v_loan.loan_id;
+
+    update bm_loan_repayments set status = p_status, interest = v_interest, principal = v_principal
+     where repayment_id = p_repayment_id
+    returning * into v_repayment;
+
+    return to_jsonb(v_repayment);
+end;
+$$;
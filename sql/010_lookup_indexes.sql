@@ -0,0 +1,9 @@
+-- sql/010_lookup_indexes.sql
+-- B-tree indexes for the foreign-key and email lookups the DAOs filter on
+-- (accounts/loans per customer, repayments per loan, email checks on create
+-- and bulk import). bm_transactions is covered by sql/007.
+
+create index if not exists bm_accounts_customer_idx on bm_accounts (customer_id);
+create index if not exists bm_loans_customer_idx on bm_loans (customer_id);
+create index if not exists bm_loan_repayments_loan_idx on bm_loan_repayments (loan_id);
+create index if not exists bm_customers_email_idx on bm_customers (email);
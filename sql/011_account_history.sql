@@ -0,0 +1,8 @@
+-- sql/011_account_history.sql
+-- Keyset index for TransactionDAO.get_account_history(): one account's
+-- transactions newest first, seeking past a (transaction_date, transaction_id)
+-- cursor. A backward scan serves the descending order, and the id column
+-- breaks ties between transactions posted at the same instant without a sort.
+
+create index if not exists bm_transactions_account_history_idx
+    on bm_transactions (account_id, transaction_date, transaction_id);
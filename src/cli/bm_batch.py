@@ -0,0 +1,270 @@
+# cli/bm_batch.py
+# Non-interactive batch mode: a JSONL stream of operations in, JSONL results out.
+#
+#   python -m src.cli.bm_batch ops.jsonl [--concurrency 8] [--output results.jsonl]
+#   cat ops.jsonl | python -m src.cli.main --batch -
+#
+# One operation per line, e.g.
+#   {"op": "deposit", "account_id": 7, "amount": 50, "id": "any client ref"}
+# Operations run on a thread pool. Operations touching the same account (or
+# customer, for open_account/apply_loan, or loan, for repay) run in input order:
+# each waits for the previous one on the same key before it is submitted. An
+# operation referring to an id also waits for every earlier operation creating
+# that kind of entity, so a script can open an account for a customer added a
+# few lines above. Ids handed out by concurrent creations may come out in a
+# different order than the lines. Results are written in input order; a
+# summary goes to stderr at the end.
+import argparse
+import contextlib
+import json
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, IO, Iterable, List, Optional, Tuple
+from src.services.bm_registry import ServiceRegistry
+
+DEFAULT_CONCURRENCY = 8
+# Operations read ahead of the oldest unwritten result, per worker
+WINDOW_PER_WORKER = 16
+
+# op -> (service, method, required fields, optional fields)
+OPERATIONS = {
+    "add_customer": ("customer_service", "create_customer", ("name", "email"), ("phone", "city", "address")),
+    "open_account": ("account_service", "open_account", ("customer_id", "account_type"), ()),
+    "deposit": ("transaction_service", "deposit", ("account_id", "amount"), ()),
+    "withdraw": ("transaction_service", "withdraw", ("account_id", "amount"), ()),
+    "transfer": ("transaction_service", "transfer", ("from_account_id", "to_account_id", "amount"), ()),
+    "apply_loan": ("loan_service", "apply_for_loan", ("customer_id", "loan_type", "amount", "interest_rate"), ("tenure_months",)),
+    "repay": ("loan_repayment_service", "make_repayment", ("loan_id", "amount"), ("payment_date",)),
+}
+
+# op -> entity kind it creates
+CREATES = {"add_customer": "customer", "open_account": "account", "apply_loan": "loan"}
+# op -> entity kinds its ids refer to
+REFERS_TO = {
+    "open_account": ("customer",), "apply_loan": ("customer",), "repay": ("loan",),
+    "deposit": ("account",), "withdraw": ("account",), "transfer": ("account",),
+}
+
+class BatchError(Exception):
+    pass
+
+def _order_keys(op: str, fields: Dict) -> List[str]:
+    # Operations sharing a key run one after another, in input order
+    if op in ("deposit", "withdraw"):
+        return [f"account:{fields['account_id']}"]
+    if op == "transfer":
+        return [f"account:{fields['from_account_id']}", f"account:{fields['to_account_id']}"]
+    if op in ("open_account", "apply_loan"):
+        return [f"customer:{fields['customer_id']}"]
+    if op == "repay":
+        return [f"loan:{fields['loan_id']}"]
+    return []
+
+def parse_line(text: str) -> Tuple[str, Dict, object]:
+    # (op, call arguments, client "id" if any); raises BatchError with the reason
+    try:
+        record = json.loads(text)
+    except ValueError as e:
+        raise BatchError(f"Invalid JSON: {e}")
+    if not isinstance(record, dict):
+        raise BatchError("Each line must be a JSON object")
+    op = record.get("op")
+    if op not in OPERATIONS:
+        raise BatchError(f"Unknown op: {op} (expected one of {', '.join(OPERATIONS)})")
+    _, _, required, optional = OPERATIONS[op]
+    missing = [f for f in required if record.get(f) is None]
+    if missing:
+        raise BatchError(f"{op} requires {', '.join(missing)}")
+    return op, {f: record[f] for f in required + optional if record.get(f) is not None}, record.get("id")
+
+
+class _OrderedWriter:
+    # Buffers results that finish early and writes them in input order
+    def __init__(self, out: IO, on_written: Callable[[], None]):
+        self._out = out
+        self._on_written = on_written
+        self._cond = threading.Condition()
+        self._pending: Dict[int, Dict] = {}
+        self.written = 0
+        self.counts = {"ok": 0, "errors": 0}
+
+    def put(self, seq: int, result: Dict):
+        with self._cond:
+            self._pending[seq] = result
+            while self.written in self._pending:
+                result = self._pending.pop(self.written)
+                self.counts["ok" if result["status"] == "ok" else "errors"] += 1
+                self._out.write(json.dumps(result, default=str) + "\n")
+                self.written += 1
+                self._on_written()
+            self._cond.notify_all()
+
+    def wait_for(self, count: int):
+        with self._cond:
+            self._cond.wait_for(lambda: self.written >= count)
+
+
+class BatchRunner:
+    def __init__(self, services: Optional[ServiceRegistry] = None, concurrency: int = DEFAULT_CONCURRENCY):
+        if concurrency <= 0:
+            raise BatchError("concurrency must be positive")
+        self.services = services or ServiceRegistry()
+        self.concurrency = concurrency
+
+    def _call(self, op: str, fields: Dict):
+        service, method, _, _ = OPERATIONS[op]
+        return getattr(self.services.get(service), method)(**fields)
+
+    def _execute(self, seq: int, line_no: int, ref, op: str, fields: Dict, done: Future, writer: _OrderedWriter,
+                 latencies: Dict[str, List[float]], lock: threading.Lock):
+        started = time.perf_counter()
+        try:
+            result = {"line": line_no, "op": op, "status": "ok", "result": self._call(op, fields)}
+        except Exception as e:
+            # Service errors (and anything unexpected) fail this operation only
+            result = {"line": line_no, "op": op, "status": "error", "error": str(e)}
+        ms = (time.perf_counter() - started) * 1000
+        result["ms"] = round(ms, 3)
+        if ref is not None:
+            result["id"] = ref
+        with lock:
+            latencies.setdefault(op, []).append(ms)
+        try:
+            writer.put(seq, result)
+        finally:
+            # Releases the operations queued behind this one on the same keys
+            done.set_result(None)
+
+    def run(self, lines: Iterable[str], out: IO) -> Dict:
+        window = threading.Semaphore(self.concurrency * WINDOW_PER_WORKER)
+        writer = _OrderedWriter(out, window.release)
+        latencies: Dict[str, List[float]] = {}
+        lock = threading.Lock()
+        # key -> completion future of the last operation queued on it
+        last: Dict[str, Future] = {}
+        # entity kind -> creations that may still be running
+        creating: Dict[str, List[Future]] = {kind: [] for kind in CREATES.values()}
+        # Build the services up front so imports don't land in the first operations' latency
+        for service in {spec[0] for spec in OPERATIONS.values()}:
+            self.services.get(service)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            seq = 0
+            for line_no, text in enumerate(lines, start=1):
+                if not text.strip():
+                    continue
+                window.acquire()
+                try:
+                    op, fields, ref = parse_line(text)
+                except BatchError as e:
+                    writer.put(seq, {"line": line_no, "status": "error", "error": str(e)})
+                    seq += 1
+                    continue
+                done: Future = Future()
+                deps = {last[k] for k in _order_keys(op, fields) if k in last}
+                for kind in REFERS_TO.get(op, ()):
+                    creating[kind] = [f for f in creating[kind] if not f.done()]
+                    deps.update(creating[kind])
+                for key in _order_keys(op, fields):
+                    last[key] = done
+                if op in CREATES:
+                    creating[CREATES[op]].append(done)
+                task = (self._execute, seq, line_no, ref, op, fields, done, writer, latencies, lock)
+                self._submit_after(pool, deps, task)
+                seq += 1
+                # Forget keys whose last operation already finished
+                if len(last) > self.concurrency * WINDOW_PER_WORKER * 4:
+                    last = {k: f for k, f in last.items() if not f.done()}
+            # Chained operations are submitted from callbacks, so wait for every
+            # result before the pool stops accepting work
+            writer.wait_for(seq)
+        seconds = time.perf_counter() - started
+        return self._summary({"operations": seq, **writer.counts}, latencies, seconds)
+
+    @staticmethod
+    def _submit_after(pool: ThreadPoolExecutor, deps: set, task: tuple):
+        # Submit once every dependency has completed, without parking a worker on it
+        if not deps:
+            pool.submit(*task)
+            return
+        remaining = [len(deps)]
+        lock = threading.Lock()
+
+        def on_done(_):
+            with lock:
+                remaining[0] -= 1
+                ready = remaining[0] == 0
+            if ready:
+                pool.submit(*task)
+        for dep in deps:
+            dep.add_done_callback(on_done)
+
+    @staticmethod
+    def _summary(stats: Dict, latencies: Dict[str, List[float]], seconds: float) -> Dict:
+        def describe(values: List[float]) -> Dict:
+            ordered = sorted(values)
+            pick = lambda pct: round(ordered[min(len(ordered) - 1, int(pct * len(ordered)))], 3)
+            return {"count": len(ordered), "p50_ms": round(statistics.median(ordered), 3),
+                    "p95_ms": pick(0.95), "p99_ms": pick(0.99), "max_ms": round(ordered[-1], 3)}
+        executed = [ms for values in latencies.values() for ms in values]
+        return {
+            **stats,
+            "executed": len(executed),
+            "seconds": round(seconds, 3),
+            "ops_per_second": round(stats["operations"] / seconds, 1) if seconds else 0.0,
+            "latency": describe(executed) if executed else None,
+            "by_op": {op: describe(values) for op, values in sorted(latencies.items())},
+        }
+
+
+def print_summary(summary: Dict, file: IO = sys.stderr):
+    print(
+        f"{summary['operations']} operations in {summary['seconds']}s ({summary['ops_per_second']:.0f} ops/s), "
+        f"{summary['ok']} ok, {summary['errors']} failed",
+        file=file,
+    )
+    if summary["latency"]:
+        print(f"{'op':14} {'count':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}", file=file)
+        for op, l in [*summary["by_op"].items(), ("all", summary["latency"])]:
+            print(f"{op:14} {l['count']:>7} {l['p50_ms']:>8.2f} {l['p95_ms']:>8.2f} {l['p99_ms']:>8.2f} {l['max_ms']:>8.2f}", file=file)
+
+
+def run_batch(source: str = "-", output: Optional[str] = None, concurrency: int = DEFAULT_CONCURRENCY,
+              services: Optional[ServiceRegistry] = None) -> Dict:
+    # source/output: file paths, "-" / None for stdin / stdout
+    stdout = sys.stdout
+    inp = sys.stdin if source == "-" else open(source, encoding="utf-8")
+    out = stdout if output in (None, "-") else open(output, "w", encoding="utf-8")
+    try:
+        # DAOs print progress lines; keep them off a JSONL stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            summary = BatchRunner(services, concurrency).run(inp, out)
+    finally:
+        if inp is not sys.stdin:
+            inp.close()
+        if out is not stdout:
+            out.close()
+        else:
+            out.flush()
+    return summary
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run a JSONL stream of banking operations")
+    parser.add_argument("source", nargs="?", default="-", help="JSONL file of operations (default: stdin)")
+    parser.add_argument("--output", "-o", help="JSONL results file (default: stdout)")
+    parser.add_argument("--concurrency", "-c", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"operations in flight (default {DEFAULT_CONCURRENCY})")
+    args = parser.parse_args(argv)
+    try:
+        summary = run_batch(args.source, args.output, args.concurrency)
+    except (BatchError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    print_summary(summary)
+    return 1 if summary["errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,388 @@
+# cli/bm_bench.py
+# Offline benchmarks for every public method of the six services, run against
+# the in-process SQLite stand-in (dao/bm_sqlite_client.py) with an injected
+# per-request latency standing in for the network hop to Supabase.
+#
+#   python -m src.cli.bm_bench run [--latency-ms 2] [--repeat 20] [--out bench.json]
+#   python -m src.cli.bm_bench compare base.json new.json [--threshold 0.2]
+#   python -m src.cli.bm_bench memory [--rows 100000] [--out memory.json]
+#
+# Each operation reports round trips per call, wall time (median and p95) and
+# peak traced allocations. compare exits non-zero when an operation gained
+# round trips or got slower / allocated more than the threshold. memory reports
+# the bytes per row a bulk read keeps alive in each result shape (dicts,
+# __slots__ records, ColumnarResult) and once turned into a DataFrame.
+import argparse
+import contextlib
+import inspect
+import io
+import itertools
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from src.config import set_supabase
+from src.dao.bm_records import AccountRecord, LoanRecord, RepaymentRecord, TransactionRecord
+from src.dao.bm_round_trips import track_round_trips
+from src.dao.bm_sqlite_client import SQLiteClient
+
+DEFAULT_LATENCY_MS = 2.0
+DEFAULT_REPEAT = 20
+# Rows seeded per table before measuring
+DEFAULT_SCALE = {"customers": 500, "transactions": 5000, "loans": 200, "repayments": 400, "employees": 50}
+# compare(): relative slowdown tolerated, and absolute floors below which noise is ignored
+DEFAULT_THRESHOLD = 0.2
+MIN_WALL_DIFF_MS = 0.5
+MIN_ALLOC_DIFF_KB = 16.0
+DEFAULT_MEMORY_ROWS = 100_000
+
+SERVICES = ("CustomerService", "AccountService", "TransactionService", "LoanService", "LoanRepaymentService", "EmployeeService")
+
+# (setup, call): setup(ctx) runs untimed before every call and returns the call's args
+Case = Tuple[Optional[Callable[[Dict], tuple]], Callable[..., Any]]
+
+class BenchmarkError(Exception):
+    pass
+
+def _seed(client: SQLiteClient, scale: Dict[str, int]) -> Dict:
+    # Bulk-load fixtures straight through the stand-in; returns ids the cases use
+    n = scale["customers"]
+    customers = client.table("bm_customers").insert(
+        [{"name": f"Customer {i}", "email": f"customer{i}@bench.local", "city": f"City {i % 20}"} for i in range(n)]
+    ).execute().data
+    accounts = client.table("bm_accounts").insert(
+        [{"customer_id": c["customer_id"], "account_type": ("SAVINGS", "CHECKING")[i % 2], "balance": 1_000_000}
+         for i, c in enumerate(customers)]
+    ).execute().data
+    start = datetime.now(timezone.utc) - timedelta(days=365)
+    ledger = [{"account_id": a["account_id"], "transaction_type": "DEPOSIT", "amount": 1_000_000, "transaction_date": start.isoformat()}
+              for a in accounts]
+    t = scale["transactions"]
+    ledger += [
+        {"account_id": accounts[i % n]["account_id"], "transaction_type": ("DEPOSIT", "WITHDRAW")[i % 2], "amount": 10,
+         "transaction_date": (start + timedelta(minutes=(365 * 24 * 60 // max(t, 1)) * i)).isoformat()}
+        for i in range(t)
+    ]
+    client.table("bm_transactions").insert(ledger).execute()
+    loans = client.table("bm_loans").insert(
+        [{"customer_id": customers[i % n]["customer_id"], "loan_type": ("Home", "Car", "Personal")[i % 3],
+          "amount": 10_000_000, "outstanding": 10_000_000, "interest_rate": 5 + i % 7, "tenure_months": 12 + i % 240}
+         for i in range(scale["loans"])]
+    ).execute().data
+    repayments = client.table("bm_loan_repayments").insert(
+        [{"loan_id": loans[i % len(loans)]["loan_id"], "amount": 1, "status": "PAID"} for i in range(scale["repayments"])]
+    ).execute().data
+    client.table("bm_employees").insert(
+        [{"name": f"Employee {i}", "email": f"employee{i}@bench.local", "role": "Teller"} for i in range(scale["employees"])]
+    ).execute()
+    return {
+        "customer_id": customers[0]["customer_id"],
+        "account_id": accounts[0]["account_id"],
+        "other_account_id": accounts[1]["account_id"],
+        "loan_id": loans[0]["loan_id"],
+        "repayment_id": repayments[0]["repayment_id"],
+        "as_of": (start + timedelta(days=200)).isoformat(),
+        "serial": itertools.count(),
+    }
+
+def _cases(services: Dict[str, Any]) -> Dict[str, Case]:
+    cs, acs, ts = services["CustomerService"], services["AccountService"], services["TransactionService"]
+    ls, rs, es = services["LoanService"], services["LoanRepaymentService"], services["EmployeeService"]
+
+    def unique(ctx: Dict) -> int:
+        return next(ctx["serial"])
+
+    def fresh_customer(ctx: Dict) -> int:
+        return cs.create_customer(f"Bench {unique(ctx)}", f"bench{unique(ctx)}@bench.local")["customer_id"]
+
+    return {
+        "CustomerService.create_customer": (lambda ctx: (f"New {unique(ctx)}", f"new{unique(ctx)}@bench.local"), cs.create_customer),
+        "CustomerService.bulk_create_customers": (
+            lambda ctx: ([{"name": f"Bulk {unique(ctx)}", "email": f"bulk{unique(ctx)}@bench.local"} for _ in range(100)],),
+            cs.bulk_create_customers),
+        "CustomerService.existing_emails": (lambda ctx: ([f"customer{i}@bench.local" for i in range(200)],), cs.existing_emails),
+        "CustomerService.get_customer": (lambda ctx: (ctx["customer_id"],), cs.get_customer),
+        "CustomerService.update_customer": (lambda ctx: (ctx["customer_id"], None, f"City {unique(ctx)}"), cs.update_customer),
+        "CustomerService.delete_customer": (lambda ctx: (fresh_customer(ctx),), cs.delete_customer),
+        "CustomerService.list_customers": (None, cs.list_customers),
+        "CustomerService.search_customers": (lambda ctx: (None, "City 3"), cs.search_customers),
+        "CustomerService.find_customers": (lambda ctx: ("Customer 1",), cs.find_customers),
+
+        "AccountService.open_account": (lambda ctx: (ctx["customer_id"], "SAVINGS"), acs.open_account),
+        "AccountService.bulk_open_accounts": (
+            lambda ctx: ([{"customer_id": ctx["customer_id"], "account_type": "SAVINGS"}] * 100,), acs.bulk_open_accounts),
+        "AccountService.close_account": (lambda ctx: (acs.open_account(ctx["customer_id"], "SAVINGS")["account_id"],), acs.close_account),
+        "AccountService.list_accounts": (lambda ctx: (ctx["customer_id"],), acs.list_accounts),
+        "AccountService.list_all_accounts": (None, acs.list_all_accounts),
+        "AccountService.iter_all_accounts": (None, lambda: list(acs.iter_all_accounts())),
+
+        "TransactionService.deposit": (lambda ctx: (ctx["account_id"], 5), ts.deposit),
+        "TransactionService.withdraw": (lambda ctx: (ctx["account_id"], 5), ts.withdraw),
+        "TransactionService.transfer": (lambda ctx: (ctx["account_id"], ctx["other_account_id"], 5), ts.transfer),
+        "TransactionService.post_batch": (
+            lambda ctx: ([{"type": "deposit", "account_id": ctx["account_id"], "amount": 1}] * 500,), ts.post_batch),
+        "TransactionService.get_posting_stats": (None, ts.get_posting_stats),
+        "TransactionService.get_velocity_stats": (None, ts.get_velocity_stats),
+        "TransactionService.get_transaction_history": (lambda ctx: (ctx["account_id"],), ts.get_transaction_history),
+        "TransactionService.get_account_history": (lambda ctx: (ctx["account_id"],), ts.get_account_history),
+        "TransactionService.get_all_transactions": (None, ts.get_all_transactions),
+        "TransactionService.iter_all_transactions": (None, lambda: list(ts.iter_all_transactions())),
+        "TransactionService.create_checkpoints": (None, ts.create_checkpoints),
+        "TransactionService.list_checkpoints": (None, ts.list_checkpoints),
+        "TransactionService.balance_as_of": (lambda ctx: (ctx["account_id"], ctx["as_of"]), ts.balance_as_of),
+        "TransactionService.balances_as_of": (lambda ctx: (ctx["as_of"],), ts.balances_as_of),
+
+        "LoanService.apply_for_loan": (lambda ctx: (ctx["customer_id"], "Home", 1000, 5), ls.apply_for_loan),
+        "LoanService.repay_loan": (lambda ctx: (ctx["loan_id"], 1), ls.repay_loan),
+        "LoanService.get_outstanding": (lambda ctx: (ctx["loan_id"],), ls.get_outstanding),
+        "LoanService.reconcile_outstanding": (None, ls.reconcile_outstanding),
+        "LoanService.get_loan_status": (lambda ctx: (ctx["loan_id"],), ls.get_loan_status),
+        "LoanService.get_loan_status_by_customer": (lambda ctx: (ctx["customer_id"],), ls.get_loan_status_by_customer),
+        "LoanService.get_all_loans": (None, ls.get_all_loans),
+        "LoanService.iter_all_loans": (None, lambda: list(ls.iter_all_loans())),
+        "LoanService.get_amortization_schedule": (lambda ctx: (ctx["loan_id"],), ls.get_amortization_schedule),
+        "LoanService.get_portfolio_amortization": (None, ls.get_portfolio_amortization),
+        "LoanService.iter_portfolio_schedule": (None, lambda: list(ls.iter_portfolio_schedule())),
+
+        "LoanRepaymentService.make_repayment": (lambda ctx: (ctx["loan_id"], 1), rs.make_repayment),
+        "LoanRepaymentService.list_repayments_for_loan": (lambda ctx: (ctx["loan_id"],), rs.list_repayments_for_loan),
+        "LoanRepaymentService.get_repayment": (lambda ctx: (ctx["repayment_id"],), rs.get_repayment),
+        "LoanRepaymentService.update_repayment_status": (
+            lambda ctx: (ctx["repayment_id"], ("PENDING", "PAID")[unique(ctx) % 2]), rs.update_repayment_status),
+        "LoanRepaymentService.list_all_repayments": (None, rs.list_all_repayments),
+        "LoanRepaymentService.iter_all_repayments": (None, lambda: list(rs.iter_all_repayments())),
+
+        "EmployeeService.list_employees": (None, es.list_employees),
+        "EmployeeService.create_employee": (lambda ctx: (f"Emp {unique(ctx)}", f"emp{unique(ctx)}@bench.local"), es.create_employee),
+    }
+
+def _public_methods(services: Dict[str, Any]) -> List[str]:
+    return sorted(
+        f"{name}.{attr}"
+        for name, service in services.items()
+        for attr, _ in inspect.getmembers(type(service), inspect.isfunction)
+        if not attr.startswith("_")
+    )
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct * (len(ordered) - 1))))]
+
+def _measure(case: Case, ctx: Dict, repeat: int) -> Dict:
+    setup, call = case
+    args = lambda: setup(ctx) if setup else ()
+    call(*args())  # warm-up: caches, first-page plans
+    walls, trips = [], []
+    for _ in range(repeat):
+        a = args()
+        with track_round_trips() as tracker:
+            started = time.perf_counter()
+            call(*a)
+            walls.append((time.perf_counter() - started) * 1000)
+        trips.append(tracker.total)
+    # Allocations in a separate call: tracing slows every allocation down
+    a = args()
+    tracemalloc.start()
+    try:
+        call(*a)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "round_trips": max(trips),
+        "wall_ms_median": round(statistics.median(walls), 3),
+        "wall_ms_p95": round(_percentile(walls, 0.95), 3),
+        "alloc_peak_kb": round(peak / 1024, 1),
+    }
+
+def run(latency_ms: float = DEFAULT_LATENCY_MS, repeat: int = DEFAULT_REPEAT, only: Optional[str] = None,
+        scale: Optional[Dict[str, int]] = None) -> Dict:
+    scale = {**DEFAULT_SCALE, **(scale or {})}
+    client = SQLiteClient(latency=0.0)
+    set_supabase(client)
+    # Services are imported after the stand-in is installed so their DAOs bind to it
+    from src.services.bm_customer_service import CustomerService
+    from src.services.bm_account_service import AccountService
+    from src.services.bm_transaction_service import TransactionService
+    from src.services.bm_loan_service import LoanService
+    from src.services.bm_loan_repayment_service import LoanRepaymentService
+    from src.services.bm_employee_service import EmployeeService
+    services = {cls.__name__: cls() for cls in (
+        CustomerService, AccountService, TransactionService, LoanService, LoanRepaymentService, EmployeeService,
+    )}
+    ctx = _seed(client, scale)
+    client.latency = latency_ms / 1000.0
+    cases = _cases(services)
+    results, failures = {}, {}
+    for name, case in cases.items():
+        if only and only not in name:
+            continue
+        try:
+            # DAOs print progress lines; keep them out of the report
+            with contextlib.redirect_stdout(io.StringIO()):
+                results[name] = _measure(case, ctx, repeat)
+        except Exception as e:
+            failures[name] = f"{type(e).__name__}: {e}"
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "latency_ms": latency_ms,
+            "repeat": repeat,
+            "scale": scale,
+        },
+        "results": results,
+        "failures": failures,
+        # Public methods without a case: add one when a service grows a method
+        "uncovered": [m for m in _public_methods(services) if m not in cases],
+    }
+
+def compare(base: Dict, new: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    # One row per operation present in both runs, with regression reasons (if any)
+    rows = []
+    for name in sorted(set(base["results"]) & set(new["results"])):
+        old, cur = base["results"][name], new["results"][name]
+        reasons = []
+        if cur["round_trips"] > old["round_trips"]:
+            reasons.append(f"round trips {old['round_trips']} -> {cur['round_trips']}")
+        wall_diff = cur["wall_ms_median"] - old["wall_ms_median"]
+        if wall_diff > MIN_WALL_DIFF_MS and cur["wall_ms_median"] > old["wall_ms_median"] * (1 + threshold):
+            reasons.append(f"wall {old['wall_ms_median']}ms -> {cur['wall_ms_median']}ms")
+        alloc_diff = cur["alloc_peak_kb"] - old["alloc_peak_kb"]
+        if alloc_diff > MIN_ALLOC_DIFF_KB and cur["alloc_peak_kb"] > old["alloc_peak_kb"] * (1 + threshold):
+            reasons.append(f"alloc {old['alloc_peak_kb']}KB -> {cur['alloc_peak_kb']}KB")
+        rows.append({"operation": name, "base": old, "new": cur, "regressions": reasons})
+    return rows
+
+def _retained(build: Callable[[], Any]) -> Tuple[Any, int]:
+    # (result, bytes still allocated once build() returned), pages and other temporaries excluded
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        return result, tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+def memory(rows: int = DEFAULT_MEMORY_ROWS) -> Dict:
+    # Bytes per row held by each bulk read result shape, with and without a DataFrame on top
+    import pandas as pd
+    client = SQLiteClient(latency=0.0)
+    set_supabase(client)
+    from src.services.bm_account_service import AccountService
+    from src.services.bm_transaction_service import TransactionService
+    from src.services.bm_loan_service import LoanService
+    from src.services.bm_loan_repayment_service import LoanRepaymentService
+    scale = {**DEFAULT_SCALE, "transactions": rows, "loans": max(rows // 10, 1), "repayments": max(rows // 5, 1)}
+    _seed(client, scale)
+    ts, acs, ls, rs = TransactionService(), AccountService(), LoanService(), LoanRepaymentService()
+    reads = {
+        "bm_transactions": (ts.get_all_transactions, TransactionRecord),
+        "bm_accounts": (acs.list_all_accounts, AccountRecord),
+        "bm_loans": (ls.get_all_loans, LoanRecord),
+        "bm_loan_repayments": (rs.list_all_repayments, RepaymentRecord),
+    }
+    tables = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for table, (read, record) in reads.items():
+            dicts, dict_bytes = _retained(read)
+            n = len(dicts)
+            _, dict_frame_bytes = _retained(lambda: pd.DataFrame(dicts))
+            del dicts
+            # Built from a fresh read so the records own their values, as they would in a caller
+            records, record_bytes = _retained(lambda: [record.from_row(r) for r in read()])
+            del records
+            columnar, columnar_bytes = _retained(lambda: read(compact=True))
+            _, frame_bytes = _retained(columnar.to_pandas)
+            per_row = lambda b: round(b / n, 1) if n else 0.0
+            tables[table] = {
+                "rows": n,
+                "dicts": per_row(dict_bytes),
+                "dicts_dataframe": per_row(dict_bytes + dict_frame_bytes),
+                "records": per_row(record_bytes),
+                "columnar": per_row(columnar_bytes),
+                "columnar_dataframe": per_row(columnar_bytes + frame_bytes),
+            }
+            del columnar
+    return {
+        "meta": {"created_at": datetime.now(timezone.utc).isoformat(), "python": platform.python_version(), "scale": scale},
+        "bytes_per_row": tables,
+    }
+
+def _print_memory(report: Dict):
+    print(f"{'table':20} {'rows':>8} {'dicts':>8} {'+frame':>8} {'records':>8} {'columnar':>9} {'+frame':>8}  (bytes/row)")
+    for table, r in report["bytes_per_row"].items():
+        print(f"{table:20} {r['rows']:>8} {r['dicts']:>8.1f} {r['dicts_dataframe']:>8.1f} {r['records']:>8.1f} "
+              f"{r['columnar']:>9.1f} {r['columnar_dataframe']:>8.1f}")
+
+def _print_results(report: Dict):
+    print(f"{'operation':52} {'trips':>5} {'median ms':>10} {'p95 ms':>9} {'peak KB':>9}")
+    for name, r in report["results"].items():
+        print(f"{name:52} {r['round_trips']:>5} {r['wall_ms_median']:>10.3f} {r['wall_ms_p95']:>9.3f} {r['alloc_peak_kb']:>9.1f}")
+    for name, error in report["failures"].items():
+        print(f"FAILED {name}: {error}")
+    if report["uncovered"]:
+        print("No benchmark case for:", ", ".join(report["uncovered"]))
+
+def _load(path: str) -> Dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        raise BenchmarkError(f"Cannot read benchmark results {path}: {e}")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline service benchmarks against the SQLite stand-in")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_p = sub.add_parser("run", help="run the benchmarks")
+    run_p.add_argument("--latency-ms", type=float, default=DEFAULT_LATENCY_MS, help="injected latency per request")
+    run_p.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timed calls per operation")
+    run_p.add_argument("--only", help="only operations whose name contains this")
+    run_p.add_argument("--out", help="write results as JSON to this file")
+    cmp_p = sub.add_parser("compare", help="compare two result files")
+    cmp_p.add_argument("base")
+    cmp_p.add_argument("new")
+    cmp_p.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="tolerated relative slowdown (0.2 = 20%%)")
+    mem_p = sub.add_parser("memory", help="bytes per row held by each bulk read result shape")
+    mem_p.add_argument("--rows", type=int, default=DEFAULT_MEMORY_ROWS, help="transactions seeded (loans and repayments scale with it)")
+    mem_p.add_argument("--out", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "run":
+            if args.repeat <= 0:
+                raise BenchmarkError("--repeat must be positive")
+            report = run(args.latency_ms, args.repeat, args.only)
+            _print_results(report)
+            if args.out:
+                with open(args.out, "w", encoding="utf-8") as f:
+                    json.dump(report, f, indent=2)
+            return 1 if report["failures"] else 0
+
+        if args.command == "memory":
+            if args.rows <= 0:
+                raise BenchmarkError("--rows must be positive")
+            report = memory(args.rows)
+            _print_memory(report)
+            if args.out:
+                with open(args.out, "w", encoding="utf-8") as f:
+                    json.dump(report, f, indent=2)
+            return 0
+
+        rows = compare(_load(args.base), _load(args.new), args.threshold)
+        regressed = [r for r in rows if r["regressions"]]
+        for r in rows:
+            mark = "REGRESSED" if r["regressions"] else "ok"
+            print(f"{r['operation']:52} {mark:9} {'; '.join(r['regressions'])}")
+        print(f"{len(regressed)} of {len(rows)} operations regressed (threshold {args.threshold:.0%})")
+        return 1 if regressed else 0
+    except BenchmarkError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
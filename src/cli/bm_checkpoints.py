@@ -0,0 +1,38 @@
+# cli/bm_checkpoints.py
+# Creates the periodic balance checkpoints that balance_as_of(), balances_as_of()
+# and statements start from; without them every lookup replays the whole
+# ledger. Each run writes one checkpoint per BM_CHECKPOINT_INTERVAL_DAYS
+# boundary passed since the latest one, so it is safe to run often and catches
+# up after missed runs. Schedule it from cron, e.g. nightly:
+#
+#   python -m src.cli.bm_checkpoints [--until 2026-09-30T00:00:00+00:00] [--list]
+#   15 2 * * *  cd /srv/bank && python -m src.cli.bm_checkpoints
+import argparse
+import sys
+from typing import List, Optional
+from src.config import get_checkpoint_interval_days
+from src.services.bm_transaction_service import TransactionService, TransactionServiceError
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Create due balance checkpoints")
+    parser.add_argument("--until", help="last boundary to consider, ISO timestamp (default: now)")
+    parser.add_argument("--list", action="store_true", help="list existing checkpoints instead")
+    args = parser.parse_args(argv)
+    service = TransactionService()
+    try:
+        if args.list:
+            for c in service.list_checkpoints():
+                print(f"{c['checkpoint_at']}  {c['accounts']} accounts  {c['transactions']} transactions")
+            return 0
+        created = service.create_checkpoints(args.until)
+    except TransactionServiceError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    for c in created:
+        print(f"Checkpoint {c['checkpoint_at']}: {c['accounts']} accounts, {c['transactions']} transactions replayed")
+    if not created:
+        print(f"No checkpoint due (every {get_checkpoint_interval_days()} days)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
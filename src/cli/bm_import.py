@@ -0,0 +1,246 @@
+# cli/bm_import.py
+# Bulk customer/account onboarding from CSV or Parquet.
+#
+#   python -m src.cli.bm_import customers.csv [--chunk-size 1000] [--rejects rejects.csv]
+#
+# Columns: name, email (required), phone, city, address, account_type and
+# opening_balance (optional). The file is read chunk by chunk; per chunk the
+# emails are checked with one lookup per EMAIL_LOOKUP_SIZE (200) emails, so 5
+# for a default 1000-row chunk, since the in.(...) filter travels in the URL.
+# Customers and their opening accounts are created with one insert each, and
+# opening balances are posted through TransactionService.post_batch(). Rows
+# that can't be imported are written to a reject file with the reason.
+import argparse
+import csv
+import math
+import os
+import sys
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from src.services.bm_customer_service import CustomerService, CustomerServiceError
+from src.services.bm_account_service import AccountService, AccountServiceError
+from src.services.bm_transaction_service import TransactionService, TransactionServiceError
+
+DEFAULT_CHUNK_SIZE = 1000
+
+CUSTOMER_COLUMNS = ("name", "email", "phone", "city", "address")
+
+Chunk = List[Tuple[int, Dict]]
+
+class OnboardingImportError(Exception):
+    pass
+
+def _csv_chunks(path: str, chunk_size: int) -> Iterator[Chunk]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        chunk: Chunk = []
+        # Line numbers as an editor shows them; line 1 is the header
+        for line_no, row in enumerate(csv.DictReader(f), start=2):
+            chunk.append((line_no, row))
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+def _parquet_chunks(path: str, chunk_size: int) -> Iterator[Chunk]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise OnboardingImportError("Reading Parquet needs pyarrow: pip install pyarrow")
+    row_no = 1
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+        rows = batch.to_pylist()
+        yield list(enumerate(rows, start=row_no))
+        row_no += len(rows)
+
+def read_chunks(path: str, fmt: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Chunk]:
+    fmt = (fmt or os.path.splitext(path)[1].lstrip(".")).lower()
+    if fmt == "csv":
+        return _csv_chunks(path, chunk_size)
+    if fmt in ("parquet", "pq"):
+        return _parquet_chunks(path, chunk_size)
+    raise OnboardingImportError(f"Unsupported file format: {fmt or 'unknown'} (use csv or parquet)")
+
+def _text(value) -> Optional[str]:
+    text = str(value).strip() if value is not None else ""
+    return text or None
+
+def _parse_row(row: Dict) -> Dict:
+    # Normalised customer fields plus account_type/opening_balance; raises ValueError with the reject reason
+    record = {c: _text(row.get(c)) for c in CUSTOMER_COLUMNS}
+    if not record["name"] or not record["email"]:
+        raise ValueError("Name and email required")
+    if "@" not in record["email"]:
+        raise ValueError(f"Invalid email: {record['email']}")
+    record["account_type"] = _text(row.get("account_type"))
+    raw_balance = _text(row.get("opening_balance"))
+    try:
+        record["opening_balance"] = float(raw_balance) if raw_balance else 0.0
+    except ValueError:
+        raise ValueError(f"Invalid opening_balance: {raw_balance}")
+    # float() accepts "nan" and "inf"; neither is a balance
+    if not math.isfinite(record["opening_balance"]):
+        raise ValueError(f"Invalid opening_balance: {raw_balance}")
+    if record["opening_balance"] < 0:
+        raise ValueError("opening_balance must not be negative")
+    if record["opening_balance"] and not record["account_type"]:
+        raise ValueError("opening_balance requires an account_type")
+    return record
+
+
+class _RejectWriter:
+    # Opened on the first reject so a clean import leaves no empty file behind
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._file = None
+        self._writer = None
+
+    def write(self, row_no: int, row: Dict, reason: str):
+        if self._writer is None:
+            self._file = open(self.path, "w", newline="", encoding="utf-8")
+            fields = ["row", "reason"] + [k for k in row if k not in ("row", "reason")]
+            self._writer = csv.DictWriter(self._file, fieldnames=fields, extrasaction="ignore")
+            self._writer.writeheader()
+        self._writer.writerow({**row, "row": row_no, "reason": reason})
+        self.count += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+class OnboardingImporter:
+    def __init__(self, customer_service: Optional[CustomerService] = None,
+                 account_service: Optional[AccountService] = None,
+                 transaction_service: Optional[TransactionService] = None):
+        self.customer_service = customer_service or CustomerService()
+        self.account_service = account_service or AccountService()
+        self.transaction_service = transaction_service or TransactionService()
+
+    def run(self, path: str, fmt: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+            rejects_path: Optional[str] = None, progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+        if chunk_size <= 0:
+            raise OnboardingImportError("chunk_size must be positive")
+        rejects = _RejectWriter(rejects_path or f"{os.path.splitext(path)[0]}.rejects.csv")
+        stats = {"rows": 0, "customers": 0, "accounts": 0, "deposits": 0, "rejected": 0}
+        seen = set()
+        started = time.perf_counter()
+        try:
+            for chunk in read_chunks(path, fmt, chunk_size):
+                self._import_chunk(chunk, seen, rejects, stats)
+                stats["rejected"] = rejects.count
+                if progress:
+                    progress(self._report(stats, started))
+        finally:
+            rejects.close()
+        result = self._report(stats, started)
+        result["rejects_path"] = rejects.path if rejects.count else None
+        return result
+
+    @staticmethod
+    def _report(stats: Dict, started: float) -> Dict:
+        seconds = time.perf_counter() - started
+        return {**stats, "seconds": round(seconds, 3), "rows_per_second": round(stats["rows"] / seconds, 1) if seconds else 0.0}
+
+    def _import_chunk(self, chunk: Chunk, seen: set, rejects: _RejectWriter, stats: Dict):
+        stats["rows"] += len(chunk)
+        pending: List[Tuple[int, Dict, Dict]] = []
+        for row_no, row in chunk:
+            try:
+                record = _parse_row(row)
+            except ValueError as e:
+                rejects.write(row_no, row, str(e))
+                continue
+            if record["email"] in seen:
+                rejects.write(row_no, row, f"Duplicate email in file: {record['email']}")
+                continue
+            seen.add(record["email"])
+            pending.append((row_no, row, record))
+        if not pending:
+            return
+
+        try:
+            taken = self.customer_service.existing_emails([r["email"] for _, _, r in pending])
+        except CustomerServiceError as e:
+            for row_no, row, _ in pending:
+                rejects.write(row_no, row, str(e))
+            return
+        fresh = []
+        for row_no, row, record in pending:
+            if record["email"] in taken:
+                rejects.write(row_no, row, f"Email already exists: {record['email']}")
+            else:
+                fresh.append((row_no, row, record))
+        if not fresh:
+            return
+
+        try:
+            created = self.customer_service.bulk_create_customers([r for _, _, r in fresh])
+        except CustomerServiceError as e:
+            for row_no, row, _ in fresh:
+                rejects.write(row_no, row, f"Customer insert failed: {e}")
+            return
+        stats["customers"] += len(created)
+        customer_ids = {c["email"]: c["customer_id"] for c in created}
+
+        wanted = [(row_no, row, r, customer_ids[r["email"]]) for row_no, row, r in fresh if r["account_type"]]
+        if not wanted:
+            return
+        try:
+            opened = self.account_service.bulk_open_accounts(
+                [{"customer_id": cid, "account_type": r["account_type"]} for _, _, r, cid in wanted]
+            )
+        except AccountServiceError as e:
+            for row_no, row, _, cid in wanted:
+                rejects.write(row_no, row, f"Customer {cid} created but account failed: {e}")
+            return
+        stats["accounts"] += len(opened)
+        account_ids = {a["customer_id"]: a["account_id"] for a in opened}
+
+        deposits = [(row_no, row, r, account_ids[cid]) for row_no, row, r, cid in wanted if r["opening_balance"] > 0]
+        if not deposits:
+            return
+        ops = [{"type": "deposit", "account_id": aid, "amount": r["opening_balance"]} for _, _, r, aid in deposits]
+        try:
+            posted = self.transaction_service.post_batch(ops)
+        except TransactionServiceError as e:
+            for row_no, row, _, aid in deposits:
+                rejects.write(row_no, row, f"Account {aid} opened but opening deposit failed: {e}")
+            return
+        stats["deposits"] += posted["posted"]
+        for (row_no, row, _, aid), result in zip(deposits, posted["results"]):
+            if result["status"] != "POSTED":
+                rejects.write(row_no, row, f"Account {aid} opened but opening deposit failed: {result.get('reason')}")
+
+
+def print_progress(report: Dict):
+    print(
+        f"\r{report['rows']} rows | {report['customers']} customers | {report['accounts']} accounts | "
+        f"{report['rejected']} rejected | {report['rows_per_second']:.0f} rows/s",
+        end="", file=sys.stderr, flush=True,
+    )
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk-import customers and opening accounts from CSV or Parquet")
+    parser.add_argument("path", help="input file (.csv or .parquet)")
+    parser.add_argument("--format", choices=["csv", "parquet"], help="file format (default: from the extension)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help=f"rows per batch (default {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument("--rejects", help="reject file (default: <input>.rejects.csv)")
+    args = parser.parse_args(argv)
+    try:
+        result = OnboardingImporter().run(args.path, args.format, args.chunk_size, args.rejects, progress=print_progress)
+    except (OnboardingImportError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(file=sys.stderr)
+    print(
+        f"Imported {result['customers']} customers, {result['accounts']} accounts, {result['deposits']} opening deposits "
+        f"from {result['rows']} rows in {result['seconds']}s ({result['rows_per_second']:.0f} rows/s)"
+    )
+    if result["rejects_path"]:
+        print(f"{result['rejected']} rows rejected, see {result['rejects_path']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+# cli/bm_statements.py
+# Monthly (or any date range) account statements, one file per account.
+#
+#   python -m src.cli.bm_statements 2026-09-01 2026-09-30 --out statements/ [--format csv|json] [--workers 4]
+import argparse
+import sys
+from typing import List, Optional
+from src.services.bm_statement_service import STATEMENT_CHUNK_SIZE, STATEMENT_FORMATS, StatementService, StatementServiceError
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate account statements for a date range")
+    parser.add_argument("start", help="first day, YYYY-MM-DD")
+    parser.add_argument("end", help="last day (inclusive), YYYY-MM-DD")
+    parser.add_argument("--out", default="statements", help="output directory (default: statements)")
+    parser.add_argument("--format", choices=STATEMENT_FORMATS, default="csv", help="csv, or json render-ready tables")
+    parser.add_argument("--accounts", type=int, nargs="*", help="only these account ids (default: all)")
+    parser.add_argument("--workers", type=int, help="writer processes (default: CPU count, 1 = no pool)")
+    parser.add_argument("--chunk-size", type=int, default=STATEMENT_CHUNK_SIZE, help="accounts per batch")
+    args = parser.parse_args(argv)
+    try:
+        result = StatementService().generate(
+            args.start, args.end, args.out, args.accounts, args.format, args.workers, args.chunk_size
+        )
+    except StatementServiceError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(
+        f"Wrote {result['accounts']} statements ({result['transactions']} transactions) to {result['out_dir']} "
+        f"in {result['seconds']}s ({result['statements_per_second']:.0f} statements/s)"
+    )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,17 @@
+import time
+_STARTED = time.perf_counter()
+import argparse
 import json
-from src.services.bm_customer_service import CustomerService, CustomerServiceError
-from src.services.bm_account_service import AccountService, AccountServiceError
-from src.services.bm_transaction_service import TransactionService, TransactionServiceError
-from src.services.bm_loan_service import LoanService, LoanServiceError
-from src.services.bm_employee_service import EmployeeService, EmployeeServiceError
-from src.services.bm_loan_repayment_service import LoanRepaymentService, LoanRepaymentServiceError
+import sys
+from typing import List, Optional
+from src.config import get_startup_timing
+from src.dao.bm_query_stats import get_query_stats, reset_query_stats
+from src.services.bm_registry import ServiceRegistry
 
 class BankMenu:
-    def __init__(self):
-        self.customer_service = CustomerService()
-        self.account_service = AccountService()
-        self.transaction_service = TransactionService()
-        self.loan_service = LoanService()
-        self.employee_service = EmployeeService()
-        self.loan_repayment_service = LoanRepaymentService()
+    def __init__(self, services: Optional[ServiceRegistry] = None):
+        # Services (and the backend client) are built by the first action that needs them
+        self.services = services or ServiceRegistry()
         self.running = True
 
     def print_menu(self):
@@ -28,6 +26,8 @@ class BankMenu:
         print("8. Repay Loan")
         print("9. List Loans")
         print("10. Add Employee")
+        print("11. Bulk Import Customers (CSV/Parquet)")
+        print("12. Query Stats")
         print("0. Exit")
 
     def run(self):
@@ -56,6 +56,10 @@ class BankMenu:
                     self.list_loans()
                 case "10":
                     self.add_employee()
+                case "11":
+                    self.bulk_import()
+                case "12":
+                    self.query_stats()
                 case "0":
                     print("Exiting the program.")
                     self.running = False
@@ -70,25 +74,25 @@ class BankMenu:
             phone = input("Phone (optional): ")
             city = input("City (optional): ")
             address = input("Address (optional): ")
-            customer = self.customer_service.create_customer(name, email, phone or None, city or None, address or None)
+            customer = self.services.customer_service.create_customer(name, email, phone or None, city or None, address or None)
             print("Customer created:", json.dumps(customer, indent=2))
-        except CustomerServiceError as e:
+        except self.services.errors.CustomerServiceError as e:
             print("Error:", e)
 
     def list_customers(self):
         try:
-            customers = self.customer_service.list_customers()
+            customers = self.services.customer_service.list_customers()
             print("Customers:", json.dumps(customers, indent=2))
-        except CustomerServiceError as e:
+        except self.services.errors.CustomerServiceError as e:
             print("Error:", e)
 
     def open_account(self):
         try:
             cust_id = int(input("Customer ID: "))
             acc_type = input("Account Type (Savings/Checking): ")
-            account = self.account_service.open_account(cust_id, acc_type)
+            account = self.services.account_service.open_account(cust_id, acc_type)
             print("Account opened:", json.dumps(account, indent=2))
-        except AccountServiceError as e:
+        except self.services.errors.AccountServiceError as e:
             print("Error:", e)
         except ValueError:
             print("Please enter a valid Customer ID (integer)")
@@ -97,9 +101,9 @@ class BankMenu:
         try:
             acc_id = int(input("Account ID: "))
             amount = float(input("Deposit Amount: "))
-            txn = self.transaction_service.deposit(acc_id, amount)
+            txn = self.services.transaction_service.deposit(acc_id, amount)
             print("Deposit successful:", json.dumps(txn, indent=2))
-        except TransactionServiceError as e:
+        except self.services.errors.TransactionServiceError as e:
             print("Error:", e)
         except ValueError:
             print("Invalid input for account ID or amount")
@@ -108,9 +112,9 @@ class BankMenu:
         try:
             acc_id = int(input("Account ID: "))
             amount = float(input("Withdraw Amount: "))
-            txn = self.transaction_service.withdraw(acc_id, amount)
+            txn = self.services.transaction_service.withdraw(acc_id, amount)
             print("Withdrawal successful:", json.dumps(txn, indent=2))
-        except TransactionServiceError as e:
+        except self.services.errors.TransactionServiceError as e:
             print("Error:", e)
         except ValueError:
             print("Invalid input for account ID or amount")
@@ -120,33 +124,36 @@ class BankMenu:
             from_acc = int(input("From Account ID: "))
             to_acc = int(input("To Account ID: "))
             amount = float(input("Transfer Amount: "))
-            txn = self.transaction_service.transfer(from_acc, to_acc, amount)
+            txn = self.services.transaction_service.transfer(from_acc, to_acc, amount)
             print("Transfer successful:", json.dumps(txn, indent=2))
-        except TransactionServiceError as e:
+        except self.services.errors.TransactionServiceError as e:
             print("Error:", e)
         except ValueError:
             print("Invalid input for account IDs or amount")
 
     def apply_loan(self):
+        from src.dao.bm_loan_dao import DEFAULT_TENURE_MONTHS
         try:
             cust_id = int(input("Customer ID: "))
             loan_type = input("Loan Type: ")
             amount = float(input("Loan Amount: "))
             interest_rate = float(input("Interest Rate: "))
-            loan = self.loan_service.apply_for_loan(cust_id, loan_type, amount, interest_rate)
+            tenure = input(f"Tenure in months [{DEFAULT_TENURE_MONTHS}]: ").strip()
+            tenure_months = int(tenure) if tenure else DEFAULT_TENURE_MONTHS
+            loan = self.services.loan_service.apply_for_loan(cust_id, loan_type, amount, interest_rate, tenure_months)
             print("Loan applied:", json.dumps(loan, indent=2))
-        except LoanServiceError as e:
+        except self.services.errors.LoanServiceError as e:
             print("Error:", e)
         except ValueError:
-            print("Invalid input for customer ID, amount, or interest rate")
+            print("Invalid input for customer ID, amount, interest rate, or tenure")
 
     def repay_loan(self):
         try:
             loan_id = int(input("Loan ID: "))
             amount = float(input("Repayment Amount: "))
-            repayment = self.loan_repayment_service.make_repayment(loan_id, amount)
+            repayment = self.services.loan_repayment_service.make_repayment(loan_id, amount)
             print("Loan repayment successful:", json.dumps(repayment, indent=2))
-        except LoanRepaymentServiceError as e:
+        except self.services.errors.LoanRepaymentServiceError as e:
             print("Error:", e)
         except ValueError:
             print("Invalid input for loan ID or amount")
@@ -161,14 +168,70 @@ class BankMenu:
             email = input("Email: ")
             phone = input("Phone (optional): ")
             password = input("Password: ")
-            emp = self.employee_service.add_employee(name, role, email, phone or None, password)
+            emp = self.services.employee_service.add_employee(name, role, email, phone or None, password)
             print("Employee added:", json.dumps(emp, indent=2))
-        except EmployeeServiceError as e:
+        except self.services.errors.EmployeeServiceError as e:
             print("Error:", e)
 
-def main():
+    def bulk_import(self):
+        from src.cli.bm_import import OnboardingImporter, OnboardingImportError, print_progress
+        path = input("File path (.csv or .parquet): ").strip()
+        try:
+            importer = OnboardingImporter(
+                self.services.customer_service, self.services.account_service, self.services.transaction_service
+            )
+            result = importer.run(path, progress=print_progress)
+            print()
+            print("Import finished:", json.dumps(result, indent=2))
+        except (OnboardingImportError, OSError) as e:
+            print("Error:", e)
+
+    def query_stats(self):
+        stats = get_query_stats()
+        if not stats["operations"]:
+            print("No queries recorded yet.")
+        else:
+            print(f"{'table':32} {'op':8} {'count':>6} {'errors':>6} {'rows':>8} {'bytes':>10} {'avg ms':>8} {'max ms':>8}")
+            for op in stats["operations"]:
+                print(f"{op['table']:32} {op['operation']:8} {op['count']:>6} {op['errors']:>6} {op['rows']:>8} "
+                      f"{op['bytes']:>10} {op['avg_ms']:>8.2f} {op['max_ms']:>8.2f}")
+            print("Latency histogram:", " | ".join(stats["buckets"]))
+            for op in stats["operations"]:
+                print(f"  {op['operation']} {op['table']}: {op['histogram']}")
+        print(f"Slow queries (>= {stats['slow_ms']:.0f} ms): {len(stats['slow_queries'])}")
+        for q in stats["slow_queries"]:
+            print(f"  {q['at']} {q['ms']:.1f} ms {q['operation']} {q['table']} [{q['query']}] rows={q['rows']}"
+                  + (f" error={q['error']}" if q["error"] else ""))
+        if input("Reset stats? (y/N): ").strip().lower() == "y":
+            reset_query_stats()
+            print("Query stats reset.")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bank Management System")
+    parser.add_argument("--startup-time", action="store_true",
+                        help="print the time from start-up to the first prompt and exit")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="run a JSONL file of operations ('-' for stdin) instead of the menu")
+    parser.add_argument("--output", metavar="FILE", help="with --batch: JSONL results file (default: stdout)")
+    parser.add_argument("--concurrency", type=int, help="with --batch: operations in flight")
+    args = parser.parse_args(argv)
+    if args.batch:
+        from src.cli.bm_batch import DEFAULT_CONCURRENCY, BatchError, print_summary, run_batch
+        try:
+            summary = run_batch(args.batch, args.output, args.concurrency or DEFAULT_CONCURRENCY)
+        except (BatchError, OSError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 2
+        print_summary(summary)
+        return 1 if summary["errors"] else 0
     menu = BankMenu()
+    if args.startup_time or get_startup_timing():
+        # Measured from this module's first line, so interpreter boot is not included
+        print(f"Startup: {(time.perf_counter() - _STARTED) * 1000:.1f} ms to first prompt", file=sys.stderr)
+        if args.startup_time:
+            return 0
     menu.run()
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
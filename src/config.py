@@ -1,35 +1,439 @@
 # src/config.py
+import asyncio
+import json
 import os
+import sys
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from src.dao.bm_round_trips import active_trackers, carry_trackers, record_round_trip
+from src.dao.bm_query_stats import DEFAULT_SLOW_QUERY_MS, InstrumentedClient, record_response_size, set_slow_query_threshold
+
+if TYPE_CHECKING:
+    # supabase (with postgrest, httpx and auth) is imported when a client is built
+    from supabase import Client
+    from src.dao.bm_velocity import VelocityRule
 
 # Load .env only for local dev
 load_dotenv()
 
-def _read_supabase_creds():
-    # Prefer Streamlit secrets in Cloud; fall back to env for local dev
+# Defaults for the shared HTTP connection pool (overridable via secrets/env)
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_CONNECT_TIMEOUT = 5.0
+# Max in-flight queries when async services fan out (BM_ASYNC_CONCURRENCY)
+DEFAULT_ASYNC_CONCURRENCY = 8
+# How TransactionService changes balances (BM_POSTING_MODE): "rpc" uses the
+# sql/001 posting functions, "cas" uses version-checked updates (sql/006).
+# "cas" is not atomic: the balance update and the ledger insert are separate
+# requests. A failure in between is compensated by reversing the balance change,
+# but a crash in that window, or a failed reversal (logged on bm.postings), leaves
+# a balance change without its ledger row, which checkpoints and statements
+# (both replay the ledger) will not see. A timed-out request that did commit is
+# reversed as if it had failed. Prefer "rpc" wherever sql/001 can be installed.
+POSTING_MODES = ("rpc", "cas")
+# Days between balance checkpoints (BM_CHECKPOINT_INTERVAL_DAYS); they are
+# written by python -m src.cli.bm_checkpoints, meant to run from cron
+DEFAULT_CHECKPOINT_INTERVAL_DAYS = 30
+# Age a transaction must reach before the monthly rollup folds it in
+# (BM_ROLLUP_LAG_SECONDS); must exceed the longest posting transaction
+DEFAULT_ROLLUP_LAG_SECONDS = 60.0
+# Where the bm_* tables live (BM_STORAGE_BACKEND): "supabase" or an embedded
+# SQLite file (BM_SQLITE_PATH) through dao/bm_sqlite_client.py
+STORAGE_BACKENDS = ("supabase", "sqlite")
+DEFAULT_SQLITE_PATH = "bank.db"
+
+def _read_secret(name: str) -> Optional[str]:
+    # Prefer Streamlit secrets in Cloud; fall back to env for local dev. Only
+    # consulted when running under Streamlit, so the CLI never imports it.
+    st = sys.modules.get("streamlit")
     try:
-        import streamlit as st
-        url = st.secrets.get("SUPABASE_URL", None)
-        key = st.secrets.get("SUPABASE_KEY", None)
+        value = st.secrets.get(name, None) if st is not None else None
     except Exception:
-        url = None
-        key = None
-
-    if not url:
-        url = os.getenv("SUPABASE_URL")
-    if not key:
-        key = os.getenv("SUPABASE_KEY")
-    return (url.strip() if url else None, key.strip() if key else None)
-
-def get_supabase() -> Client:
-    url, key = _read_supabase_creds()
-    if not url or not key:
-        # Log booleans for diagnostics without leaking values
-        print("Supabase creds present? URL:", bool(url), "KEY:", bool(key))
-        raise RuntimeError("Missing Supabase credentials via secrets or environment")
+        value = None
+    if not value:
+        value = os.getenv(name)
+    return str(value).strip() if value else None
+
+def _read_supabase_creds():
+    return _read_secret("SUPABASE_URL"), _read_secret("SUPABASE_KEY")
+
+def _read_pool_settings() -> Dict:
+    def _num(name, default, cast):
+        raw = _read_secret(name)
+        try:
+            return cast(raw) if raw else default
+        except ValueError:
+            raise RuntimeError(f"Invalid value for {name}: {raw}")
+
+    pool_size = _num("SUPABASE_POOL_SIZE", DEFAULT_POOL_SIZE, int)
+    return {
+        "pool_size": pool_size,
+        "keepalive": _num("SUPABASE_POOL_KEEPALIVE", pool_size, int),
+        "timeout": _num("SUPABASE_TIMEOUT", DEFAULT_TIMEOUT, float),
+        "connect_timeout": _num("SUPABASE_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT, float),
+    }
+
+def get_async_concurrency() -> int:
+    raw = _read_secret("BM_ASYNC_CONCURRENCY")
+    try:
+        return max(int(raw), 1) if raw else DEFAULT_ASYNC_CONCURRENCY
+    except ValueError:
+        raise RuntimeError(f"Invalid value for BM_ASYNC_CONCURRENCY: {raw}")
+
+def get_checkpoint_interval_days() -> int:
+    raw = _read_secret("BM_CHECKPOINT_INTERVAL_DAYS")
+    try:
+        return max(int(raw), 1) if raw else DEFAULT_CHECKPOINT_INTERVAL_DAYS
+    except ValueError:
+        raise RuntimeError(f"Invalid value for BM_CHECKPOINT_INTERVAL_DAYS: {raw}")
+
+def get_rollup_lag_seconds() -> float:
+    raw = _read_secret("BM_ROLLUP_LAG_SECONDS")
+    try:
+        return max(float(raw), 0.0) if raw else DEFAULT_ROLLUP_LAG_SECONDS
+    except ValueError:
+        raise RuntimeError(f"Invalid value for BM_ROLLUP_LAG_SECONDS: {raw}")
+
+def get_slow_query_ms() -> float:
+    # Queries at least this slow go to the slow-query log (dao/bm_query_stats.py)
+    raw = _read_secret("BM_SLOW_QUERY_MS")
     try:
-        print("Creating Supabase client for host:", url.split("//")[-1])
-        return create_client(url, key)
-    except Exception as e:
-        raise RuntimeError(f"Failed to create Supabase client: {e}")
\ No newline at end of file
+        return max(float(raw), 0.0) if raw else DEFAULT_SLOW_QUERY_MS
+    except ValueError:
+        raise RuntimeError(f"Invalid value for BM_SLOW_QUERY_MS: {raw}")
+
+def get_storage_backend() -> str:
+    backend = (_read_secret("BM_STORAGE_BACKEND") or STORAGE_BACKENDS[0]).lower()
+    if backend not in STORAGE_BACKENDS:
+        raise RuntimeError(f"Invalid value for BM_STORAGE_BACKEND: {backend}")
+    return backend
+
+def get_sqlite_path() -> str:
+    return _read_secret("BM_SQLITE_PATH") or DEFAULT_SQLITE_PATH
+
+def get_startup_timing() -> bool:
+    # BM_STARTUP_TIMING=1 reports start-up/run times in app.py and the CLI
+    return (_read_secret("BM_STARTUP_TIMING") or "").lower() in ("1", "true", "yes")
+
+def get_velocity_rules() -> List["VelocityRule"]:
+    # BM_VELOCITY_RULES: JSON list of posting limits (format in dao/bm_velocity.py); none by default
+    raw = _read_secret("BM_VELOCITY_RULES")
+    if not raw:
+        return []
+    from src.dao.bm_velocity import parse_rules
+    try:
+        return parse_rules(json.loads(raw))
+    except ValueError as e:
+        raise RuntimeError(f"Invalid value for BM_VELOCITY_RULES: {e}")
+
+def get_posting_mode() -> str:
+    mode = (_read_secret("BM_POSTING_MODE") or POSTING_MODES[0]).lower()
+    if mode not in POSTING_MODES:
+        raise RuntimeError(f"Invalid value for BM_POSTING_MODE: {mode}")
+    return mode
+
+
+# Process-wide Supabase client shared by every DAO. One client means one httpx
+# connection pool, so Streamlit reruns and BankMenu() reuse open keep-alive
+# connections instead of paying a new client + TLS handshake each time.
+class _ClientRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._client: Optional["Client"] = None
+        self._installed = False
+        self._http = None
+        self._sqlite = None
+        self._stats = {
+            "client_constructions": 0,
+            "client_reuses": 0,
+            "async_client_constructions": 0,
+            "http_requests": 0,
+            "connections_opened": 0,
+        }
+
+    def _trace(self, event_name: str, info: Dict):
+        # httpcore trace hook: fires only when a brand new TCP connection is made
+        if event_name == "connection.connect_tcp.complete":
+            with self._stats_lock:
+                self._stats["connections_opened"] += 1
+
+    def _on_request(self, request):
+        with self._stats_lock:
+            self._stats["http_requests"] += 1
+        record_round_trip()
+        request.extensions["trace"] = self._trace
+
+    def _on_response(self, response):
+        # Wire size for the query stats, without reading or re-encoding the body
+        record_response_size(response.headers)
+
+    def _build(self) -> "Client":
+        if get_storage_backend() == "sqlite":
+            return self._build_sqlite()
+        url, key = _read_supabase_creds()
+        if not url or not key:
+            # Log booleans for diagnostics without leaking values
+            print("Supabase creds present? URL:", bool(url), "KEY:", bool(key))
+            raise RuntimeError("Missing Supabase credentials via secrets or environment")
+        settings = _read_pool_settings()
+        try:
+            import httpx
+            from supabase import ClientOptions, create_client
+
+            self._http = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=settings["pool_size"],
+                    max_keepalive_connections=settings["keepalive"],
+                ),
+                timeout=httpx.Timeout(settings["timeout"], connect=settings["connect_timeout"]),
+                event_hooks={"request": [self._on_request], "response": [self._on_response]},
+            )
+            print("Creating Supabase client for host:", url.split("//")[-1])
+            client = create_client(url, key, options=ClientOptions(httpx_client=self._http))
+        except Exception as e:
+            self._close_http()
+            raise RuntimeError(f"Failed to create Supabase client: {e}")
+        with self._stats_lock:
+            self._stats["client_constructions"] += 1
+        return client
+
+    def _build_sqlite(self):
+        from src.dao.bm_sqlite_client import SQLiteClient
+
+        path = get_sqlite_path()
+        try:
+            client = SQLiteClient(path)
+        except Exception as e:
+            raise RuntimeError(f"Failed to open SQLite database {path}: {e}")
+        self._sqlite = client
+        with self._stats_lock:
+            self._stats["client_constructions"] += 1
+        return client
+
+    @staticmethod
+    def _instrument(client):
+        # Every DAO query goes through this wrapper (dao/bm_query_stats.py)
+        set_slow_query_threshold(get_slow_query_ms())
+        return client if isinstance(client, InstrumentedClient) else InstrumentedClient(client)
+
+    def get(self) -> "Client":
+        with self._lock:
+            if self._client is None:
+                self._client = self._instrument(self._build())
+            else:
+                with self._stats_lock:
+                    self._stats["client_reuses"] += 1
+            return self._client
+
+    def install(self, client):
+        with self._lock:
+            self._close_http()
+            if self._sqlite is not None:
+                self._sqlite.close()
+                self._sqlite = None
+            self._client = self._instrument(client)
+            self._installed = True
+
+    def installed_client(self):
+        # The client passed to set_supabase(), if any
+        with self._lock:
+            return self._client if self._installed else None
+
+    def local_client(self):
+        # The synchronous client async DAOs should drive from worker threads:
+        # one installed with set_supabase(), or the embedded SQLite backend
+        installed = self.installed_client()
+        if installed is None and get_storage_backend() == "sqlite":
+            return self.get()
+        return installed
+
+    def count(self, stat: str):
+        with self._stats_lock:
+            self._stats[stat] += 1
+
+    def _close_http(self):
+        if self._http is not None:
+            try:
+                self._http.close()
+            finally:
+                self._http = None
+
+    def close(self):
+        with self._lock:
+            self._client = None
+            self._installed = False
+            self._close_http()
+            if self._sqlite is not None:
+                self._sqlite.close()
+                self._sqlite = None
+
+    def reset(self):
+        self.close()
+        with self._stats_lock:
+            for k in self._stats:
+                self._stats[k] = 0
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["connections_reused"] = max(stats["http_requests"] - stats["connections_opened"], 0)
+        return stats
+
+
+_registry = _ClientRegistry()
+
+
+# Lets async DAOs drive a synchronous client (e.g. the SQLite backend) by
+# running each execute() in a worker thread.
+class _ThreadedAsyncClient:
+    def __init__(self, client):
+        self._client = client
+
+    def table(self, name: str):
+        return _ThreadedAsyncBuilder(self._client.table(name))
+
+    def rpc(self, fn: str, params: Optional[Dict] = None):
+        return _ThreadedAsyncBuilder(self._client.rpc(fn, params or {}))
+
+
+class _ThreadedAsyncBuilder:
+    def __init__(self, builder):
+        self._builder = builder
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            return attr
+
+        def chained(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            return _ThreadedAsyncBuilder(result) if result is not None else None
+        return chained
+
+    async def execute(self):
+        return await asyncio.to_thread(self._builder.execute)
+
+
+# One AsyncClient for the process, owned by a long-lived event loop on a
+# background thread. httpx async connections belong to the loop that opened
+# them, so sync callers run coroutines on this loop with run_async() instead of
+# asyncio.run(); every Streamlit rerun then reuses the same pooled connections.
+class _AsyncClientRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client = None
+        self._http = None
+
+    async def _trace(self, event_name: str, info: Dict):
+        # httpcore requires an async trace hook on async connections
+        _registry._trace(event_name, info)
+
+    async def _on_request(self, request):
+        _registry._on_request(request)
+        request.extensions["trace"] = self._trace
+
+    async def _on_response(self, response):
+        _registry._on_response(response)
+
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="bm-async", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def run(self, coro):
+        loop = self.loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            coro.close()
+            raise RuntimeError("run_async() called from the async services loop; await the coroutine instead")
+        # The caller's round-trip trackers follow the coroutine onto the loop thread
+        return asyncio.run_coroutine_threadsafe(carry_trackers(active_trackers(), coro), loop).result()
+
+    async def _build(self):
+        url, key = _read_supabase_creds()
+        if not url or not key:
+            raise RuntimeError("Missing Supabase credentials via secrets or environment")
+        settings = _read_pool_settings()
+        try:
+            import httpx
+            from supabase import AsyncClientOptions, acreate_client
+
+            http = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings["pool_size"],
+                    max_keepalive_connections=settings["keepalive"],
+                ),
+                timeout=httpx.Timeout(settings["timeout"], connect=settings["connect_timeout"]),
+                event_hooks={"request": [self._on_request], "response": [self._on_response]},
+            )
+            client = await acreate_client(url, key, options=AsyncClientOptions(httpx_client=http))
+        except Exception as e:
+            raise RuntimeError(f"Failed to create async Supabase client: {e}")
+        _registry.count("async_client_constructions")
+        return _registry._instrument(client), http
+
+    async def get(self):
+        local = _registry.local_client()
+        if local is not None:
+            return _ThreadedAsyncClient(local)
+        if asyncio.get_running_loop() is not self._loop:
+            # A client on any other loop would be rebuilt, and leak, per asyncio.run()
+            raise RuntimeError("Async services must run through config.run_async()")
+        if self._client is not None:
+            _registry.count("client_reuses")
+            return self._client
+        client, http = await self._build()
+        if self._client is not None:
+            # Another coroutine on this loop built one while we awaited
+            await http.aclose()
+            return self._client
+        self._client, self._http = client, http
+        return client
+
+    def close(self):
+        # Close the pooled connections on the loop that owns them
+        with self._lock:
+            loop, http = self._loop, self._http
+            self._client = self._http = None
+        if http is not None and loop is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(http.aclose(), loop).result()
+
+
+_async_registry = _AsyncClientRegistry()
+
+def get_supabase() -> "Client":
+    return _registry.get()
+
+async def get_async_supabase():
+    # Async counterpart of get_supabase() for the dao/bm_async_dao.py classes
+    return await _async_registry.get()
+
+def run_async(coro):
+    # Run a coroutine of the async services on the shared loop and return its result
+    return _async_registry.run(coro)
+
+def set_supabase(client):
+    # Install a pre-built client (e.g. dao.bm_sqlite_client.SQLiteClient) as the shared one
+    _registry.install(client)
+
+def close_supabase():
+    # Drop the shared client and its pooled connections; the next get_supabase() rebuilds it
+    _registry.close()
+    _async_registry.close()
+
+def reset_supabase():
+    # close_supabase() plus zeroing the counters (tests, benchmarks)
+    _registry.reset()
+    _async_registry.close()
+
+def get_supabase_stats() -> Dict:
+    return _registry.stats()
@@ -1,6 +1,13 @@
 # dao/bm_account_dao.py
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Union
 from src.config import get_supabase
+from src.dao.bm_round_trips import round_trip_budget
+from src.dao.bm_pagination import DEFAULT_PAGE_SIZE, iter_keyset, with_key
+from src.dao.bm_records import ColumnarResult
+from src.dao.bm_velocity import get_velocity_limiter
+
+# Ids per in.(...) filter in iter_accounts_by_ids(), keeps the request URL short
+ACCOUNT_LOOKUP_SIZE = 500
 
 class AccountDAOError(Exception):
     pass
@@ -9,29 +16,64 @@ class AccountDAO:
     def __init__(self):
         self._sb = get_supabase()
 
+    @round_trip_budget(1)
     def open_account(self, customer_id: int, account_type: str) -> Dict:
         if not customer_id or not account_type:
             raise AccountDAOError("customer_id and account_type are required")
         payload = {"customer_id": customer_id, "account_type": account_type, "balance": 0, "status": "ACTIVE"}
-        self._sb.table("bm_accounts").insert(payload).execute()
-        resp = self._sb.table("bm_accounts").select("*").eq("customer_id", customer_id).order("account_id", desc=True).limit(1).execute()
+        resp = self._sb.table("bm_accounts").insert(payload).execute()
+        if resp.data:
+            get_velocity_limiter().note_account(resp.data[0]["account_id"], customer_id)
         return resp.data[0] if resp.data else None
 
+    @round_trip_budget(1)
+    def bulk_open_accounts(self, rows: List[Dict]) -> List[Dict]:
+        # rows: [{"customer_id", "account_type"}, ...], opened ACTIVE with zero balance in one insert
+        if any(not r.get("customer_id") or not r.get("account_type") for r in rows):
+            raise AccountDAOError("customer_id and account_type are required")
+        if not rows:
+            return []
+        payload = [{"customer_id": r["customer_id"], "account_type": r["account_type"], "balance": 0, "status": "ACTIVE"} for r in rows]
+        try:
+            resp = self._sb.table("bm_accounts").insert(payload).execute()
+        except Exception as e:
+            raise AccountDAOError(f"Failed to open accounts: {e}")
+        for row in resp.data or []:
+            get_velocity_limiter().note_account(row["account_id"], row["customer_id"])
+        return resp.data or []
+
+    @round_trip_budget(1)
     def close_account(self, account_id: int) -> Optional[Dict]:
-        account = self._sb.table("bm_accounts").select("*").eq("account_id", account_id).limit(1).execute()
-        if not account.data or account.data[0].get("balance", 0) != 0:
+        # Zero-balance check is part of the update filter, so it can't race a deposit
+        resp = self._sb.table("bm_accounts").update({"status": "CLOSED"}).eq("account_id", account_id).eq("balance", 0).execute()
+        if not resp.data:
             raise AccountDAOError("Account must have zero balance to close")
-        self._sb.table("bm_accounts").update({"status": "CLOSED"}).eq("account_id", account_id).execute()
-        resp = self._sb.table("bm_accounts").select("*").eq("account_id", account_id).limit(1).execute()
-        return resp.data[0] if resp.data else None
+        return resp.data[0]
 
-    def list_accounts_by_customer(self, customer_id: int) -> List[Dict]:
-        resp = self._sb.table("bm_accounts").select("*").eq("customer_id", customer_id).execute()
-        return resp.data or []
+    def list_accounts_by_customer(self, customer_id: int, columns: str = "*", compact: bool = False) -> Union[List[Dict], ColumnarResult]:
+        resp = self._sb.table("bm_accounts").select(columns).eq("customer_id", customer_id).execute()
+        return ColumnarResult.from_rows(resp.data or []) if compact else resp.data or []
+
+    def list_all_accounts(self, columns: str = "*", compact: bool = False) -> Union[list, ColumnarResult]:
+        # compact=True builds the columns page by page instead of holding every row as a dict
+        if compact:
+            return ColumnarResult.from_rows(self.iter_all_accounts(columns=columns))
+        return list(self.iter_all_accounts(columns=columns))
+
+    def iter_all_accounts(self, page_size: int = DEFAULT_PAGE_SIZE, prefetch: bool = False, columns: str = "*") -> Iterator[Dict]:
+        columns = with_key(columns, "account_id")
+        try:
+            yield from iter_keyset(lambda: self._sb.table("bm_accounts").select(columns), "account_id", page_size, prefetch)
+        except Exception as e:
+            raise AccountDAOError(f"Failed to list all accounts: {e}")
 
-    def list_all_accounts(self) -> list:
+    def iter_accounts_by_ids(self, account_ids: List[int], columns: str = "*") -> Iterator[Dict]:
+        # These accounts in account_id order, one in.(...) request per chunk of ids; unknown ids are skipped
+        ids = sorted(set(account_ids))
         try:
-            resp = self._sb.table("bm_accounts").select("*").execute()
-            return resp.data or []
+            for start in range(0, len(ids), ACCOUNT_LOOKUP_SIZE):
+                resp = self._sb.table("bm_accounts").select(with_key(columns, "account_id")) \
+                    .in_("account_id", ids[start:start + ACCOUNT_LOOKUP_SIZE]).order("account_id").execute()
+                yield from resp.data or []
         except Exception as e:
-            raise AccountDAOError(f"Failed to list all accounts: {e}")
\ No newline at end of file
+            raise AccountDAOError(f"Failed to fetch accounts: {e}")
\ No newline at end of file
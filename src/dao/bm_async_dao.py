@@ -0,0 +1,259 @@
+# dao/bm_async_dao.py
+# Async counterparts of the DAOs, on the async Supabase client from
+# get_async_supabase(). Same tables, queries, return shapes and error types as
+# the sync DAOs, so services can await several of them concurrently.
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+from postgrest.exceptions import APIError
+from src.config import get_async_supabase, get_supabase, get_velocity_rules
+from src.dao.bm_pagination import DEFAULT_PAGE_SIZE, aiter_keyset, with_key
+from src.dao.bm_account_dao import AccountDAOError
+from src.dao.bm_customer_dao import CustomerDAOError, DEFAULT_SEARCH_LIMIT, search_filter
+from src.dao.bm_dashboard_dao import DashboardDAOError, PREVIEW_TABLES
+from src.dao.bm_employee_dao import EmployeeDAOError
+from src.dao.bm_loan_dao import DEFAULT_TENURE_MONTHS, LoanDAOError
+from src.dao.bm_loan_repayment_dao import LoanRepaymentDAOError, repayment_params, repayment_result
+from src.dao.bm_transaction_dao import TransactionDAOError, posting_amount, reserve_velocity
+from src.dao.bm_velocity import get_velocity_limiter
+
+async def _collect(query_factory, key: str, page_size: int = DEFAULT_PAGE_SIZE) -> List[Dict]:
+    return [row async for row in aiter_keyset(query_factory, key, page_size)]
+
+
+class AsyncAccountDAO:
+    async def open_account(self, customer_id: int, account_type: str) -> Dict:
+        if not customer_id or not account_type:
+            raise AccountDAOError("customer_id and account_type are required")
+        sb = await get_async_supabase()
+        payload = {"customer_id": customer_id, "account_type": account_type, "balance": 0, "status": "ACTIVE"}
+        resp = await sb.table("bm_accounts").insert(payload).execute()
+        if resp.data:
+            get_velocity_limiter().note_account(resp.data[0]["account_id"], customer_id)
+        return resp.data[0] if resp.data else None
+
+    async def close_account(self, account_id: int) -> Optional[Dict]:
+        sb = await get_async_supabase()
+        resp = await sb.table("bm_accounts").update({"status": "CLOSED"}).eq("account_id", account_id).eq("balance", 0).execute()
+        if not resp.data:
+            raise AccountDAOError("Account must have zero balance to close")
+        return resp.data[0]
+
+    async def list_accounts_by_customer(self, customer_id: int, columns: str = "*") -> List[Dict]:
+        sb = await get_async_supabase()
+        resp = await sb.table("bm_accounts").select(columns).eq("customer_id", customer_id).execute()
+        return resp.data or []
+
+    async def list_all_accounts(self, columns: str = "*") -> List[Dict]:
+        try:
+            sb = await get_async_supabase()
+            return await _collect(lambda: sb.table("bm_accounts").select(with_key(columns, "account_id")), "account_id")
+        except Exception as e:
+            raise AccountDAOError(f"Failed to list all accounts: {e}")
+
+
+class AsyncCustomerDAO:
+    async def create_customer(self, name: str, email: str, phone: Optional[str], city: Optional[str], address: Optional[str]) -> Dict:
+        if not name or not email:
+            raise CustomerDAOError("Name and email required")
+        if await self.get_customer_by_email(email, "customer_id"):
+            raise CustomerDAOError(f"Email already exists: {email}")
+        sb = await get_async_supabase()
+        payload = {"name": name, "email": email, "phone": phone, "city": city, "address": address}
+        resp = await sb.table("bm_customers").insert(payload).execute()
+        return resp.data[0] if resp.data else None
+
+    async def get_customer_by_id(self, cust_id: int, columns: str = "*") -> Optional[Dict]:
+        sb = await get_async_supabase()
+        resp = await sb.table("bm_customers").select(columns).eq("customer_id", cust_id).limit(1).execute()
+        return resp.data[0] if resp.data else None
+
+    async def get_customer_by_email(self, email: str, columns: str = "*") -> Optional[Dict]:
+        sb = await get_async_supabase()
+        resp = await sb.table("bm_customers").select(columns).eq("email", email).limit(1).execute()
+        return resp.data[0] if resp.data else None
+
+    async def update_customer(self, cust_id: int, fields: Dict) -> Optional[Dict]:
+        if not fields:
+            raise CustomerDAOError("No fields to update")
+        sb = await get_async_supabase()
+        resp = await sb.table("bm_customers").update(fields).eq("customer_id", cust_id).execute()
+        return resp.data[0] if resp.data else None
+
+    async def list_customers(self, limit: int = 100, columns: str = "*") -> List[Dict]:
+        sb = await get_async_supabase()
+        resp = await sb.table("bm_customers").select(columns).order("customer_id", desc=False).limit(limit).execute()
+        return resp.data or []
+
+    async def find_customers(self, query: str, match: str = "prefix", limit: int = DEFAULT_SEARCH_LIMIT, offset: int = 0, columns: str = "customer_id,name,email") -> List[Dict]:
+        filters = search_filter(query, match)
+        sb = await get_async_supabase()
+        q = sb.table("bm_customers").select(columns)
+        if filters:
+            q = q.or_(filters)
+        try:
+            resp = await q.order("name").order("customer_id").range(offset, offset + limit - 1).execute()
+            return resp.data or []
+        except Exception as e:
+            raise CustomerDAOError(f"Failed to search customers: {e}")
+
+
+class AsyncTransactionDAO:
+    def __init__(self):
+        self._velocity = get_velocity_limiter()
+
+    @asynccontextmanager
+    async def _limited(self, legs: List[Tuple[int, str, float]]):
+        # Same velocity check as TransactionDAO._limited, on the shared counters
+        if not self._velocity.loaded:
+            # First posting in the process: rebuild the counters (sync reads) off the loop
+            await asyncio.to_thread(self._velocity.ensure_loaded, get_velocity_rules(), get_supabase())
+        missing = self._velocity.missing_owners([leg[0] for leg in legs])
+        if missing:
+            sb = await get_async_supabase()
+            resp = await sb.table("bm_accounts").select("account_id,customer_id").in_("account_id", missing).execute()
+            self._velocity.add_owners(resp.data or [])
+        token = reserve_velocity(self._velocity, legs)
+        try:
+            yield
+        except (APIError, TransactionDAOError):
+            self._velocity.release(token)
+            raise
+
+    async def _post(self, fn: str, params: Dict) -> Dict:
+        sb = await get_async_supabase()
+        try:
+            resp = await sb.rpc(fn, params).execute()
+        except APIError as e:
+            raise TransactionDAOError(e.message or str(e))
+        return resp.data
+
+    async def deposit(self, account_id: int, amount: float) -> Dict:
+        amount = posting_amount(amount, "Deposit amount")
+        async with self._limited([(account_id, "DEPOSIT", amount)]):
+            return await self._post("bm_post_deposit", {"p_account_id": account_id, "p_amount": amount})
+
+    async def withdraw(self, account_id: int, amount: float) -> Dict:
+        amount = posting_amount(amount, "Withdraw amount")
+        async with self._limited([(account_id, "WITHDRAW", amount)]):
+            return await self._post("bm_post_withdraw", {"p_account_id": account_id, "p_amount": amount})
+
+    async def transfer(self, from_account_id: int, to_account_id: int, amount: float) -> Dict:
+        amount = posting_amount(amount, "Transfer amount")
+        async with self._limited([(from_account_id, "WITHDRAW", amount), (to_account_id, "DEPOSIT", amount)]):
+            return await self._post("bm_post_transfer", {
+                "p_from_account_id": from_account_id,
+                "p_to_account_id": to_account_id,
+                "p_amount": amount
+            })
+
+    async def get_transactions_by_account(self, account_id: int, columns: str = "*") -> List[Dict]:
+        sb = await get_async_supabase()
+        resp = await sb.table("bm_transactions").select(columns).eq("account_id", account_id).order("transaction_date", desc=True).execute()
+        return resp.data or []
+
+
+class AsyncLoanDAO:
+    async def apply_loan(self, customer_id: int, loan_type: str, amount: float, interest_rate: float,
+                         tenure_months: int = DEFAULT_TENURE_MONTHS) -> Dict:
+        if not (customer_id and loan_type and amount > 0 and tenure_months > 0):
+            raise LoanDAOError("Invalid loan application data")
+        payload = {
+            "customer_id": customer_id,
+            "loan_type": loan_type,
+            "amount": amount,
+            "interest_rate": interest_rate,
+            "tenure_months": tenure_months,
+            "outstanding": amount,
+            "status": "PENDING"
+        }
+        sb = await get_async_supabase()
+        try:
+            resp = await sb.table("bm_loans").insert(payload).execute()
+        except Exception as e:
+            raise LoanDAOError(f"Failed to apply for loan: {e}")
+        return resp.data[0] if resp.data else None
+
+    async def get_loan_by_id(self, loan_id: int, columns: str = "*") -> Optional[Dict]:
+        sb = await get_async_supabase()
+        resp = await sb.table("bm_loans").select(columns).eq("loan_id", loan_id).limit(1).execute()
+        return resp.data[0] if resp.data else None
+
+    async def get_loans_by_customer(self, customer_id: int, columns: str = "*") -> List[Dict]:
+        try:
+            sb = await get_async_supabase()
+            resp = await sb.table("bm_loans").select(columns).eq("customer_id", customer_id).execute()
+            return resp.data or []
+        except Exception as e:
+            raise LoanDAOError(f"Failed to fetch loans for customer {customer_id}: {e}")
+
+    async def get_all_loans(self, columns: str = "*") -> List[Dict]:
+        try:
+            sb = await get_async_supabase()
+            return await _collect(lambda: sb.table("bm_loans").select(with_key(columns, "loan_id")), "loan_id")
+        except Exception as e:
+            raise LoanDAOError(f"Failed to fetch all loans: {e}")
+
+
+class AsyncLoanRepaymentDAO:
+    async def create_repayment(self, loan_id: int, amount: float, payment_date: Optional[str] = None, status: str = "PAID") -> Dict:
+        if amount <= 0:
+            raise LoanRepaymentDAOError("Repayment amount must be positive")
+        sb = await get_async_supabase()
+        try:
+            resp = await sb.rpc("bm_apply_loan_repayment", repayment_params(loan_id, amount, payment_date, status)).execute()
+        except APIError as e:
+            raise LoanRepaymentDAOError(e.message or str(e))
+        return repayment_result(resp.data)
+
+    async def get_repayments_by_loan(self, loan_id: int, columns: str = "*") -> List[Dict]:
+        sb = await get_async_supabase()
+        resp = await sb.table("bm_loan_repayments").select(columns).eq("loan_id", loan_id).order("payment_date", desc=True).execute()
+        return resp.data or []
+
+    async def list_all_repayments(self, columns: str = "*") -> List[Dict]:
+        try:
+            sb = await get_async_supabase()
+            rows = await _collect(lambda: sb.table("bm_loan_repayments").select(with_key(columns, "repayment_id")), "repayment_id")
+        except Exception as e:
+            raise LoanRepaymentDAOError(f"Failed to fetch all repayments: {e}")
+        rows.sort(key=lambda r: r.get("payment_date") or "", reverse=True)
+        return rows
+
+
+class AsyncEmployeeDAO:
+    async def list_employees(self, limit: int = 100, columns: str = "*") -> List[Dict]:
+        try:
+            sb = await get_async_supabase()
+            resp = await sb.table("bm_employees").select(columns).order("employee_id", desc=False).limit(limit).execute()
+            return resp.data or []
+        except Exception as e:
+            raise EmployeeDAOError(f"Failed to list employees: {e}")
+
+    async def get_employee_by_id(self, employee_id: int, columns: str = "*") -> Dict:
+        try:
+            sb = await get_async_supabase()
+            resp = await sb.table("bm_employees").select(columns).eq("employee_id", employee_id).limit(1).execute()
+            return resp.data[0] if resp.data else None
+        except Exception as e:
+            raise EmployeeDAOError(f"Failed to get employee by ID: {e}")
+
+
+class AsyncDashboardDAO:
+    async def get_summary(self) -> Dict:
+        try:
+            sb = await get_async_supabase()
+            resp = await sb.rpc("bm_dashboard_summary", {}).execute()
+            return resp.data or {}
+        except Exception as e:
+            raise DashboardDAOError(f"Failed to load dashboard summary: {e}")
+
+    async def preview_table(self, table: str, limit: int = 100, columns: str = "*") -> List[Dict]:
+        if table not in PREVIEW_TABLES:
+            raise DashboardDAOError(f"Unknown table: {table}")
+        try:
+            sb = await get_async_supabase()
+            resp = await sb.table(table).select(columns).order(PREVIEW_TABLES[table], desc=True).limit(limit).execute()
+            return resp.data or []
+        except Exception as e:
+            raise DashboardDAOError(f"Failed to preview {table}: {e}")
@@ -0,0 +1,181 @@
+# dao/bm_balance_checkpoint_dao.py
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import numpy as np
+from src.config import get_supabase
+from src.dao.bm_pagination import DEFAULT_PAGE_SIZE, iter_keyset
+
+# Rows per upsert when writing a checkpoint
+CHECKPOINT_WRITE_SIZE = 1000
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+Timestamp = Union[str, datetime]
+
+class BalanceCheckpointDAOError(Exception):
+    pass
+
+def _parse(ts: Timestamp) -> datetime:
+    if isinstance(ts, str):
+        try:
+            ts = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+        except ValueError:
+            raise BalanceCheckpointDAOError(f"Invalid timestamp: {ts}")
+    # Naive datetimes are taken as UTC, like the stored transaction dates
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+
+def _iso(ts: Timestamp) -> str:
+    return _parse(ts).isoformat()
+
+def _boundaries(after: datetime, until: datetime, interval_days: int) -> Iterator[datetime]:
+    # Checkpoint times are multiples of the interval since the epoch, so reruns
+    # and different processes agree on them
+    step = timedelta(days=interval_days)
+    boundary = _EPOCH + ((after - _EPOCH) // step + 1) * step
+    while boundary <= until:
+        yield boundary
+        boundary += step
+
+def _signed(rows: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+    # (account_id array, signed amount array); withdrawals count negative
+    ids = np.fromiter((r["account_id"] for r in rows), dtype=np.int64, count=len(rows))
+    amounts = np.fromiter((r.get("amount") or 0 for r in rows), dtype=np.float64, count=len(rows))
+    withdraw = np.fromiter((r.get("transaction_type") == "WITHDRAW" for r in rows), dtype=bool, count=len(rows))
+    return ids, np.where(withdraw, -amounts, amounts)
+
+def _net_by_account(ids: np.ndarray, amounts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Sum amounts per account in one pass: unique ids plus a weighted bincount
+    keys, inverse = np.unique(ids, return_inverse=True)
+    return keys, np.bincount(inverse, weights=amounts, minlength=len(keys))
+
+def _pages(rows: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    rows = iter(rows)
+    while True:
+        page = list(islice(rows, size))
+        if not page:
+            return
+        yield page
+
+class BalanceCheckpointDAO:
+    def __init__(self):
+        self._sb = get_supabase()
+
+    def latest_checkpoint(self, at: Optional[Timestamp] = None) -> Optional[str]:
+        # Latest complete checkpoint, optionally the latest one at or before `at`
+        q = self._sb.table("bm_balance_checkpoint_runs").select("checkpoint_at")
+        if at is not None:
+            q = q.lte("checkpoint_at", _iso(at))
+        resp = q.order("checkpoint_at", desc=True).limit(1).execute()
+        return resp.data[0]["checkpoint_at"] if resp.data else None
+
+    def list_checkpoints(self) -> List[Dict]:
+        resp = self._sb.table("bm_balance_checkpoint_runs").select("*").order("checkpoint_at").execute()
+        return resp.data or []
+
+    def _earliest_transaction_date(self) -> Optional[str]:
+        resp = self._sb.table("bm_transactions").select("transaction_date").order("transaction_date").limit(1).execute()
+        return resp.data[0]["transaction_date"] if resp.data else None
+
+    def _checkpoint_rows(self, checkpoint_at: str, page_size: int) -> Iterator[Dict]:
+        return iter_keyset(
+            lambda: self._sb.table("bm_balance_checkpoints").select("account_id,balance").eq("checkpoint_at", checkpoint_at),
+            "account_id", page_size,
+        )
+
+    def _replay(self, after: Optional[str], upto: str, page_size: int, account_id: Optional[int] = None) -> Iterator[List[Dict]]:
+        # Pages of transactions with after < transaction_date <= upto
+        def query():
+            q = self._sb.table("bm_transactions").select("transaction_id,account_id,transaction_type,amount").lte("transaction_date", upto)
+            if after is not None:
+                q = q.gt("transaction_date", after)
+            return q.eq("account_id", account_id) if account_id is not None else q
+        return _pages(iter_keyset(query, "transaction_id", page_size), page_size)
+
+    def _net_balances(self, base: Optional[str], upto: str, page_size: int) -> Tuple[np.ndarray, np.ndarray, int]:
+        # Balances at `upto` for every account with activity: snapshot `base` plus
+        # the replay, folded in page by page so memory follows the account count
+        # rather than the number of transactions since `base`
+        totals: Dict[int, float] = {}
+        for r in self._checkpoint_rows(base, page_size) if base else ():
+            totals[r["account_id"]] = float(r["balance"] or 0)
+        replayed = 0
+        for page in self._replay(base, upto, page_size):
+            keys, sums = _net_by_account(*_signed(page))
+            for k, v in zip(keys.tolist(), sums.tolist()):
+                totals[k] = totals.get(k, 0.0) + v
+            replayed += len(page)
+        keys = np.array(sorted(totals), dtype=np.int64)
+        return keys, np.fromiter((totals[k] for k in keys.tolist()), dtype=np.float64, count=len(keys)), replayed
+
+    def create_checkpoint(self, at: Timestamp, page_size: int = DEFAULT_PAGE_SIZE) -> Dict:
+        # Snapshot every account's balance at `at`, built from the previous
+        # checkpoint plus the transactions since. Checkpoints are append-only.
+        at_dt = _parse(at)
+        if at_dt > datetime.now(timezone.utc):
+            raise BalanceCheckpointDAOError("Cannot checkpoint a time in the future")
+        at = at_dt.isoformat()
+        try:
+            previous = self.latest_checkpoint()
+            if previous and _parse(previous) >= at_dt:
+                raise BalanceCheckpointDAOError(f"Checkpoint {at} is not after the latest checkpoint {previous}")
+            keys, balances, replayed = self._net_balances(previous, at, page_size)
+            rows = [{"account_id": int(k), "checkpoint_at": at, "balance": float(b)} for k, b in zip(keys, balances)]
+            for start in range(0, len(rows), CHECKPOINT_WRITE_SIZE):
+                self._sb.table("bm_balance_checkpoints").upsert(rows[start:start + CHECKPOINT_WRITE_SIZE], on_conflict="account_id,checkpoint_at").execute()
+            # Written last: marks the snapshot complete for balances_as_of()
+            self._sb.table("bm_balance_checkpoint_runs").upsert(
+                {"checkpoint_at": at, "accounts": len(rows), "transactions": replayed}, on_conflict="checkpoint_at"
+            ).execute()
+        except BalanceCheckpointDAOError:
+            raise
+        except Exception as e:
+            raise BalanceCheckpointDAOError(f"Failed to create checkpoint: {e}")
+        return {"checkpoint_at": at, "accounts": len(rows), "transactions": replayed}
+
+    def create_due_checkpoints(self, interval_days: int, until: Optional[Timestamp] = None,
+                               page_size: int = DEFAULT_PAGE_SIZE) -> List[Dict]:
+        # Every interval boundary after the latest checkpoint (or the first
+        # transaction) up to `until` (default now) that has no checkpoint yet
+        until_dt = _parse(until) if until is not None else datetime.now(timezone.utc)
+        start = self.latest_checkpoint() or self._earliest_transaction_date()
+        if start is None:
+            return []
+        return [self.create_checkpoint(b, page_size) for b in _boundaries(_parse(start), until_dt, interval_days)]
+
+    def balance_as_of(self, account_id: int, ts: Timestamp, page_size: int = DEFAULT_PAGE_SIZE) -> Dict:
+        ts = _iso(ts)
+        try:
+            resp = self._sb.table("bm_balance_checkpoints").select("checkpoint_at,balance").eq("account_id", account_id) \
+                .lte("checkpoint_at", ts).order("checkpoint_at", desc=True).limit(1).execute()
+            start = resp.data[0] if resp.data else {"checkpoint_at": None, "balance": 0}
+            net, replayed = 0.0, 0
+            for page in self._replay(start["checkpoint_at"], ts, page_size, account_id=account_id):
+                net += float(_signed(page)[1].sum())
+                replayed += len(page)
+            if start["checkpoint_at"] is None and not replayed:
+                exists = self._sb.table("bm_accounts").select("account_id").eq("account_id", account_id).execute()
+                if not exists.data:
+                    raise BalanceCheckpointDAOError("Account not found")
+        except BalanceCheckpointDAOError:
+            raise
+        except Exception as e:
+            raise BalanceCheckpointDAOError(f"Failed to compute balance as of {ts}: {e}")
+        return {
+            "account_id": account_id,
+            "as_of": ts,
+            "balance": float(start["balance"] or 0) + net,
+            "checkpoint_at": start["checkpoint_at"],
+            "replayed": replayed,
+        }
+
+    def balances_as_of(self, ts: Timestamp, page_size: int = DEFAULT_PAGE_SIZE) -> List[Dict]:
+        # All accounts with any activity up to `ts`, from the nearest complete
+        # checkpoint plus one replay of the transactions after it
+        ts = _iso(ts)
+        try:
+            base = self.latest_checkpoint(ts)
+            keys, balances, _ = self._net_balances(base, ts, page_size)
+        except Exception as e:
+            raise BalanceCheckpointDAOError(f"Failed to compute balances as of {ts}: {e}")
+        return [{"account_id": int(k), "balance": float(b)} for k, b in zip(keys, balances)]
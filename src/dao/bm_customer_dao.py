@@ -1,59 +1,119 @@
 # dao/bm_customer_dao.py
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Set, Union
 from src.config import get_supabase
+from src.dao.bm_round_trips import round_trip_budget
+from src.dao.bm_records import ColumnarResult, CustomerRecord
+
+# Page size for typeahead search results
+DEFAULT_SEARCH_LIMIT = 20
+# Emails per existing_emails() lookup, keeps the in.(...) filter URL short
+EMAIL_LOOKUP_SIZE = 200
 
 class CustomerDAOError(Exception):
     pass
 
+def search_filter(query: str, match: str) -> Optional[str]:
+    # PostgREST or= filter for find_customers(); None when the query is blank
+    if match not in ("prefix", "substring"):
+        raise CustomerDAOError(f"Unknown match mode: {match}")
+    # Drop "*" and '"', LIKE-escape %, _ and backslash so they match literally, then
+    # escape backslashes again for the quoted value (quotes keep , and . literal)
+    term = "".join(ch for ch in (query or "").strip() if ch not in '*"')
+    if not term:
+        return None
+    escaped = "".join(f"\\{ch}" if ch in "%_\\" else ch for ch in term).replace("\\", "\\\\")
+    pattern = f"{escaped}*" if match == "prefix" else f"*{escaped}*"
+    filters = [f'name.ilike."{pattern}"', f'email.ilike."{pattern}"']
+    if term.isdigit():
+        filters.append(f"customer_id.eq.{int(term)}")
+    return ",".join(filters)
+
 class CustomerDAO:
     def __init__(self):
         self._sb = get_supabase()
 
+    @round_trip_budget(2)
     def create_customer(self, name: str, email: str, phone: Optional[str], city: Optional[str], address: Optional[str]) -> Dict:
         if not name or not email:
             raise CustomerDAOError("Name and email required")
-        existing = self.get_customer_by_email(email)
+        existing = self.get_customer_by_email(email, "customer_id")
         if existing:
             raise CustomerDAOError(f"Email already exists: {email}")
         payload = {"name": name, "email": email, "phone": phone, "city": city, "address": address}
-        self._sb.table("bm_customers").insert(payload).execute()
-        resp = self._sb.table("bm_customers").select("*").eq("email", email).limit(1).execute()
+        resp = self._sb.table("bm_customers").insert(payload).execute()
         return resp.data[0] if resp.data else None
 
-    def get_customer_by_id(self, cust_id: int) -> Optional[Dict]:
-        resp = self._sb.table("bm_customers").select("*").eq("customer_id", cust_id).limit(1).execute()
-        return resp.data[0] if resp.data else None
+    @round_trip_budget(1)
+    def bulk_create_customers(self, rows: List[Dict]) -> List[Dict]:
+        # One insert for many customers; callers dedupe emails first (existing_emails())
+        if not rows:
+            return []
+        if any(not r.get("name") or not r.get("email") for r in rows):
+            raise CustomerDAOError("Name and email required")
+        columns = ("name", "email", "phone", "city", "address")
+        try:
+            resp = self._sb.table("bm_customers").insert([{c: r.get(c) for c in columns} for r in rows]).execute()
+        except Exception as e:
+            raise CustomerDAOError(f"Failed to create customers: {e}")
+        return resp.data or []
+
+    def existing_emails(self, emails: List[str]) -> Set[str]:
+        # Which of these emails are already taken, one lookup per EMAIL_LOOKUP_SIZE emails
+        taken = set()
+        unique = sorted(set(emails))
+        for start in range(0, len(unique), EMAIL_LOOKUP_SIZE):
+            resp = self._sb.table("bm_customers").select("email").in_("email", unique[start:start + EMAIL_LOOKUP_SIZE]).execute()
+            taken.update(r["email"] for r in resp.data or [])
+        return taken
 
-    def get_customer_by_email(self, email: str) -> Optional[Dict]:
-        resp = self._sb.table("bm_customers").select("*").eq("email", email).limit(1).execute()
+    def get_customer_by_id(self, cust_id: int, columns: str = "*", compact: bool = False) -> Union[Dict, CustomerRecord, None]:
+        resp = self._sb.table("bm_customers").select(columns).eq("customer_id", cust_id).limit(1).execute()
+        row = resp.data[0] if resp.data else None
+        return CustomerRecord.from_row(row) if compact else row
+
+    def get_customer_by_email(self, email: str, columns: str = "*") -> Optional[Dict]:
+        resp = self._sb.table("bm_customers").select(columns).eq("email", email).limit(1).execute()
         return resp.data[0] if resp.data else None
 
+    @round_trip_budget(1)
     def update_customer(self, cust_id: int, fields: Dict) -> Optional[Dict]:
         if not fields:
             raise CustomerDAOError("No fields to update")
-        self._sb.table("bm_customers").update(fields).eq("customer_id", cust_id).execute()
-        resp = self._sb.table("bm_customers").select("*").eq("customer_id", cust_id).limit(1).execute()
+        resp = self._sb.table("bm_customers").update(fields).eq("customer_id", cust_id).execute()
         return resp.data[0] if resp.data else None
 
+    @round_trip_budget(3)
     def delete_customer(self, cust_id: int) -> Optional[Dict]:
-        accounts_resp = self._sb.table("bm_accounts").select("*").eq("customer_id", cust_id).limit(1).execute()
-        loans_resp = self._sb.table("bm_loans").select("*").eq("customer_id", cust_id).limit(1).execute()
+        accounts_resp = self._sb.table("bm_accounts").select("account_id").eq("customer_id", cust_id).limit(1).execute()
+        loans_resp = self._sb.table("bm_loans").select("loan_id").eq("customer_id", cust_id).limit(1).execute()
         if accounts_resp.data or loans_resp.data:
             raise CustomerDAOError("Cannot delete customer with existing accounts or loans.")
-        resp_before = self._sb.table("bm_customers").select("*").eq("customer_id", cust_id).limit(1).execute()
-        row = resp_before.data[0] if resp_before.data else None
-        self._sb.table("bm_customers").delete().eq("customer_id", cust_id).execute()
-        return row
+        resp = self._sb.table("bm_customers").delete().eq("customer_id", cust_id).execute()
+        return resp.data[0] if resp.data else None
 
-    def list_customers(self, limit: int = 100) -> List[Dict]:
-        resp = self._sb.table("bm_customers").select("*").order("customer_id", desc=False).limit(limit).execute()
-        return resp.data or []
+    def list_customers(self, limit: int = 100, columns: str = "*", compact: bool = False) -> Union[List[Dict], ColumnarResult]:
+        resp = self._sb.table("bm_customers").select(columns).order("customer_id", desc=False).limit(limit).execute()
+        return ColumnarResult.from_rows(resp.data or []) if compact else resp.data or []
 
-    def search_customers(self, email: Optional[str] = None, city: Optional[str] = None) -> List[Dict]:
-        q = self._sb.table("bm_customers").select("*")
+    def search_customers(self, email: Optional[str] = None, city: Optional[str] = None, columns: str = "*") -> List[Dict]:
+        q = self._sb.table("bm_customers").select(columns)
         if email:
             q = q.eq("email", email)
         if city:
             q = q.eq("city", city)
         resp = q.execute()
-        return resp.data or []
\ No newline at end of file
+        return resp.data or []
+
+    @round_trip_budget(1)
+    def find_customers(self, query: str, match: str = "prefix", limit: int = DEFAULT_SEARCH_LIMIT, offset: int = 0, columns: str = "customer_id,name,email") -> List[Dict]:
+        # Typeahead: case-insensitive prefix or substring match on name/email, exact
+        # match on a numeric id; served by the trigram indexes in sql/005_customer_search.sql
+        filters = search_filter(query, match)
+        q = self._sb.table("bm_customers").select(columns)
+        if filters:
+            q = q.or_(filters)
+        try:
+            resp = q.order("name").order("customer_id").range(offset, offset + limit - 1).execute()
+            return resp.data or []
+        except Exception as e:
+            raise CustomerDAOError(f"Failed to search customers: {e}")
@@ -0,0 +1,40 @@
+# dao/bm_dashboard_dao.py
+from typing import Dict, List
+from src.config import get_supabase
+from src.dao.bm_round_trips import round_trip_budget
+
+# Tables the dashboard may preview, with the column to order the preview by
+PREVIEW_TABLES = {
+    "bm_customers": "customer_id",
+    "bm_accounts": "account_id",
+    "bm_loans": "loan_id",
+    "bm_transactions": "transaction_id",
+    "bm_loan_repayments": "repayment_id",
+    "bm_employees": "employee_id",
+}
+
+class DashboardDAOError(Exception):
+    pass
+
+class DashboardDAO:
+    def __init__(self):
+        self._sb = get_supabase()
+
+    @round_trip_budget(1)
+    def get_summary(self) -> Dict:
+        # Counts, totals and group-by breakdowns from sql/003_dashboard_summary.sql
+        try:
+            resp = self._sb.rpc("bm_dashboard_summary", {}).execute()
+            return resp.data or {}
+        except Exception as e:
+            raise DashboardDAOError(f"Failed to load dashboard summary: {e}")
+
+    @round_trip_budget(1)
+    def preview_table(self, table: str, limit: int = 100, columns: str = "*") -> List[Dict]:
+        if table not in PREVIEW_TABLES:
+            raise DashboardDAOError(f"Unknown table: {table}")
+        try:
+            resp = self._sb.table(table).select(columns).order(PREVIEW_TABLES[table], desc=True).limit(limit).execute()
+            return resp.data or []
+        except Exception as e:
+            raise DashboardDAOError(f"Failed to preview {table}: {e}")
@@ -1,5 +1,7 @@
-from typing import List, Dict
+from typing import List, Dict, Union
 from src.config import get_supabase
+from src.dao.bm_round_trips import round_trip_budget
+from src.dao.bm_records import ColumnarResult, EmployeeRecord
 
 class EmployeeDAOError(Exception):
     pass
@@ -8,13 +10,14 @@ class EmployeeDAO:
     def __init__(self):
         self._sb = get_supabase()
 
-    def list_employees(self, limit: int = 100) -> List[Dict]:
+    def list_employees(self, limit: int = 100, columns: str = "*", compact: bool = False) -> Union[List[Dict], ColumnarResult]:
         try:
-            resp = self._sb.table("bm_employees").select("*").order("employee_id", desc=False).limit(limit).execute()
-            return resp.data or []
+            resp = self._sb.table("bm_employees").select(columns).order("employee_id", desc=False).limit(limit).execute()
+            return ColumnarResult.from_rows(resp.data or []) if compact else resp.data or []
         except Exception as e:
             raise EmployeeDAOError(f"Failed to list employees: {e}")
 
+    @round_trip_budget(1)
     def create_employee(self, name: str, email: str, phone: str = None, department: str = None) -> Dict:
         try:
             emp = {
@@ -24,15 +27,16 @@ class EmployeeDAO:
                 "department": department
             }
             resp = self._sb.table("bm_employees").insert(emp).execute()
-            if resp.status_code != 201:
+            if not resp.data:
                 raise EmployeeDAOError(f"Insert failed: {resp.data}")
             return resp.data[0]
         except Exception as e:
             raise EmployeeDAOError(f"Failed to create employee: {e}")
     
-    def get_employee_by_id(self, employee_id: int) -> Dict:
+    def get_employee_by_id(self, employee_id: int, columns: str = "*", compact: bool = False) -> Union[Dict, EmployeeRecord, None]:
         try:
-            resp = self._sb.table("bm_employees").select("*").eq("employee_id", employee_id).limit(1).execute()
-            return resp.data[0] if resp.data else None
+            resp = self._sb.table("bm_employees").select(columns).eq("employee_id", employee_id).limit(1).execute()
+            row = resp.data[0] if resp.data else None
+            return EmployeeRecord.from_row(row) if compact else row
         except Exception as e:
             raise EmployeeDAOError(f"Failed to get employee by ID: {e}")
\ No newline at end of file
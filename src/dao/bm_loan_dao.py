@@ -1,6 +1,14 @@
 # dao/bm_loan_dao.py
-from typing import Optional, Dict, List
+from typing import Iterator, Optional, Dict, List, Union
+from postgrest.exceptions import APIError
 from src.config import get_supabase
+from src.dao.bm_round_trips import round_trip_budget
+from src.dao.bm_pagination import DEFAULT_PAGE_SIZE, iter_keyset, with_key
+from src.dao.bm_records import ColumnarResult, LoanRecord
+from src.dao.bm_loan_repayment_dao import repayment_params, repayment_result
+
+# Loan term when the applicant doesn't give one (matches the sql/008 column default)
+DEFAULT_TENURE_MONTHS = 12
 
 class LoanDAOError(Exception):
     pass
@@ -9,51 +17,108 @@ class LoanDAO:
     def __init__(self):
         self._sb = get_supabase()
 
-    def apply_loan(self, customer_id: int, loan_type: str, amount: float, interest_rate: float) -> Dict:
-        if not (customer_id and loan_type and amount > 0):
+    @round_trip_budget(1)
+    def apply_loan(self, customer_id: int, loan_type: str, amount: float, interest_rate: float,
+                   tenure_months: int = DEFAULT_TENURE_MONTHS) -> Dict:
+        if not (customer_id and loan_type and amount > 0 and tenure_months > 0):
             raise LoanDAOError("Invalid loan application data")
         payload = {
             "customer_id": customer_id,
             "loan_type": loan_type,
             "amount": amount,
             "interest_rate": interest_rate,
+            "tenure_months": tenure_months,
+            "outstanding": amount,
             "status": "PENDING"
         }
         # Log payload for debugging
         print("Applying for loan with payload:", payload)
         try:
-            self._sb.table("bm_loans").insert(payload).execute()
+            resp = self._sb.table("bm_loans").insert(payload).execute()
         except Exception as e:
             # Raise error with detailed message
             raise LoanDAOError(f"Failed to apply for loan: {e}")
-        resp = self._sb.table("bm_loans").select("*").eq("customer_id", customer_id).order("loan_id", desc=True).limit(1).execute()
         return resp.data[0] if resp.data else None
 
+    @round_trip_budget(1)
     def repay_loan(self, loan_id: int, amount: float) -> Dict:
-        # Implementation detail can be enhanced with balance checks, repayment schedule
         if amount <= 0:
             raise LoanDAOError("Repayment amount must be positive")
-        # For simplicity, record a repayment entry in bm_loan_repayments and update loan status if fully repaid
-        repayment_payload = {"loan_id": loan_id, "amount": amount, "payment_date": "now()", "status": "PAID"}
-        self._sb.table("bm_loan_repayments").insert(repayment_payload).execute()
-        # Assuming loan status update happens elsewhere, return repayment record here
-        resp = self._sb.table("bm_loan_repayments").select("*").eq("loan_id", loan_id).order("repayment_id", desc=True).limit(1).execute()
-        return resp.data[0] if resp.data else None
+        # Records the repayment and reduces the outstanding balance in one call;
+        # the loan is CLOSED when it reaches zero and overpayments are rejected
+        try:
+            resp = self._sb.rpc("bm_apply_loan_repayment", repayment_params(loan_id, amount)).execute()
+        except APIError as e:
+            raise LoanDAOError(e.message or str(e))
+        return repayment_result(resp.data)
 
-    def get_loan_by_id(self, loan_id: int) -> Optional[Dict]:
-        resp = self._sb.table("bm_loans").select("*").eq("loan_id", loan_id).limit(1).execute()
-        return resp.data[0] if resp.data else None
+    @round_trip_budget(1)
+    def get_outstanding(self, loan_id: int) -> Optional[Dict]:
+        resp = self._sb.table("bm_loans").select("loan_id,amount,outstanding,status").eq("loan_id", loan_id).limit(1).execute()
+        if not resp.data:
+            return None
+        loan = resp.data[0]
+        # Loans written before sql/009 was applied owe their full amount
+        return {**loan, "outstanding": loan["amount"] if loan["outstanding"] is None else loan["outstanding"]}
+
+    def reconcile_outstanding(self, fix: bool = False, page_size: int = DEFAULT_PAGE_SIZE) -> Dict:
+        # Recompute every loan's outstanding balance from the principal part of its
+        # PAID repayments and compare with the stored figure. With fix=True mismatches are rewritten,
+        # guarded on the stored value so a repayment landing meanwhile isn't lost.
+        try:
+            paid: Dict[int, float] = {}
+            for r in iter_keyset(lambda: self._sb.table("bm_loan_repayments").select("repayment_id,loan_id,amount,principal,status"), "repayment_id", page_size):
+                if (r.get("status") or "").upper() == "PAID":
+                    principal = r["amount"] if r.get("principal") is None else r["principal"]
+                    paid[r["loan_id"]] = paid.get(r["loan_id"], 0) + (principal or 0)
+            mismatches, checked, fixed = [], 0, 0
+            for loan in iter_keyset(lambda: self._sb.table("bm_loans").select("loan_id,amount,outstanding,status"), "loan_id", page_size):
+                checked += 1
+                expected = round((loan.get("amount") or 0) - paid.get(loan["loan_id"], 0), 6)
+                stored = loan.get("outstanding")
+                closed = (loan.get("status") or "").upper() == "CLOSED"
+                if stored is not None and abs(stored - expected) <= 1e-6 and closed == (expected <= 0):
+                    continue
+                mismatch = {"loan_id": loan["loan_id"], "expected": expected, "stored": stored, "status": loan.get("status")}
+                if expected < 0:
+                    mismatch["overpaid"] = -expected
+                mismatches.append(mismatch)
+                if fix:
+                    fixed += self._fix_outstanding(loan, max(expected, 0))
+        except Exception as e:
+            raise LoanDAOError(f"Failed to reconcile loan balances: {e}")
+        return {"ok": not mismatches, "checked": checked, "mismatches": mismatches, "fixed": fixed}
+
+    def _fix_outstanding(self, loan: Dict, outstanding: float) -> int:
+        status = loan.get("status")
+        if outstanding == 0:
+            status = "CLOSED"
+        elif (status or "").upper() == "CLOSED":
+            status = "ACTIVE"
+        q = self._sb.table("bm_loans").update({"outstanding": outstanding, "status": status}).eq("loan_id", loan["loan_id"])
+        q = q.is_("outstanding", "null") if loan.get("outstanding") is None else q.eq("outstanding", loan["outstanding"])
+        return 1 if q.execute().data else 0
 
-    def get_loans_by_customer(self, customer_id: int) -> List[Dict]:
+    def get_loan_by_id(self, loan_id: int, columns: str = "*", compact: bool = False) -> Union[Dict, LoanRecord, None]:
+        resp = self._sb.table("bm_loans").select(columns).eq("loan_id", loan_id).limit(1).execute()
+        row = resp.data[0] if resp.data else None
+        return LoanRecord.from_row(row) if compact else row
+
+    def get_loans_by_customer(self, customer_id: int, columns: str = "*", compact: bool = False) -> Union[List[Dict], ColumnarResult]:
         try:
-            resp = self._sb.table("bm_loans").select("*").eq("customer_id", customer_id).execute()
-            return resp.data or []
+            resp = self._sb.table("bm_loans").select(columns).eq("customer_id", customer_id).execute()
+            return ColumnarResult.from_rows(resp.data or []) if compact else resp.data or []
         except Exception as e:
             raise LoanDAOError(f"Failed to fetch loans for customer {customer_id}: {e}")
 
-    def get_all_loans(self) -> List[Dict]:
+    def get_all_loans(self, columns: str = "*", compact: bool = False) -> Union[List[Dict], ColumnarResult]:
+        if compact:
+            return ColumnarResult.from_rows(self.iter_all_loans(columns=columns))
+        return list(self.iter_all_loans(columns=columns))
+
+    def iter_all_loans(self, page_size: int = DEFAULT_PAGE_SIZE, prefetch: bool = False, columns: str = "*") -> Iterator[Dict]:
+        columns = with_key(columns, "loan_id")
         try:
-            resp = self._sb.table("bm_loans").select("*").execute()
-            return resp.data or []
+            yield from iter_keyset(lambda: self._sb.table("bm_loans").select(columns), "loan_id", page_size, prefetch)
         except Exception as e:
             raise LoanDAOError(f"Failed to fetch all loans: {e}")
\ No newline at end of file
@@ -1,45 +1,69 @@
 # dao/bm_loan_repayment_dao.py
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Union
+from postgrest.exceptions import APIError
 from src.config import get_supabase
+from src.dao.bm_round_trips import round_trip_budget
+from src.dao.bm_pagination import DEFAULT_PAGE_SIZE, iter_keyset, with_key
+from src.dao.bm_records import ColumnarResult, RepaymentRecord
 
 class LoanRepaymentDAOError(Exception):
     pass
 
+# Repayments go through sql/009_loan_outstanding.sql: the repayment insert and
+# the loan's outstanding/status update happen in one call. Shared with
+# LoanDAO.repay_loan() and the async DAO.
+def repayment_params(loan_id: int, amount: float, payment_date: Optional[str] = None, status: str = "PAID") -> Dict:
+    return {"p_loan_id": loan_id, "p_amount": amount, "p_payment_date": payment_date, "p_status": status}
+
+def repayment_result(data: Dict) -> Dict:
+    # The repayment row plus the loan's state after it
+    return {**data["repayment"], "outstanding": data["outstanding"], "loan_status": data["loan_status"]}
+
 class LoanRepaymentDAO:
     def __init__(self):
         self._sb = get_supabase()
 
+    @round_trip_budget(1)
     def create_repayment(self, loan_id: int, amount: float, payment_date: Optional[str] = None, status: str = "PAID") -> Dict:
         if amount <= 0:
             raise LoanRepaymentDAOError("Repayment amount must be positive")
 
-        payload = {
-            "loan_id": loan_id,
-            "amount": amount,
-            "payment_date": payment_date or "now()",
-            "status": status
-        }
-        self._sb.table("bm_loan_repayments").insert(payload).execute()
-        resp = self._sb.table("bm_loan_repayments").select("*").eq("loan_id", loan_id).order("repayment_id", desc=True).limit(1).execute()
-        return resp.data[0] if resp.data else None
+        try:
+            resp = self._sb.rpc("bm_apply_loan_repayment", repayment_params(loan_id, amount, payment_date, status)).execute()
+        except APIError as e:
+            raise LoanRepaymentDAOError(e.message or str(e))
+        return repayment_result(resp.data)
 
-    def get_repayments_by_loan(self, loan_id: int) -> List[Dict]:
-        resp = self._sb.table("bm_loan_repayments").select("*").eq("loan_id", loan_id).order("payment_date", desc=True).execute()
-        return resp.data or []
+    def get_repayments_by_loan(self, loan_id: int, columns: str = "*", compact: bool = False) -> Union[List[Dict], ColumnarResult]:
+        resp = self._sb.table("bm_loan_repayments").select(columns).eq("loan_id", loan_id).order("payment_date", desc=True).execute()
+        return ColumnarResult.from_rows(resp.data or []) if compact else resp.data or []
 
-    def get_repayment_by_id(self, repayment_id: int) -> Optional[Dict]:
-        resp = self._sb.table("bm_loan_repayments").select("*").eq("repayment_id", repayment_id).limit(1).execute()
-        return resp.data[0] if resp.data else None
+    def get_repayment_by_id(self, repayment_id: int, columns: str = "*", compact: bool = False) -> Union[Dict, RepaymentRecord, None]:
+        resp = self._sb.table("bm_loan_repayments").select(columns).eq("repayment_id", repayment_id).limit(1).execute()
+        row = resp.data[0] if resp.data else None
+        return RepaymentRecord.from_row(row) if compact else row
 
+    @round_trip_budget(1)
     def update_repayment_status(self, repayment_id: int, status: str) -> Optional[Dict]:
-        self._sb.table("bm_loan_repayments").update({"status": status}).eq("repayment_id", repayment_id).execute()
-        resp = self._sb.table("bm_loan_repayments").select("*").eq("repayment_id", repayment_id).limit(1).execute()
-        return resp.data[0] if resp.data else None
+        # Moving a repayment into or out of PAID also moves the loan's outstanding balance
+        try:
+            resp = self._sb.rpc("bm_set_repayment_status", {"p_repayment_id": repayment_id, "p_status": status}).execute()
+        except APIError as e:
+            raise LoanRepaymentDAOError(e.message or str(e))
+        return resp.data or None
+
 
+    def list_all_repayments(self, columns: str = "*", compact: bool = False) -> Union[List[Dict], ColumnarResult]:
+        # Newest first, as before; use iter_all_repayments() to stream large tables
+        if compact:
+            return ColumnarResult.from_rows(self.iter_all_repayments(columns=columns)).sorted_by("payment_date", descending=True)
+        rows = list(self.iter_all_repayments(columns=columns))
+        rows.sort(key=lambda r: r.get("payment_date") or "", reverse=True)
+        return rows
 
-    def list_all_repayments(self) -> List[Dict]:
+    def iter_all_repayments(self, page_size: int = DEFAULT_PAGE_SIZE, prefetch: bool = False, columns: str = "*") -> Iterator[Dict]:
+        columns = with_key(columns, "repayment_id")
         try:
-            resp = self._sb.table("bm_loan_repayments").select("*").order("payment_date", desc=True).execute()
-            return resp.data or []
+            yield from iter_keyset(lambda: self._sb.table("bm_loan_repayments").select(columns), "repayment_id", page_size, prefetch)
         except Exception as e:
             raise LoanRepaymentDAOError(f"Failed to fetch all repayments: {e}")
\ No newline at end of file
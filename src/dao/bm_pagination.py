@@ -0,0 +1,60 @@
+# dao/bm_pagination.py
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+DEFAULT_PAGE_SIZE = 1000
+
+def with_key(columns: str, key: str) -> str:
+    # Keyset pages resume after the last row's `key`, so a projection must include it
+    names = [c.strip() for c in columns.split(",")]
+    return columns if "*" in names or key in names else f"{key},{columns}"
+
+def iter_keyset(query_factory: Callable[[], Any], key: str, page_size: int = DEFAULT_PAGE_SIZE, prefetch: bool = False) -> Iterator[Dict]:
+    # Stream rows ordered by `key` one page at a time: each page is "key > last seen
+    # key", so the server never scans skipped rows and only one page is held in memory.
+    # query_factory() returns a fresh builder with select()/filters applied.
+    if page_size <= 0:
+        raise ValueError("page_size must be positive")
+
+    def fetch(after: Optional[Any]) -> List[Dict]:
+        q = query_factory()
+        if after is not None:
+            q = q.gt(key, after)
+        return q.order(key).limit(page_size).execute().data or []
+
+    # Stop on an empty page rather than a short one: a server-side row cap
+    # smaller than page_size would otherwise end the scan early.
+    if not prefetch:
+        after = None
+        while True:
+            rows = fetch(after)
+            if not rows:
+                return
+            yield from rows
+            after = rows[-1][key]
+
+    # Prefetch: request page n+1 while the caller consumes page n
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pending = pool.submit(fetch, None)
+        while True:
+            rows = pending.result()
+            if not rows:
+                return
+            pending = pool.submit(fetch, rows[-1][key])
+            yield from rows
+
+async def aiter_keyset(query_factory: Callable[[], Any], key: str, page_size: int = DEFAULT_PAGE_SIZE):
+    # Async counterpart of iter_keyset() for builders whose execute() is awaitable
+    if page_size <= 0:
+        raise ValueError("page_size must be positive")
+    after = None
+    while True:
+        q = query_factory()
+        if after is not None:
+            q = q.gt(key, after)
+        rows = (await q.order(key).limit(page_size).execute()).data or []
+        if not rows:
+            return
+        for row in rows:
+            yield row
+        after = rows[-1][key]
@@ -0,0 +1,195 @@
+# dao/bm_query_stats.py
+# Per-query instrumentation for the shared backend client. config.py wraps the
+# client every DAO gets from get_supabase() in InstrumentedClient, so each
+# execute() is counted per (table, operation) with a latency histogram, the
+# number of rows returned and the response size; queries slower than the
+# threshold (BM_SLOW_QUERY_MS) are logged and kept in a short in-memory
+# slow-query log. The size is the response's Content-Length, taken by the HTTP
+# hook in config.py; without one (embedded SQLite, chunked responses) the rows
+# are sized as JSON, but only while a round-trip tracker is counting payloads,
+# so untracked bulk reads don't pay for serialising every row again.
+import inspect
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from src.dao.bm_round_trips import payload_tracked, record_payload
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+# Slow queries kept for display, newest last
+SLOW_LOG_SIZE = 100
+DEFAULT_SLOW_QUERY_MS = 200.0
+
+# Builder calls that decide what kind of request is sent
+_OPERATIONS = ("select", "insert", "update", "upsert", "delete")
+
+logger = logging.getLogger("bm.queries")
+
+# Content-Length of the response to the request in flight, set by the HTTP hook.
+# Hooks run in the caller's thread (sync) or task (async), so it follows the request.
+_wire_bytes: ContextVar[Optional[int]] = ContextVar("bm_wire_bytes", default=None)
+
+def record_response_size(headers):
+    length = headers.get("content-length")
+    _wire_bytes.set(int(length) if length and length.isdigit() else None)
+
+def _bucket_labels() -> List[str]:
+    return [f"<={b}ms" for b in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+
+def _bucket(ms: float) -> int:
+    for i, bound in enumerate(LATENCY_BUCKETS_MS):
+        if ms <= bound:
+            return i
+    return len(LATENCY_BUCKETS_MS)
+
+
+class QueryStats:
+    def __init__(self, slow_ms: float = DEFAULT_SLOW_QUERY_MS):
+        self._lock = threading.Lock()
+        self.slow_ms = slow_ms
+        self._ops: Dict[tuple, Dict] = {}
+        self._slow = deque(maxlen=SLOW_LOG_SIZE)
+
+    def record(self, table: str, operation: str, chain: str, ms: float, rows: int, nbytes: int = 0,
+               error: Optional[str] = None):
+        with self._lock:
+            op = self._ops.get((table, operation))
+            if op is None:
+                op = self._ops[(table, operation)] = {
+                    "count": 0, "errors": 0, "rows": 0, "bytes": 0, "total_ms": 0.0, "max_ms": 0.0,
+                    "histogram": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+                }
+            op["count"] += 1
+            op["rows"] += rows
+            op["bytes"] += nbytes
+            op["total_ms"] += ms
+            op["max_ms"] = max(op["max_ms"], ms)
+            op["histogram"][_bucket(ms)] += 1
+            if error is not None:
+                op["errors"] += 1
+            slow = ms >= self.slow_ms
+            if slow:
+                self._slow.append({
+                    "at": datetime.now(timezone.utc).isoformat(),
+                    "table": table, "operation": operation, "query": chain,
+                    "ms": round(ms, 2), "rows": rows, "bytes": nbytes, "error": error,
+                })
+        if slow:
+            logger.warning("Slow query (%.1f ms, %d rows): %s %s [%s]", ms, rows, operation, table, chain)
+
+    def snapshot(self) -> Dict:
+        # {"operations": [per table/operation rows], "slow_queries": [...], "buckets": [...], "slow_ms": ...}
+        with self._lock:
+            operations = [
+                {
+                    "table": table,
+                    "operation": operation,
+                    "count": op["count"],
+                    "errors": op["errors"],
+                    "rows": op["rows"],
+                    "bytes": op["bytes"],
+                    "avg_ms": round(op["total_ms"] / op["count"], 2),
+                    "max_ms": round(op["max_ms"], 2),
+                    "total_ms": round(op["total_ms"], 2),
+                    "histogram": list(op["histogram"]),
+                }
+                for (table, operation), op in sorted(self._ops.items())
+            ]
+            slow = list(self._slow)
+        return {"operations": operations, "slow_queries": slow, "buckets": _bucket_labels(), "slow_ms": self.slow_ms}
+
+    def reset(self):
+        with self._lock:
+            self._ops.clear()
+            self._slow.clear()
+
+
+_stats = QueryStats()
+
+def get_query_stats() -> Dict:
+    return _stats.snapshot()
+
+def reset_query_stats():
+    _stats.reset()
+
+def set_slow_query_threshold(ms: float):
+    _stats.slow_ms = ms
+
+
+class InstrumentedClient:
+    # Forwards table()/rpc() to the wrapped client and times each execute()
+    def __init__(self, client, stats: Optional[QueryStats] = None):
+        self._client = client
+        self._stats = stats or _stats
+
+    @property
+    def wrapped(self):
+        return self._client
+
+    def table(self, name: str):
+        return _InstrumentedBuilder(self._client.table(name), self._stats, name, None, [])
+
+    def rpc(self, fn: str, params: Optional[Dict] = None):
+        return _InstrumentedBuilder(self._client.rpc(fn, params or {}), self._stats, f"rpc:{fn}", "rpc", ["rpc"])
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+class _InstrumentedBuilder:
+    def __init__(self, builder, stats: QueryStats, table: str, operation: Optional[str], chain: List[str]):
+        self._builder = builder
+        self._stats = stats
+        self._table = table
+        self._operation = operation
+        self._chain = chain
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            return attr
+
+        def chained(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if result is None or not hasattr(result, "execute"):
+                return result
+            operation = self._operation or (name if name in _OPERATIONS else None)
+            return _InstrumentedBuilder(result, self._stats, self._table, operation, self._chain + [name])
+        return chained
+
+    def _record(self, started: float, resp, error: Optional[str] = None):
+        ms = (time.perf_counter() - started) * 1000
+        data = getattr(resp, "data", None)
+        rows = len(data) if isinstance(data, list) else int(data is not None)
+        nbytes = _wire_bytes.get()
+        if nbytes is None:
+            nbytes = len(json.dumps(data, separators=(",", ":"), default=str)) if data is not None and payload_tracked() else 0
+        record_payload(nbytes)
+        self._stats.record(self._table, self._operation or "select", ".".join(self._chain), ms, rows, nbytes, error)
+
+    def execute(self):
+        started = time.perf_counter()
+        _wire_bytes.set(None)
+        try:
+            resp = self._builder.execute()
+        except Exception as e:
+            self._record(started, None, str(e))
+            raise
+        if inspect.isawaitable(resp):
+            return self._execute_async(resp, started)
+        self._record(started, resp)
+        return resp
+
+    async def _execute_async(self, pending, started: float):
+        try:
+            resp = await pending
+        except Exception as e:
+            self._record(started, None, str(e))
+            raise
+        self._record(started, resp)
+        return resp
@@ -0,0 +1,204 @@
+# dao/bm_records.py
+# Compact result types for callers holding many rows, instead of a dict per row.
+# Single-row reads can return __slots__ records; bulk reads can return a
+# ColumnarResult with one NumPy array per column. Low-cardinality text columns
+# are stored as small integer codes into a category list, and to_pandas()
+# wraps the arrays in a DataFrame without copying them.
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+import numpy as np
+from src.dao.bm_pagination import DEFAULT_PAGE_SIZE
+
+# Text columns with a handful of distinct values, stored as codes
+CATEGORICAL_COLUMNS = frozenset({"transaction_type", "status", "account_type", "loan_type"})
+# Columns stored as int64 / float64 arrays; the rest are object arrays
+INT_COLUMNS = frozenset({
+    "customer_id", "account_id", "transaction_id", "loan_id", "repayment_id", "employee_id", "tenure_months", "version",
+})
+FLOAT_COLUMNS = frozenset({"amount", "balance", "outstanding", "interest_rate", "interest", "principal"})
+
+
+class Record:
+    # Base of the __slots__ row types; columns left out of a projection are None.
+    # Supports row["col"] and row.get("col") so it can stand in for the dict rows.
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            value = fields.get(name)
+            # Categorical values repeat across rows; share one string object
+            setattr(self, name, sys.intern(value) if name in CATEGORICAL_COLUMNS and isinstance(value, str) else value)
+
+    @classmethod
+    def from_row(cls, row: Optional[Dict]):
+        return cls(**row) if row is not None else None
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        return default if value is None else value
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{k}={v!r}' for k, v in self.to_dict().items())})"
+
+
+class CustomerRecord(Record):
+    __slots__ = ("customer_id", "name", "email", "phone", "city", "address", "created_at")
+
+class AccountRecord(Record):
+    __slots__ = ("account_id", "customer_id", "account_type", "balance", "status", "created_at", "version")
+
+class TransactionRecord(Record):
+    __slots__ = ("transaction_id", "account_id", "transaction_type", "amount", "transaction_date")
+
+class LoanRecord(Record):
+    __slots__ = ("loan_id", "customer_id", "loan_type", "amount", "interest_rate", "tenure_months", "outstanding",
+                 "status", "created_at")
+
+class RepaymentRecord(Record):
+    __slots__ = ("repayment_id", "loan_id", "amount", "payment_date", "status", "interest", "principal")
+
+class EmployeeRecord(Record):
+    __slots__ = ("employee_id", "name", "email", "phone", "department", "role", "created_at")
+
+
+def _code_dtype(categories: int):
+    # Same width pandas picks for Categorical codes, so to_pandas() can reuse the array
+    for dtype in (np.int8, np.int16, np.int32):
+        if categories < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+def _to_array(name: str, values: List):
+    if name in INT_COLUMNS:
+        try:
+            return np.array(values, dtype=np.int64)
+        except TypeError:
+            # NULLs in the column: fall back to float with NaN
+            pass
+    if name in INT_COLUMNS or name in FLOAT_COLUMNS:
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    arr = np.empty(len(values), dtype=object)
+    arr[:] = values
+    return arr
+
+
+class ColumnarResult:
+    # Bulk read result: column name -> array, plus the category list of each
+    # categorical column (its array then holds codes, -1 for NULL)
+    def __init__(self, arrays: Dict[str, np.ndarray], categories: Optional[Dict[str, List[str]]] = None):
+        self._arrays = arrays
+        self._categories = categories or {}
+        self._length = len(next(iter(arrays.values()))) if arrays else 0
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict], columns: Optional[Sequence[str]] = None,
+                  chunk_size: int = DEFAULT_PAGE_SIZE) -> "ColumnarResult":
+        # Consumes rows chunk by chunk (DAO iterators yield one page at a time),
+        # so at most chunk_size dicts are alive besides the arrays built so far
+        lookups: Dict[str, Dict[str, int]] = {}
+        chunks: Dict[str, List[np.ndarray]] = {}
+        buffer: List[Dict] = []
+
+        def flush():
+            nonlocal columns
+            if not buffer:
+                return
+            if columns is None:
+                columns = list(buffer[0])
+            for name in columns:
+                values = [r.get(name) for r in buffer]
+                if name in CATEGORICAL_COLUMNS:
+                    lookup = lookups.setdefault(name, {})
+                    codes = [-1 if v is None else lookup.setdefault(v, len(lookup)) for v in values]
+                    chunks.setdefault(name, []).append(np.array(codes, dtype=np.int32))
+                else:
+                    chunks.setdefault(name, []).append(_to_array(name, values))
+            buffer.clear()
+
+        for row in rows:
+            buffer.append(row)
+            if len(buffer) >= chunk_size:
+                flush()
+        flush()
+
+        arrays, categories = {}, {}
+        for name in columns or ():
+            parts = chunks.get(name) or [np.empty(0, dtype=object)]
+            if name in CATEGORICAL_COLUMNS:
+                categories[name] = list(lookups.get(name, {}))
+                arrays[name] = np.concatenate(parts).astype(_code_dtype(len(categories[name])))
+            else:
+                # An int column that saw NULLs in some chunk only is float everywhere
+                if any(p.dtype == np.float64 for p in parts) and any(p.dtype == np.int64 for p in parts):
+                    parts = [p.astype(np.float64) for p in parts]
+                arrays[name] = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        return cls(arrays, categories)
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._arrays)
+
+    @property
+    def nbytes(self) -> int:
+        # Array buffers only; object columns also own the Python strings they point to
+        return sum(a.nbytes for a in self._arrays.values())
+
+    def codes(self, name: str) -> np.ndarray:
+        return self._arrays[name]
+
+    def categories(self, name: str) -> List[str]:
+        return self._categories[name]
+
+    def column(self, name: str) -> np.ndarray:
+        # Decoded values; categorical columns become an object array of their categories
+        arr = self._arrays[name]
+        if name not in self._categories:
+            return arr
+        lookup = np.array(self._categories[name] + [None], dtype=object)
+        return lookup[arr]
+
+    def take(self, indices: np.ndarray) -> "ColumnarResult":
+        return ColumnarResult({name: arr[indices] for name, arr in self._arrays.items()}, self._categories)
+
+    def sorted_by(self, name: str, descending: bool = False) -> "ColumnarResult":
+        # Stable sort on one column, NULLs first ascending (as the dict listings sort)
+        if name not in self._arrays:
+            return self
+        values = self.column(name)
+        if values.dtype == object:
+            values = np.array(["" if v is None else str(v) for v in values])
+        if not descending:
+            return self.take(np.argsort(values, kind="stable"))
+        # Reverse a stable sort of the reversed rows, so ties keep their original order
+        return self.take((len(values) - 1 - np.argsort(values[::-1], kind="stable"))[::-1])
+
+    def rows(self) -> Iterator[Dict]:
+        decoded = {name: self.column(name) for name in self._arrays}
+        for i in range(self._length):
+            yield {name: arr[i].item() if isinstance(arr[i], np.generic) else arr[i] for name, arr in decoded.items()}
+
+    def to_pandas(self):
+        # Zero-copy: numeric and object columns are wrapped as they are, categorical
+        # codes become a pandas Categorical over the same codes array
+        import pandas as pd
+        data = {}
+        for name, arr in self._arrays.items():
+            if name in self._categories:
+                data[name] = pd.Categorical.from_codes(arr, categories=self._categories[name], validate=False)
+            else:
+                data[name] = pd.Series(arr, dtype=arr.dtype, copy=False)
+        return pd.DataFrame(data, copy=False)
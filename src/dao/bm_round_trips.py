@@ -0,0 +1,111 @@
+# dao/bm_round_trips.py
+import functools
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List
+
+class RoundTripBudgetError(Exception):
+    pass
+
+# Maximum backend round trips per DAO operation, keyed by "ClassName.method"
+ROUND_TRIP_BUDGETS: Dict[str, int] = {}
+
+_local = threading.local()
+# Trackers of a caller blocked on a coroutine running on another thread (config.run_async)
+_carried: ContextVar[tuple] = ContextVar("bm_carried_trackers", default=())
+
+def _trackers() -> List["RoundTripTracker"]:
+    if not hasattr(_local, "trackers"):
+        _local.trackers = []
+    return _local.trackers
+
+def _op_stack() -> List[List]:
+    if not hasattr(_local, "ops"):
+        _local.ops = []
+    return _local.ops
+
+def record_round_trip(count: int = 1):
+    # Called once per request sent to the backend (HTTP hook, local stand-ins)
+    for tracker in (*_trackers(), *_carried.get()):
+        tracker.total += count
+    for frame in _op_stack():
+        frame[1] += count
+
+
+def payload_tracked() -> bool:
+    # Whether anyone on this thread/task is counting payload bytes
+    return bool(_trackers() or _carried.get())
+
+
+def record_payload(nbytes: int):
+    # Response payload size of one request (dao/bm_query_stats.py)
+    for tracker in (*_trackers(), *_carried.get()):
+        tracker.bytes += nbytes
+
+
+class RoundTripTracker:
+    def __init__(self, strict: bool = False):
+        self.strict = strict
+        self.total = 0
+        self.bytes = 0
+        # operation -> round trips of each call, in call order
+        self.calls: Dict[str, List[int]] = {}
+
+    def record_call(self, operation: str, used: int):
+        self.calls.setdefault(operation, []).append(used)
+
+    def over_budget(self) -> Dict[str, int]:
+        # operation -> worst observed round trips, for every call that exceeded its budget
+        over = {}
+        for op, used in self.calls.items():
+            budget = ROUND_TRIP_BUDGETS.get(op)
+            if budget is not None and max(used) > budget:
+                over[op] = max(used)
+        return over
+
+
+async def carry_trackers(trackers: tuple, coro):
+    # Runs coro with the calling thread's trackers counting its requests
+    _carried.set(trackers)
+    return await coro
+
+def active_trackers() -> tuple:
+    return tuple(_trackers())
+
+
+@contextmanager
+def track_round_trips(strict: bool = False):
+    tracker = RoundTripTracker(strict)
+    _trackers().append(tracker)
+    try:
+        yield tracker
+    finally:
+        _trackers().remove(tracker)
+
+def round_trip_budget(limit: int):
+    # Declares how many round trips a DAO method may take; checked by active trackers
+    def decorator(fn):
+        operation = fn.__qualname__
+        ROUND_TRIP_BUDGETS[operation] = limit
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            trackers = _trackers()
+            if not trackers:
+                return fn(*args, **kwargs)
+            frame = [operation, 0]
+            _op_stack().append(frame)
+            try:
+                result = fn(*args, **kwargs)
+            finally:
+                _op_stack().pop()
+                for tracker in trackers:
+                    tracker.record_call(operation, frame[1])
+            if frame[1] > limit and any(t.strict for t in trackers):
+                raise RoundTripBudgetError(f"{operation} used {frame[1]} round trips (budget {limit})")
+            return result
+
+        wrapper.round_trip_budget = limit
+        return wrapper
+    return decorator
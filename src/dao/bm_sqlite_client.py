@@ -0,0 +1,635 @@
+# dao/bm_sqlite_client.py
+# In-process stand-in for the Supabase client backed by SQLite. It exposes the
+# subset of the postgrest query builder the DAOs use (table()/rpc() ... execute())
+# and implements the sql/ stored procedures in Python with the same semantics,
+# so DAOs and services run offline: set_supabase(SQLiteClient()).
+# With a file path it is also the embedded storage backend selected by
+# BM_STORAGE_BACKEND=sqlite (see config.py); file databases use WAL mode.
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+from postgrest.exceptions import APIError
+from src.dao.bm_round_trips import record_round_trip
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bm_customers (
+    customer_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    phone TEXT,
+    city TEXT,
+    address TEXT,
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+CREATE TABLE IF NOT EXISTS bm_accounts (
+    account_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    customer_id INTEGER NOT NULL REFERENCES bm_customers(customer_id),
+    account_type TEXT NOT NULL,
+    balance REAL NOT NULL DEFAULT 0,
+    status TEXT DEFAULT 'ACTIVE',
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+    version INTEGER NOT NULL DEFAULT 0
+);
+-- sql/006_account_versions.sql
+CREATE TRIGGER IF NOT EXISTS bm_accounts_version_trg
+AFTER UPDATE OF balance ON bm_accounts
+WHEN NEW.balance IS NOT OLD.balance AND NEW.version = OLD.version
+BEGIN
+    UPDATE bm_accounts SET version = OLD.version + 1 WHERE account_id = NEW.account_id;
+END;
+CREATE TABLE IF NOT EXISTS bm_transactions (
+    transaction_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    account_id INTEGER NOT NULL REFERENCES bm_accounts(account_id),
+    transaction_type TEXT NOT NULL,
+    amount REAL NOT NULL,
+    transaction_date TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+CREATE TABLE IF NOT EXISTS bm_loans (
+    loan_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    customer_id INTEGER NOT NULL REFERENCES bm_customers(customer_id),
+    loan_type TEXT NOT NULL,
+    amount REAL NOT NULL,
+    interest_rate REAL,
+    tenure_months INTEGER NOT NULL DEFAULT 12,
+    outstanding REAL,
+    status TEXT DEFAULT 'PENDING',
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+CREATE TABLE IF NOT EXISTS bm_loan_repayments (
+    repayment_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    loan_id INTEGER NOT NULL REFERENCES bm_loans(loan_id),
+    amount REAL NOT NULL,
+    payment_date TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+    status TEXT DEFAULT 'PAID',
+    interest REAL,
+    principal REAL
+);
+CREATE TABLE IF NOT EXISTS bm_employees (
+    employee_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    email TEXT,
+    phone TEXT,
+    department TEXT,
+    role TEXT,
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+CREATE TABLE IF NOT EXISTS bm_transaction_rollup_monthly (
+    month TEXT NOT NULL,
+    transaction_type TEXT NOT NULL,
+    txn_count INTEGER NOT NULL DEFAULT 0,
+    total_amount REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (month, transaction_type)
+);
+CREATE TABLE IF NOT EXISTS bm_rollup_state (
+    name TEXT PRIMARY KEY,
+    high_water_mark INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+CREATE TABLE IF NOT EXISTS bm_balance_checkpoints (
+    account_id INTEGER NOT NULL REFERENCES bm_accounts(account_id),
+    checkpoint_at TEXT NOT NULL,
+    balance REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (account_id, checkpoint_at)
+);
+CREATE TABLE IF NOT EXISTS bm_balance_checkpoint_runs (
+    checkpoint_at TEXT PRIMARY KEY,
+    accounts INTEGER NOT NULL DEFAULT 0,
+    transactions INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+CREATE INDEX IF NOT EXISTS bm_transactions_account_date_idx ON bm_transactions (account_id, transaction_date);
+CREATE INDEX IF NOT EXISTS bm_transactions_date_idx ON bm_transactions (transaction_date);
+-- sql/010_lookup_indexes.sql
+CREATE INDEX IF NOT EXISTS bm_accounts_customer_idx ON bm_accounts (customer_id);
+CREATE INDEX IF NOT EXISTS bm_loans_customer_idx ON bm_loans (customer_id);
+CREATE INDEX IF NOT EXISTS bm_loan_repayments_loan_idx ON bm_loan_repayments (loan_id);
+CREATE INDEX IF NOT EXISTS bm_customers_email_idx ON bm_customers (email);
+-- sql/011_account_history.sql
+CREATE INDEX IF NOT EXISTS bm_transactions_account_history_idx ON bm_transactions (account_id, transaction_date, transaction_id);
+"""
+
+# Seconds a write waits for another process's write lock before failing
+BUSY_TIMEOUT = 5.0
+
+PRIMARY_KEYS = {
+    "bm_customers": "customer_id",
+    "bm_accounts": "account_id",
+    "bm_transactions": "transaction_id",
+    "bm_loans": "loan_id",
+    "bm_loan_repayments": "repayment_id",
+    "bm_employees": "employee_id",
+}
+
+_IDENT = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def _ident(name: str) -> str:
+    name = name.strip()
+    if not _IDENT.match(name):
+        raise APIError({"message": f"Invalid identifier: {name}", "code": "42601"})
+    return name
+
+def _value(value: Any) -> Any:
+    # PostgREST passes "now()" through to Postgres; resolve it here
+    return _now() if value == "now()" else value
+
+def _raise(message: str):
+    # Same shape as a plpgsql RAISE EXCEPTION coming back through PostgREST
+    raise APIError({"message": message, "code": "P0001"})
+
+
+class SQLiteResponse:
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class SQLiteQuery:
+    def __init__(self, client: "SQLiteClient", table: str):
+        self._client = client
+        self._table = _ident(table)
+        self._action = "select"
+        self._columns = "*"
+        self._count = None
+        self._head = False
+        self._payload = None
+        self._on_conflict = None
+        self._where: List[str] = []
+        self._params: List[Any] = []
+        self._order: List[str] = []
+        self._limit: Optional[int] = None
+        self._offset: Optional[int] = None
+
+    # actions
+    def select(self, columns: str = "*", count: Optional[str] = None, head: bool = False):
+        self._action = "select"
+        self._columns = "*" if columns.strip() == "*" else ", ".join(_ident(c) for c in columns.split(","))
+        self._count = count
+        self._head = head
+        return self
+
+    def insert(self, payload):
+        self._action = "insert"
+        self._payload = payload if isinstance(payload, list) else [payload]
+        return self
+
+    def upsert(self, payload, on_conflict: str = ""):
+        self._action = "upsert"
+        self._payload = payload if isinstance(payload, list) else [payload]
+        self._on_conflict = on_conflict or PRIMARY_KEYS.get(self._table)
+        return self
+
+    def update(self, fields: Dict):
+        self._action = "update"
+        self._payload = fields
+        return self
+
+    def delete(self):
+        self._action = "delete"
+        return self
+
+    # filters
+    def _filter(self, column: str, op: str, value: Any):
+        self._where.append(f"{_ident(column)} {op} ?")
+        self._params.append(_value(value))
+        return self
+
+    def eq(self, column: str, value: Any):
+        return self._filter(column, "=", value)
+
+    def neq(self, column: str, value: Any):
+        return self._filter(column, "!=", value)
+
+    def gt(self, column: str, value: Any):
+        return self._filter(column, ">", value)
+
+    def gte(self, column: str, value: Any):
+        return self._filter(column, ">=", value)
+
+    def lt(self, column: str, value: Any):
+        return self._filter(column, "<", value)
+
+    def lte(self, column: str, value: Any):
+        return self._filter(column, "<=", value)
+
+    def _condition(self, column: str, op: str, value: Any):
+        sql, params = _condition(column, op, value)
+        self._where.append(sql)
+        self._params += params
+        return self
+
+    def like(self, column: str, pattern: str):
+        return self._condition(column, "like", pattern)
+
+    def ilike(self, column: str, pattern: str):
+        return self._condition(column, "ilike", pattern)
+
+    def or_(self, filters: str):
+        # PostgREST logic tree, e.g. "name.ilike.ab*,and(id.gt.5,id.lt.9)"
+        sql, params = _logic_tree("or", filters)
+        self._where.append(sql)
+        self._params += params
+        return self
+
+    def is_(self, column: str, value: Any):
+        if value in (None, "null"):
+            self._where.append(f"{_ident(column)} IS NULL")
+            return self
+        return self._filter(column, "IS", value)
+
+    def in_(self, column: str, values):
+        values = list(values)
+        if not values:
+            self._where.append("0")
+            return self
+        self._where.append(f"{_ident(column)} IN ({', '.join('?' for _ in values)})")
+        self._params.extend(values)
+        return self
+
+    # modifiers
+    def order(self, column: str, desc: bool = False, nullsfirst: Optional[bool] = None):
+        self._order.append(f"{_ident(column)} {'DESC' if desc else 'ASC'}")
+        return self
+
+    def limit(self, size: int):
+        self._limit = int(size)
+        return self
+
+    def range(self, start: int, end: int):
+        self._offset = int(start)
+        self._limit = int(end) - int(start) + 1
+        return self
+
+    def _where_sql(self) -> str:
+        return f" WHERE {' AND '.join(self._where)}" if self._where else ""
+
+    def execute(self) -> SQLiteResponse:
+        self._client._round_trip()
+        return self._client._run(self._execute)
+
+    def _execute(self, conn: sqlite3.Connection) -> SQLiteResponse:
+        if self._action == "select":
+            count = None
+            if self._count:
+                count = conn.execute(f"SELECT COUNT(*) FROM {self._table}{self._where_sql()}", self._params).fetchone()[0]
+            if self._head:
+                return SQLiteResponse([], count)
+            sql = f"SELECT {self._columns} FROM {self._table}{self._where_sql()}"
+            params = list(self._params)
+            if self._order:
+                sql += f" ORDER BY {', '.join(self._order)}"
+            if self._limit is not None or self._offset is not None:
+                sql += " LIMIT ? OFFSET ?"
+                params += [self._limit if self._limit is not None else -1, self._offset or 0]
+            return SQLiteResponse(_rows(conn.execute(sql, params)), count)
+        if self._action in ("insert", "upsert"):
+            return SQLiteResponse([
+                self._client._insert_row(conn, self._table, row, self._on_conflict) for row in self._payload
+            ])
+        if self._action == "update":
+            if not self._payload:
+                return SQLiteResponse([])
+            columns = [_ident(c) for c in self._payload]
+            assignments = ", ".join(f"{c} = ?" for c in columns)
+            params = [_value(v) for v in self._payload.values()] + self._params
+            cursor = conn.execute(f"UPDATE {self._table} SET {assignments}{self._where_sql()} RETURNING *", params)
+            return SQLiteResponse(_rows(cursor))
+        if self._action == "delete":
+            cursor = conn.execute(f"DELETE FROM {self._table}{self._where_sql()} RETURNING *", self._params)
+            return SQLiteResponse(_rows(cursor))
+        raise APIError({"message": f"Unsupported action: {self._action}"})
+
+
+class SQLiteRPC:
+    def __init__(self, client: "SQLiteClient", fn: str, params: Optional[Dict]):
+        self._client = client
+        self._fn = fn
+        self._params = params or {}
+
+    def execute(self) -> SQLiteResponse:
+        self._client._round_trip()
+        handler = self._client._rpcs.get(self._fn)
+        if handler is None:
+            raise APIError({"message": f"Could not find the function {self._fn}", "code": "PGRST202"})
+        return SQLiteResponse(self._client._run(lambda conn: handler(conn, **self._params)))
+
+
+def _split_top_level(text: str) -> List[str]:
+    # Split on commas outside parentheses and double quotes
+    parts, depth, quoted, current, i = [], 0, False, [], 0
+    while i < len(text):
+        ch = text[i]
+        if ch == "\\" and i + 1 < len(text):
+            current.append(text[i:i + 2])
+            i += 2
+            continue
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and ch == ",":
+            parts.append("".join(current))
+            current = []
+            i += 1
+            continue
+        current.append(ch)
+        i += 1
+    parts.append("".join(current))
+    return [p.strip() for p in parts if p.strip()]
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        # PostgREST: inside quotes a backslash escapes the next character
+        value = re.sub(r"\\(.)", r"\1", value[1:-1])
+    return value
+
+def _condition(column: str, op: str, value: Any):
+    column = _ident(column)
+    if op in ("like", "ilike"):
+        # PostgREST: "*" is the wildcard; backslash escapes literal % and _
+        pattern = str(value).replace("*", "%")
+        if op == "ilike":
+            return f"lower({column}) LIKE lower(?) ESCAPE '\\'", [pattern]
+        return f"{column} LIKE ? ESCAPE '\\'", [pattern]
+    if op == "is":
+        return (f"{column} IS NULL", []) if value in (None, "null") else (f"{column} IS ?", [value])
+    if op == "in":
+        values = [_unquote(v) for v in _split_top_level(str(value).strip("()"))]
+        return (f"{column} IN ({', '.join('?' for _ in values)})", values) if values else ("0", [])
+    ops = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+    if op not in ops:
+        raise APIError({"message": f"Unsupported operator: {op}", "code": "PGRST100"})
+    return f"{column} {ops[op]} ?", [_value(value)]
+
+def _logic_tree(joiner: str, filters: str):
+    clauses, params = [], []
+    for part in _split_top_level(filters):
+        if part.startswith(("and(", "or(")) and part.endswith(")"):
+            inner_joiner, inner = part.split("(", 1)
+            sql, inner_params = _logic_tree(inner_joiner, inner[:-1])
+        else:
+            column, op, value = part.split(".", 2)
+            sql, inner_params = _condition(column, op, _unquote(value))
+        clauses.append(f"({sql})")
+        params += inner_params
+    return f"({f' {joiner.upper()} '.join(clauses)})", params
+
+def _split_repayment(amount: float, outstanding: float, annual_rate: Optional[float]):
+    # sql/009: a month's interest on the outstanding principal comes first, the
+    # rest repays principal; the loan settles once less than a cent is left.
+    # Returns (interest, principal, outstanding after); nine decimals keep the
+    # rounding from compounding over long, high-rate schedules.
+    interest = round(outstanding * (annual_rate or 0) / 1200, 9)
+    principal = round(amount - interest, 9)
+    if round(principal - outstanding, 9) >= 0.01:
+        _raise(f"Repayment exceeds payoff amount of {round(outstanding + interest, 2)}")
+    if round(outstanding - principal, 9) < 0.01:
+        principal = outstanding
+    return round(amount - principal, 9), principal, round(outstanding - principal, 9)
+
+def _rows(cursor: sqlite3.Cursor) -> List[Dict]:
+    names = [d[0] for d in cursor.description]
+    return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+
+class SQLiteClient:
+    def __init__(self, path: str = ":memory:", latency: float = 0.0):
+        # latency: seconds slept per request, outside the lock, to mimic the network hop
+        self.latency = latency
+        self._lock = threading.RLock()
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=BUSY_TIMEOUT)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        if path != ":memory:":
+            # Readers in other processes (e.g. a second Streamlit worker) don't
+            # block the writer; NORMAL sync is durable in WAL mode short of power loss
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._rpcs: Dict[str, Callable] = {
+            "bm_post_deposit": self._post_deposit,
+            "bm_post_withdraw": self._post_withdraw,
+            "bm_post_transfer": self._post_transfer,
+            "bm_post_batch": self._post_batch,
+            "bm_dashboard_summary": self._dashboard_summary,
+            "bm_apply_rollup_delta": self._apply_rollup_delta,
+            "bm_apply_loan_repayment": self._apply_loan_repayment,
+            "bm_set_repayment_status": self._set_repayment_status,
+        }
+
+    def table(self, name: str) -> SQLiteQuery:
+        return SQLiteQuery(self, name)
+
+    def rpc(self, fn: str, params: Optional[Dict] = None) -> SQLiteRPC:
+        return SQLiteRPC(self, fn, params)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _round_trip(self):
+        record_round_trip()
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    def _run(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        # Every request is its own transaction, like a PostgREST call
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._conn)
+            except sqlite3.IntegrityError as e:
+                self._conn.execute("ROLLBACK")
+                raise APIError({"message": str(e), "code": "23505" if "UNIQUE" in str(e) else "23503"})
+            except sqlite3.Error as e:
+                self._conn.execute("ROLLBACK")
+                raise APIError({"message": str(e), "code": "42703"})
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def _insert_row(self, conn: sqlite3.Connection, table: str, row: Dict, on_conflict: Optional[str] = None) -> Dict:
+        columns = [_ident(c) for c in row]
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+        if on_conflict:
+            keys = [_ident(k) for k in on_conflict.split(",")]
+            updates = ", ".join(f"{c} = excluded.{c}" for c in columns if c not in keys)
+            sql += f" ON CONFLICT ({', '.join(keys)}) DO " + (f"UPDATE SET {updates}" if updates else "NOTHING")
+        cursor = conn.execute(sql + " RETURNING *", [_value(v) for v in row.values()])
+        rows = _rows(cursor)
+        return rows[0] if rows else None
+
+    # sql/001_posting_engine.sql
+    def _post_deposit(self, conn, p_account_id: int, p_amount: float) -> Dict:
+        if p_amount is None or p_amount <= 0:
+            _raise("Deposit amount must be positive")
+        row = conn.execute(
+            "UPDATE bm_accounts SET balance = COALESCE(balance, 0) + ? WHERE account_id = ? RETURNING balance",
+            (p_amount, p_account_id),
+        ).fetchone()
+        if row is None:
+            _raise("Account not found")
+        txn = self._insert_row(conn, "bm_transactions", {
+            "account_id": p_account_id, "transaction_type": "DEPOSIT", "amount": p_amount, "transaction_date": "now()",
+        })
+        return {"account_id": p_account_id, "new_balance": row[0], "transaction": txn}
+
+    def _post_withdraw(self, conn, p_account_id: int, p_amount: float) -> Dict:
+        if p_amount is None or p_amount <= 0:
+            _raise("Withdraw amount must be positive")
+        row = conn.execute(
+            "UPDATE bm_accounts SET balance = balance - ? WHERE account_id = ? AND COALESCE(balance, 0) >= ? RETURNING balance",
+            (p_amount, p_account_id, p_amount),
+        ).fetchone()
+        if row is None:
+            exists = conn.execute("SELECT 1 FROM bm_accounts WHERE account_id = ?", (p_account_id,)).fetchone()
+            _raise("Insufficient balance" if exists else "Account not found")
+        txn = self._insert_row(conn, "bm_transactions", {
+            "account_id": p_account_id, "transaction_type": "WITHDRAW", "amount": p_amount, "transaction_date": "now()",
+        })
+        return {"account_id": p_account_id, "new_balance": row[0], "transaction": txn}
+
+    def _post_transfer(self, conn, p_from_account_id: int, p_to_account_id: int, p_amount: float) -> Dict:
+        if p_amount is None or p_amount <= 0:
+            _raise("Transfer amount must be positive")
+        sent = self._post_withdraw(conn, p_from_account_id, p_amount)
+        received = self._post_deposit(conn, p_to_account_id, p_amount)
+        return {
+            "from_account_id": p_from_account_id,
+            "to_account_id": p_to_account_id,
+            "amount": p_amount,
+            "from_balance": sent["new_balance"],
+            "to_balance": received["new_balance"],
+            "transactions": [sent["transaction"], received["transaction"]],
+        }
+
+    # sql/002_batch_posting.sql
+    def _post_batch(self, conn, p_transactions: List[Dict], p_deltas: List[Dict]) -> Dict:
+        deltas = sorted(p_deltas, key=lambda d: d["account_id"])
+        cursor = conn.executemany(
+            "UPDATE bm_accounts SET balance = COALESCE(balance, 0) + ? WHERE account_id = ? AND COALESCE(balance, 0) >= ?",
+            [(d["delta"], d["account_id"], d["required"]) for d in deltas],
+        )
+        if cursor.rowcount != len(deltas):
+            _raise("Batch balance check failed")
+        now = _now()
+        conn.executemany(
+            "INSERT INTO bm_transactions (account_id, transaction_type, amount, transaction_date) VALUES (?, ?, ?, ?)",
+            [(t["account_id"], t["transaction_type"], t["amount"], now) for t in p_transactions],
+        )
+        ids = [d["account_id"] for d in deltas]
+        balances = []
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            balances += _rows(conn.execute(
+                f"SELECT account_id, balance FROM bm_accounts WHERE account_id IN ({', '.join('?' for _ in chunk)})", chunk
+            ))
+        return {"posted": len(p_transactions), "balances": balances}
+
+    # sql/003_dashboard_summary.sql, as replaced by sql/004_monthly_rollup.sql
+    def _dashboard_summary(self, conn) -> Dict:
+        def scalar(sql: str):
+            return conn.execute(sql).fetchone()[0]
+
+        def groups(key: str, sql: str) -> List[Dict]:
+            return [{key: k, "count": n} for k, n in conn.execute(sql + " ORDER BY 2 DESC")]
+
+        return {
+            "counts": {
+                "customers": scalar("SELECT COUNT(*) FROM bm_customers"),
+                "accounts": scalar("SELECT COUNT(*) FROM bm_accounts"),
+                "active_accounts": scalar("SELECT COUNT(*) FROM bm_accounts WHERE upper(status) = 'ACTIVE'"),
+                "loans": scalar("SELECT COUNT(*) FROM bm_loans"),
+                "transactions": scalar("SELECT COUNT(*) FROM bm_transactions"),
+                "repayments": scalar("SELECT COUNT(*) FROM bm_loan_repayments"),
+                "employees": scalar("SELECT COUNT(*) FROM bm_employees"),
+            },
+            "totals": {
+                "balance": scalar("SELECT COALESCE(SUM(balance), 0) FROM bm_accounts"),
+                "loan_amount": scalar("SELECT COALESCE(SUM(amount), 0) FROM bm_loans"),
+                "repaid": scalar("SELECT COALESCE(SUM(amount), 0) FROM bm_loan_repayments"),
+                "deposits": scalar("SELECT COALESCE(SUM(total_amount), 0) FROM bm_transaction_rollup_monthly WHERE transaction_type = 'DEPOSIT'"),
+                "withdrawals": scalar("SELECT COALESCE(SUM(total_amount), 0) FROM bm_transaction_rollup_monthly WHERE transaction_type = 'WITHDRAW'"),
+            },
+            "account_types": groups("account_type", "SELECT account_type, COUNT(*) FROM bm_accounts GROUP BY account_type"),
+            "loan_types": groups("loan_type", "SELECT loan_type, COUNT(*) FROM bm_loans GROUP BY loan_type"),
+            "repayment_status": groups("status", "SELECT status, COUNT(*) FROM bm_loan_repayments GROUP BY status"),
+            "employee_roles": groups("role", "SELECT role, COUNT(*) FROM bm_employees WHERE role IS NOT NULL GROUP BY role"),
+            "monthly_trend": [
+                {"month": month, "transaction_type": txn_type, "count": n, "amount": total}
+                for month, txn_type, n, total in conn.execute(
+                    "SELECT month, transaction_type, txn_count, total_amount "
+                    "FROM bm_transaction_rollup_monthly ORDER BY 1, 2"
+                )
+            ],
+        }
+
+    # sql/004_monthly_rollup.sql
+    def _apply_rollup_delta(self, conn, p_name: str, p_old_hwm: int, p_new_hwm: int, p_deltas: List[Dict], p_reset: bool = False) -> Dict:
+        conn.execute("INSERT INTO bm_rollup_state (name, high_water_mark) VALUES (?, 0) ON CONFLICT (name) DO NOTHING", (p_name,))
+        hwm = conn.execute("SELECT high_water_mark FROM bm_rollup_state WHERE name = ?", (p_name,)).fetchone()[0]
+        if p_reset:
+            conn.execute("DELETE FROM bm_transaction_rollup_monthly")
+        elif hwm != p_old_hwm:
+            return {"applied": False, "high_water_mark": hwm}
+        conn.executemany(
+            "INSERT INTO bm_transaction_rollup_monthly (month, transaction_type, txn_count, total_amount) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (month, transaction_type) DO UPDATE SET "
+            "txn_count = txn_count + excluded.txn_count, total_amount = total_amount + excluded.total_amount",
+            [(d["month"], d["transaction_type"], d["count"], d["amount"]) for d in p_deltas],
+        )
+        conn.execute("UPDATE bm_rollup_state SET high_water_mark = ?, updated_at = ? WHERE name = ?", (p_new_hwm, _now(), p_name))
+        return {"applied": True, "high_water_mark": p_new_hwm}
+
+    # sql/009_loan_outstanding.sql; amounts are rounded to stand in for exact numeric
+    def _apply_loan_repayment(self, conn, p_loan_id: int, p_amount: float, p_payment_date: Optional[str] = None,
+                              p_status: str = "PAID") -> Dict:
+        if p_amount is None or p_amount <= 0:
+            _raise("Repayment amount must be positive")
+        loan = conn.execute("SELECT amount, outstanding, status, interest_rate FROM bm_loans WHERE loan_id = ?", (p_loan_id,)).fetchone()
+        if loan is None:
+            _raise("Loan not found")
+        outstanding = loan[1] if loan[1] is not None else loan[0]
+        status = p_status or "PAID"
+        interest = principal = None
+        if status.upper() == "PAID":
+            interest, principal, outstanding = _split_repayment(p_amount, outstanding, loan[3])
+        loan_status = "CLOSED" if outstanding == 0 else loan[2]
+        conn.execute("UPDATE bm_loans SET outstanding = ?, status = ? WHERE loan_id = ?", (outstanding, loan_status, p_loan_id))
+        repayment = self._insert_row(conn, "bm_loan_repayments", {
+            "loan_id": p_loan_id, "amount": p_amount, "payment_date": p_payment_date or "now()", "status": status,
+            "interest": interest, "principal": principal,
+        })
+        return {"repayment": repayment, "loan_id": p_loan_id, "outstanding": outstanding, "loan_status": loan_status}
+
+    def _set_repayment_status(self, conn, p_repayment_id: int, p_status: str) -> Optional[Dict]:
+        repayment = conn.execute("SELECT loan_id, amount, status, interest, principal FROM bm_loan_repayments WHERE repayment_id = ?",
+                                 (p_repayment_id,)).fetchone()
+        if repayment is None:
+            return None
+        loan_id, amount, old_status, interest, principal = repayment
+        loan = conn.execute("SELECT amount, outstanding, status, interest_rate FROM bm_loans WHERE loan_id = ?", (loan_id,)).fetchone()
+        outstanding = loan[1] if loan[1] is not None else loan[0]
+        was_paid = (old_status or "").upper() == "PAID"
+        now_paid = (p_status or "").upper() == "PAID"
+        if was_paid and not now_paid:
+            outstanding = round(outstanding + (amount if principal is None else principal), 9)
+            interest = principal = None
+        elif now_paid and not was_paid:
+            interest, principal, outstanding = _split_repayment(amount, outstanding, loan[3])
+        if outstanding == 0:
+            loan_status = "CLOSED"
+        else:
+            loan_status = "ACTIVE" if (loan[2] or "").upper() == "CLOSED" else loan[2]
+        conn.execute("UPDATE bm_loans SET outstanding = ?, status = ? WHERE loan_id = ?", (outstanding, loan_status, loan_id))
+        return _rows(conn.execute("UPDATE bm_loan_repayments SET status = ?, interest = ?, principal = ? WHERE repayment_id = ? RETURNING *",
+                                  (p_status, interest, principal, p_repayment_id)))[0]
@@ -1,78 +1,427 @@
 # dao/bm_transaction_dao.py
-from typing import List, Dict, Optional
-from src.config import get_supabase
+import logging
+import math
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Dict, Optional, Tuple, Union
+from postgrest.exceptions import APIError
+from src.config import get_supabase, get_velocity_rules
+from src.dao.bm_round_trips import round_trip_budget
+from src.dao.bm_pagination import DEFAULT_PAGE_SIZE, iter_keyset, with_key
+from src.dao.bm_records import ColumnarResult
+from src.dao.bm_velocity import VelocityLimitError, get_velocity_limiter
+
+# post_batch(): ops per bm_post_batch call, ids per balance lookup, re-plans on conflict
+BATCH_CHUNK_SIZE = 2000
+BATCH_LOOKUP_SIZE = 500
+BATCH_MAX_RETRIES = 3
+# get_account_history(): columns every window row carries (cursor and running balance)
+HISTORY_COLUMNS = "transaction_id,transaction_type,amount,transaction_date"
+# OptimisticTransactionDAO: retries after a version conflict, max backoff step (seconds)
+CAS_MAX_RETRIES = 5
+CAS_BACKOFF = 0.005
+
+logger = logging.getLogger("bm.postings")
 
 class TransactionDAOError(Exception):
     pass
 
+def reserve_velocity(limiter, legs: List[Tuple[int, str, float]]):
+    # Counts (account_id, transaction_type, amount) legs against the velocity rules
+    try:
+        return limiter.reserve(legs)
+    except VelocityLimitError as e:
+        raise TransactionDAOError(str(e))
+
+def valid_amount(amount, what: str = "Amount") -> float:
+    # Every posting amount, single or batched: NaN slips past "<= 0" and inf
+    # would post, so both are rejected before anything reaches the balance
+    try:
+        value = float(amount)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid amount")
+    if not math.isfinite(value):
+        raise ValueError("Invalid amount")
+    if value <= 0:
+        raise ValueError(f"{what} must be positive")
+    return value
+
+def posting_amount(amount, what: str) -> float:
+    # valid_amount() for the single-posting methods, which raise TransactionDAOError
+    try:
+        return valid_amount(amount, what)
+    except ValueError as e:
+        raise TransactionDAOError(str(e))
+
+def _batch_legs(op: Dict) -> List[tuple]:
+    # Validate one batch op and split it into (account_id, signed amount, transaction_type) legs
+    op_type = str(op.get("type", "")).lower()
+    amount = valid_amount(op.get("amount"))
+    try:
+        if op_type == "deposit":
+            return [(int(op["account_id"]), amount, "DEPOSIT")]
+        if op_type == "withdraw":
+            return [(int(op["account_id"]), -amount, "WITHDRAW")]
+        if op_type == "transfer":
+            return [(int(op["from_account_id"]), -amount, "WITHDRAW"), (int(op["to_account_id"]), amount, "DEPOSIT")]
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("Missing or invalid account id")
+    raise ValueError(f"Unknown operation type: {op.get('type')}")
+
+# Last known (balance, version) of each account plus CAS counters, shared by
+# every OptimisticTransactionDAO in the process.
+class _AccountSnapshots:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows: Dict[int, Tuple[float, int]] = {}
+        self._stats = {
+            "cas_updates": 0,
+            "cas_conflicts": 0,
+            "cas_retries": 0,
+            "cas_exhausted": 0,
+            "snapshot_reads": 0,
+        }
+
+    def get(self, account_id: int) -> Optional[Tuple[float, int]]:
+        with self._lock:
+            return self._rows.get(account_id)
+
+    def put(self, row: Dict) -> Tuple[float, int]:
+        snapshot = (row.get("balance") or 0, row.get("version") or 0)
+        with self._lock:
+            self._rows[row["account_id"]] = snapshot
+        return snapshot
+
+    def count(self, stat: str):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def reset(self):
+        with self._lock:
+            self._rows.clear()
+            for k in self._stats:
+                self._stats[k] = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self._stats)
+
+
+_snapshots = _AccountSnapshots()
+
+def get_cas_stats() -> Dict:
+    return _snapshots.stats()
+
+def reset_cas_stats():
+    # Also forgets cached snapshots (tests, benchmarks)
+    _snapshots.reset()
+
 class TransactionDAO:
     def __init__(self):
         self._sb = get_supabase()
+        # Velocity counters are rebuilt from bm_transactions by the first DAO in the process
+        self._velocity = get_velocity_limiter()
+        self._velocity.ensure_loaded(get_velocity_rules(), self._sb)
+
+    @contextmanager
+    def _limited(self, legs: List[Tuple[int, str, float]]):
+        # Reserves the legs against the velocity rules before posting them and
+        # takes them back only if the backend refused the posting; after a
+        # timeout or dropped connection it may have committed, so it stays counted
+        self._velocity.resolve_owners([leg[0] for leg in legs], self._sb)
+        token = reserve_velocity(self._velocity, legs)
+        try:
+            yield
+        except (APIError, TransactionDAOError):
+            self._velocity.release(token)
+            raise
 
+    # Posting goes through the sql/001_posting_engine.sql functions: ledger insert
+    # and balance change happen in one server-side transaction, one round trip.
+    def _post(self, fn: str, params: Dict) -> Dict:
+        try:
+            resp = self._sb.rpc(fn, params).execute()
+        except APIError as e:
+            raise TransactionDAOError(e.message or str(e))
+        return resp.data
+
+    @round_trip_budget(1)
     def deposit(self, account_id: int, amount: float) -> Dict:
-        if amount <= 0:
-            raise TransactionDAOError("Deposit amount must be positive")
-        # Add deposit transaction
-        payload = {
-            "account_id": account_id,
-            "transaction_type": "DEPOSIT",
-            "amount": amount,
-            "transaction_date": "now()"
-        }
-        self._sb.table("bm_transactions").insert(payload).execute()
-        # Update account balance
-        account_resp = self._sb.table("bm_accounts").select("*").eq("account_id", account_id).limit(1).execute()
-        if not account_resp.data:
-            raise TransactionDAOError("Account not found")
-        account = account_resp.data[0]
-        new_balance = (account.get("balance") or 0) + amount
-        self._sb.table("bm_accounts").update({"balance": new_balance}).eq("account_id", account_id).execute()
-        return {"account_id": account_id, "new_balance": new_balance, "transaction": payload}
+        amount = posting_amount(amount, "Deposit amount")
+        with self._limited([(account_id, "DEPOSIT", amount)]):
+            return self._post("bm_post_deposit", {"p_account_id": account_id, "p_amount": amount})
 
+    @round_trip_budget(1)
     def withdraw(self, account_id: int, amount: float) -> Dict:
-        if amount <= 0:
-            raise TransactionDAOError("Withdraw amount must be positive")
-        account_resp = self._sb.table("bm_accounts").select("*").eq("account_id", account_id).limit(1).execute()
-        if not account_resp.data:
-            raise TransactionDAOError("Account not found")
-        account = account_resp.data[0]
-        current_balance = account.get("balance") or 0
-        if current_balance < amount:
-            raise TransactionDAOError("Insufficient balance")
-        # Add withdrawal transaction
-        payload = {
-            "account_id": account_id,
-            "transaction_type": "WITHDRAW",
-            "amount": amount,
-            "transaction_date": "now()"
-        }
-        self._sb.table("bm_transactions").insert(payload).execute()
-        # Update account balance
-        new_balance = current_balance - amount
-        self._sb.table("bm_accounts").update({"balance": new_balance}).eq("account_id", account_id).execute()
-        return {"account_id": account_id, "new_balance": new_balance, "transaction": payload}
+        amount = posting_amount(amount, "Withdraw amount")
+        with self._limited([(account_id, "WITHDRAW", amount)]):
+            return self._post("bm_post_withdraw", {"p_account_id": account_id, "p_amount": amount})
 
+    @round_trip_budget(1)
     def transfer(self, from_account_id: int, to_account_id: int, amount: float) -> Dict:
-        if amount <= 0:
-            raise TransactionDAOError("Transfer amount must be positive")
-        # Withdraw from source account
-        self.withdraw(from_account_id, amount)
-        # Deposit to destination account
-        self.deposit(to_account_id, amount)
-        # Return summary
+        amount = posting_amount(amount, "Transfer amount")
+        # Withdraw from source and deposit to destination atomically
+        with self._limited([(from_account_id, "WITHDRAW", amount), (to_account_id, "DEPOSIT", amount)]):
+            return self._post("bm_post_transfer", {
+                "p_from_account_id": from_account_id,
+                "p_to_account_id": to_account_id,
+                "p_amount": amount
+            })
+
+    def post_batch(self, ops: List[Dict], chunk_size: int = BATCH_CHUNK_SIZE) -> Dict:
+        results: List[Optional[Dict]] = [None] * len(ops)
+        valid = []
+        for index, op in enumerate(ops):
+            try:
+                valid.append((index, _batch_legs(op)))
+            except ValueError as e:
+                results[index] = {"index": index, "status": "REJECTED", "reason": str(e)}
+        balances = {}
+        for start in range(0, len(valid), chunk_size):
+            balances.update(self._post_batch_chunk(valid[start:start + chunk_size], results))
         return {
-            "from_account_id": from_account_id,
-            "to_account_id": to_account_id,
-            "amount": amount
+            "posted": sum(1 for r in results if r["status"] == "POSTED"),
+            "results": results,
+            "rejected": [r for r in results if r["status"] == "REJECTED"],
+            "balances": balances,
         }
 
-    def get_transactions_by_account(self, account_id: int) -> List[Dict]:
-        resp = self._sb.table("bm_transactions").select("*").eq("account_id", account_id).order("transaction_date", desc=True).execute()
-        return resp.data or []
+    def _fetch_balances(self, account_ids: List[int]) -> Dict[int, float]:
+        balances = {}
+        for start in range(0, len(account_ids), BATCH_LOOKUP_SIZE):
+            chunk = account_ids[start:start + BATCH_LOOKUP_SIZE]
+            resp = self._sb.table("bm_accounts").select("account_id,balance").in_("account_id", chunk).execute()
+            balances.update({row["account_id"]: row.get("balance") or 0 for row in resp.data or []})
+        return balances
+
+    def _post_batch_chunk(self, chunk: List[tuple], results: List[Optional[Dict]]) -> Dict[int, float]:
+        account_ids = sorted({account_id for _, legs in chunk for account_id, _, _ in legs})
+        self._velocity.resolve_owners(account_ids, self._sb)
+        for attempt in range(BATCH_MAX_RETRIES):
+            # Replay the chunk in order against current balances to decide what posts
+            balances = self._fetch_balances(account_ids)
+            net: Dict[int, float] = {}
+            low: Dict[int, float] = {}
+            rows, outcome, reserved = [], {}, []
+            for index, legs in chunk:
+                if any(account_id not in balances for account_id, _, _ in legs):
+                    outcome[index] = "Account not found"
+                    continue
+                if any(delta < 0 and balances[account_id] + delta < 0 for account_id, delta, _ in legs):
+                    outcome[index] = "Insufficient balance"
+                    continue
+                try:
+                    reserved.append(reserve_velocity(self._velocity, [(a, txn_type, abs(delta)) for a, delta, txn_type in legs]))
+                except TransactionDAOError as e:
+                    outcome[index] = str(e)
+                    continue
+                for account_id, delta, txn_type in legs:
+                    balances[account_id] += delta
+                    net[account_id] = net.get(account_id, 0) + delta
+                    low[account_id] = min(low.get(account_id, 0), net[account_id])
+                    rows.append({"account_id": account_id, "transaction_type": txn_type, "amount": abs(delta)})
+                outcome[index] = None
+            if not rows:
+                break
+            # "required" = lowest starting balance that keeps every intermediate balance >= 0
+            deltas = [{"account_id": a, "delta": net[a], "required": -low[a]} for a in sorted(net)]
+            try:
+                resp = self._sb.rpc("bm_post_batch", {"p_transactions": rows, "p_deltas": deltas}).execute()
+            except APIError as e:
+                # Refused, nothing was posted: give the velocity counters back before replaying or failing
+                for token in reserved:
+                    self._velocity.release(token)
+                if "Batch balance check failed" in (e.message or "") and attempt + 1 < BATCH_MAX_RETRIES:
+                    continue
+                raise TransactionDAOError(f"Failed to post batch: {e.message or e}")
+            balances = {row["account_id"]: row["balance"] for row in resp.data.get("balances") or []}
+            break
+        for index, reason in outcome.items():
+            results[index] = {"index": index, "status": "POSTED"} if reason is None else {"index": index, "status": "REJECTED", "reason": reason}
+        return balances
 
-    def get_all_transactions(self) -> List[Dict]:
+    def get_transactions_by_account(self, account_id: int, columns: str = "*", compact: bool = False) -> Union[List[Dict], ColumnarResult]:
+        resp = self._sb.table("bm_transactions").select(columns).eq("account_id", account_id).order("transaction_date", desc=True).execute()
+        return ColumnarResult.from_rows(resp.data or []) if compact else resp.data or []
+
+    @round_trip_budget(1)
+    def get_account_history(self, account_id: int, limit: int, before: Optional[Tuple[str, int]] = None,
+                            start: Optional[str] = None, end: Optional[str] = None, types: Optional[List[str]] = None,
+                            columns: str = HISTORY_COLUMNS) -> Tuple[List[Dict], Optional[int]]:
+        # One window of an account's transactions, newest first, seeking past the
+        # (transaction_date, transaction_id) cursor `before` on the sql/011 index.
+        # start/end bound transaction_date inclusively; types filters transaction_type.
+        # The first window (no cursor) also counts every matching row, in the same request.
+        for column in HISTORY_COLUMNS.split(","):
+            columns = with_key(columns, column)
+        q = self._sb.table("bm_transactions").select(columns, count="exact" if before is None else None) \
+            .eq("account_id", account_id)
+        if start:
+            q = q.gte("transaction_date", start)
+        if end:
+            q = q.lte("transaction_date", end)
+        if types:
+            q = q.in_("transaction_type", list(types))
+        if before is not None:
+            date, txn_id = before
+            # The plain bound lets the index seek; the or() breaks ties on the id
+            q = q.lte("transaction_date", date).or_(
+                f'transaction_date.lt."{date}",and(transaction_date.eq."{date}",transaction_id.lt.{int(txn_id)})'
+            )
+        try:
+            resp = q.order("transaction_date", desc=True).order("transaction_id", desc=True).limit(limit).execute()
+        except Exception as e:
+            raise TransactionDAOError(f"Failed to fetch transactions for account {account_id}: {e}")
+        return resp.data or [], resp.count if before is None else None
+
+    @round_trip_budget(1)
+    def get_balance(self, account_id: int) -> float:
+        resp = self._sb.table("bm_accounts").select("balance").eq("account_id", account_id).limit(1).execute()
+        if not resp.data:
+            raise TransactionDAOError("Account not found")
+        return float(resp.data[0].get("balance") or 0)
+
+    def iter_transactions_between(self, account_ids: List[int], after: str, upto: str,
+                                  page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[Dict]:
+        # Transactions of these accounts with after < transaction_date <= upto, in transaction_id order
+        columns = "transaction_id,account_id,transaction_type,amount,transaction_date"
+        try:
+            yield from iter_keyset(
+                lambda: self._sb.table("bm_transactions").select(columns).in_("account_id", account_ids)
+                .gt("transaction_date", after).lte("transaction_date", upto),
+                "transaction_id", page_size,
+            )
+        except Exception as e:
+            raise TransactionDAOError(f"Failed to fetch transactions: {e}")
+
+    def get_all_transactions(self, columns: str = "*", compact: bool = False) -> Union[List[Dict], ColumnarResult]:
+        # Newest first, as before; use iter_all_transactions() to stream large ledgers.
+        # compact=True builds the columns page by page instead of holding every row as a dict
+        if compact:
+            return ColumnarResult.from_rows(self.iter_all_transactions(columns=columns)).sorted_by("transaction_date", descending=True)
+        rows = list(self.iter_all_transactions(columns=columns))
+        rows.sort(key=lambda r: r.get("transaction_date") or "", reverse=True)
+        return rows
+
+    def iter_all_transactions(self, page_size: int = DEFAULT_PAGE_SIZE, prefetch: bool = False, columns: str = "*") -> Iterator[Dict]:
+        columns = with_key(columns, "transaction_id")
         try:
-            resp = self._sb.table("bm_transactions").select("*").order("transaction_date", desc=True).execute()
-            return resp.data or []
+            yield from iter_keyset(lambda: self._sb.table("bm_transactions").select(columns), "transaction_id", page_size, prefetch)
         except Exception as e:
-            raise TransactionDAOError(f"Failed to fetch all transactions: {e}")
\ No newline at end of file
+            raise TransactionDAOError(f"Failed to fetch all transactions: {e}")
+
+
+class OptimisticTransactionDAO(TransactionDAO):
+    # For databases without the sql/001 posting functions (BM_POSTING_MODE=cas).
+    # Each balance change is a compare-and-swap on bm_accounts.version (sql/006)
+    # against the last known snapshot, retried on conflict, and the ledger rows
+    # are inserted afterwards. With a warm snapshot there is no read before the
+    # write: a deposit is one update plus one insert.
+
+    def _read_snapshot(self, account_id: int) -> Tuple[float, int]:
+        _snapshots.count("snapshot_reads")
+        resp = self._sb.table("bm_accounts").select("account_id,balance,version").eq("account_id", account_id).execute()
+        if not resp.data:
+            raise TransactionDAOError("Account not found")
+        return _snapshots.put(resp.data[0])
+
+    def _apply_delta(self, account_id: int, delta: float) -> Dict:
+        snapshot = _snapshots.get(account_id)
+        fresh = snapshot is None
+        if fresh:
+            snapshot = self._read_snapshot(account_id)
+        conflicts = 0
+        while True:
+            balance, version = snapshot
+            if balance + delta < 0:
+                if fresh:
+                    raise TransactionDAOError("Insufficient balance")
+                # A cached balance may be stale; confirm before rejecting
+                snapshot, fresh = self._read_snapshot(account_id), True
+                continue
+            resp = self._sb.table("bm_accounts").update({"balance": balance + delta, "version": version + 1}) \
+                .eq("account_id", account_id).eq("version", version).execute()
+            if resp.data:
+                _snapshots.count("cas_updates")
+                _snapshots.put(resp.data[0])
+                return resp.data[0]
+            _snapshots.count("cas_conflicts")
+            conflicts += 1
+            if conflicts > CAS_MAX_RETRIES:
+                _snapshots.count("cas_exhausted")
+                raise TransactionDAOError(f"Account {account_id} is busy, please retry")
+            _snapshots.count("cas_retries")
+            time.sleep(random.uniform(0, CAS_BACKOFF * conflicts))
+            snapshot, fresh = self._read_snapshot(account_id), True
+
+    def _record(self, rows: List[Dict], applied: List[Tuple[int, float]]) -> List[Dict]:
+        try:
+            return self._sb.table("bm_transactions").insert(rows).execute().data
+        except Exception as e:
+            # Timeouts and dropped connections too: a balance change must not stay without its ledger row
+            self._undo(applied, e)
+            if isinstance(e, APIError):
+                raise TransactionDAOError(f"Failed to record transaction: {e.message or e}")
+            raise
+
+    def _undo(self, applied: List[Tuple[int, float]], cause: BaseException):
+        # Compensate balance changes already made when a later step fails. Every
+        # leg is attempted; a leg that can't be reversed is logged with its
+        # account and delta and raised, chained to the first undo error, in
+        # place of (and naming) the original failure
+        failed, first_error = [], None
+        for account_id, delta in reversed(applied):
+            try:
+                self._apply_delta(account_id, -delta)
+            except Exception as e:
+                logger.error("Failed to reverse %+.2f on account %s after a failed posting (%s): %s",
+                             delta, account_id, cause, e)
+                failed.append(f"{account_id} ({delta:+.2f})")
+                first_error = first_error or e
+        if failed:
+            raise TransactionDAOError(
+                f"Posting failed ({cause}) and could not be reversed; balance changed without a ledger row "
+                f"on account {', '.join(failed)}"
+            ) from first_error
+
+    def _post_single(self, account_id: int, delta: float, txn_type: str) -> Dict:
+        account = self._apply_delta(account_id, delta)
+        txn = self._record([{"account_id": account_id, "transaction_type": txn_type, "amount": abs(delta)}], [(account_id, delta)])
+        return {"account_id": account_id, "new_balance": account["balance"], "transaction": txn[0]}
+
+    @round_trip_budget(2)
+    def deposit(self, account_id: int, amount: float) -> Dict:
+        amount = posting_amount(amount, "Deposit amount")
+        with self._limited([(account_id, "DEPOSIT", amount)]):
+            return self._post_single(account_id, amount, "DEPOSIT")
+
+    @round_trip_budget(2)
+    def withdraw(self, account_id: int, amount: float) -> Dict:
+        amount = posting_amount(amount, "Withdraw amount")
+        with self._limited([(account_id, "WITHDRAW", amount)]):
+            return self._post_single(account_id, -amount, "WITHDRAW")
+
+    @round_trip_budget(3)
+    def transfer(self, from_account_id: int, to_account_id: int, amount: float) -> Dict:
+        amount = posting_amount(amount, "Transfer amount")
+        with self._limited([(from_account_id, "WITHDRAW", amount), (to_account_id, "DEPOSIT", amount)]):
+            source = self._apply_delta(from_account_id, -amount)
+            try:
+                destination = self._apply_delta(to_account_id, amount)
+            except Exception as e:
+                self._undo([(from_account_id, -amount)], e)
+                raise
+            txns = self._record([
+                {"account_id": from_account_id, "transaction_type": "WITHDRAW", "amount": amount},
+                {"account_id": to_account_id, "transaction_type": "DEPOSIT", "amount": amount},
+            ], [(from_account_id, -amount), (to_account_id, amount)])
+        return {
+            "from_account_id": from_account_id,
+            "to_account_id": to_account_id,
+            "amount": amount,
+            "from_balance": source["balance"],
+            "to_balance": destination["balance"],
+            "transactions": txns,
+        }
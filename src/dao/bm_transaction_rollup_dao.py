@@ -0,0 +1,108 @@
+# dao/bm_transaction_rollup_dao.py
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from src.config import get_rollup_lag_seconds, get_supabase
+from src.dao.bm_pagination import DEFAULT_PAGE_SIZE, iter_keyset
+
+ROLLUP_NAME = "monthly_transactions"
+
+class TransactionRollupDAOError(Exception):
+    pass
+
+def _aggregate(rows: Iterable[Dict]) -> Tuple[Dict[Tuple[str, str], List[float]], int, int]:
+    # (month, transaction_type) -> [count, amount], plus rows seen and the highest transaction_id
+    groups: Dict[Tuple[str, str], List[float]] = {}
+    seen, max_id = 0, 0
+    for row in rows:
+        # ISO timestamps: the first 7 chars are the month, no datetime parsing needed
+        key = (str(row.get("transaction_date") or "")[:7], row.get("transaction_type"))
+        group = groups.setdefault(key, [0, 0.0])
+        group[0] += 1
+        group[1] += row.get("amount") or 0
+        seen += 1
+        max_id = max(max_id, row["transaction_id"])
+    return groups, seen, max_id
+
+def _settled(rows: Iterable[Dict], lag_seconds: float) -> Iterator[Dict]:
+    # Rows in transaction_id order, up to the first one posted within the lag.
+    # Ids are handed out at insert, not at commit: a posting still in flight can
+    # hold a lower id than rows already visible. Its transaction_date is its
+    # transaction's start, so once every row up to the mark is older than the
+    # lag (longer than any posting transaction), no lower id can still appear.
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=lag_seconds)
+    for row in rows:
+        ts = datetime.fromisoformat(str(row.get("transaction_date")).replace("Z", "+00:00"))
+        if (ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts) >= cutoff:
+            return
+        yield row
+
+def _deltas(groups: Dict[Tuple[str, str], List[float]]) -> List[Dict]:
+    return [
+        {"month": month, "transaction_type": txn_type, "count": count, "amount": amount}
+        for (month, txn_type), (count, amount) in sorted(groups.items())
+    ]
+
+class TransactionRollupDAO:
+    def __init__(self):
+        self._sb = get_supabase()
+
+    def _iter_transactions(self, after_id: int, page_size: int, upto_id: Optional[int] = None):
+        columns = "transaction_id,transaction_type,amount,transaction_date"
+
+        def query():
+            q = self._sb.table("bm_transactions").select(columns).gt("transaction_id", after_id)
+            return q.lte("transaction_id", upto_id) if upto_id is not None else q
+        return iter_keyset(query, "transaction_id", page_size)
+
+    def get_high_water_mark(self) -> int:
+        resp = self._sb.table("bm_rollup_state").select("high_water_mark").eq("name", ROLLUP_NAME).limit(1).execute()
+        return resp.data[0]["high_water_mark"] if resp.data else 0
+
+    def get_rollup(self) -> List[Dict]:
+        resp = self._sb.table("bm_transaction_rollup_monthly").select("*").order("month").order("transaction_type").execute()
+        return resp.data or []
+
+    def refresh(self, page_size: int = DEFAULT_PAGE_SIZE, lag_seconds: Optional[float] = None) -> Dict:
+        # Fold transactions above the high-water mark into the rollup, stopping at
+        # the first one younger than BM_ROLLUP_LAG_SECONDS (see _settled); the
+        # rest are folded by a later refresh
+        lag = get_rollup_lag_seconds() if lag_seconds is None else lag_seconds
+        try:
+            hwm = self.get_high_water_mark()
+            groups, seen, max_id = _aggregate(_settled(self._iter_transactions(hwm, page_size), lag))
+            if not seen:
+                return {"applied": False, "new_transactions": 0, "high_water_mark": hwm}
+            resp = self._sb.rpc("bm_apply_rollup_delta", {
+                "p_name": ROLLUP_NAME, "p_old_hwm": hwm, "p_new_hwm": max_id, "p_deltas": _deltas(groups), "p_reset": False,
+            }).execute()
+        except Exception as e:
+            raise TransactionRollupDAOError(f"Failed to refresh monthly rollup: {e}")
+        # applied is False when a concurrent refresh already covered these rows
+        return {"applied": resp.data["applied"], "new_transactions": seen, "high_water_mark": resp.data["high_water_mark"]}
+
+    def rebuild(self, page_size: int = DEFAULT_PAGE_SIZE, lag_seconds: Optional[float] = None) -> Dict:
+        lag = get_rollup_lag_seconds() if lag_seconds is None else lag_seconds
+        try:
+            groups, seen, max_id = _aggregate(_settled(self._iter_transactions(0, page_size), lag))
+            resp = self._sb.rpc("bm_apply_rollup_delta", {
+                "p_name": ROLLUP_NAME, "p_old_hwm": 0, "p_new_hwm": max_id, "p_deltas": _deltas(groups), "p_reset": True,
+            }).execute()
+        except Exception as e:
+            raise TransactionRollupDAOError(f"Failed to rebuild monthly rollup: {e}")
+        return {"applied": resp.data["applied"], "new_transactions": seen, "high_water_mark": max_id}
+
+    def verify(self, page_size: int = DEFAULT_PAGE_SIZE) -> Dict:
+        # Full recompute up to the high-water mark, compared with the stored rollup
+        try:
+            hwm = self.get_high_water_mark()
+            expected, _, _ = _aggregate(self._iter_transactions(0, page_size, upto_id=hwm))
+            stored = {(r["month"], r["transaction_type"]): [r["txn_count"], r["total_amount"]] for r in self.get_rollup()}
+        except Exception as e:
+            raise TransactionRollupDAOError(f"Failed to verify monthly rollup: {e}")
+        mismatches = []
+        for key in sorted(set(expected) | set(stored)):
+            want = expected.get(key, [0, 0.0])
+            got = stored.get(key, [0, 0.0])
+            if want[0] != got[0] or abs(float(want[1]) - float(got[1])) > 1e-6:
+                mismatches.append({"month": key[0], "transaction_type": key[1], "expected": want, "stored": got})
+        return {"ok": not mismatches, "high_water_mark": hwm, "mismatches": mismatches}
@@ -0,0 +1,289 @@
+# dao/bm_velocity.py
+# Velocity limits on postings, e.g. "at most 10 withdrawals or 5000 in total per
+# rolling 24h", per account or per customer. Rules come from BM_VELOCITY_RULES:
+#
+#   [{"scope": "account", "type": "WITHDRAW", "max_count": 10, "max_amount": 5000},
+#    {"scope": "customer", "max_amount": 20000, "window_hours": 24, "name": "customer daily"}]
+#
+# scope is "account" or "customer"; type is "DEPOSIT" or "WITHDRAW" (omitted: both).
+# Rules apply to ledger legs as bm_transactions stores them, so a transfer is a
+# WITHDRAW on the source account and a DEPOSIT on the destination.
+#
+# Checks run against in-memory sliding-window counters, so a posting costs no
+# extra round trip. The counters are rebuilt from bm_transactions the first
+# time a TransactionDAO is built in the process; they only see postings made
+# through this process from then on.
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from src.dao.bm_pagination import DEFAULT_PAGE_SIZE, iter_keyset
+
+DEFAULT_WINDOW_HOURS = 24
+SCOPES = ("account", "customer")
+TYPES = ("DEPOSIT", "WITHDRAW")
+# Counter resolution: a posting leaves the window up to this many seconds late
+BUCKET_SECONDS = 60
+# Account -> customer lookups per request when the owner isn't known yet
+LOOKUP_SIZE = 500
+
+logger = logging.getLogger("bm.velocity")
+
+class VelocityLimitError(Exception):
+    pass
+
+
+class VelocityRule:
+    __slots__ = ("name", "scope", "txn_type", "max_count", "max_amount", "window_hours")
+
+    def __init__(self, scope: str, txn_type: Optional[str] = None, max_count: Optional[int] = None,
+                 max_amount: Optional[float] = None, window_hours: float = DEFAULT_WINDOW_HOURS,
+                 name: Optional[str] = None):
+        self.scope = scope
+        self.txn_type = txn_type
+        self.max_count = max_count
+        self.max_amount = max_amount
+        self.window_hours = window_hours
+        self.name = name or self.describe()
+
+    @property
+    def buckets(self) -> int:
+        return max(int(self.window_hours * 3600 // BUCKET_SECONDS), 1)
+
+    def describe(self) -> str:
+        limits = [f"{self.max_count} {(self.txn_type or 'posting').lower()}s" if self.max_count is not None else None,
+                  f"{self.max_amount:g} in total" if self.max_amount is not None else None]
+        return f"{self.scope}: at most {' or '.join(l for l in limits if l)} per {self.window_hours:g}h"
+
+def parse_rules(raw) -> List[VelocityRule]:
+    # raw: decoded BM_VELOCITY_RULES; raises ValueError with the reason
+    if not isinstance(raw, list):
+        raise ValueError("expected a list of rules")
+    rules = []
+    for i, spec in enumerate(raw):
+        if not isinstance(spec, dict):
+            raise ValueError(f"rule {i} is not an object")
+        scope = str(spec.get("scope", "")).lower()
+        if scope not in SCOPES:
+            raise ValueError(f"rule {i}: scope must be one of {', '.join(SCOPES)}")
+        txn_type = spec.get("type")
+        if txn_type is not None and str(txn_type).upper() not in TYPES:
+            raise ValueError(f"rule {i}: type must be one of {', '.join(TYPES)}")
+        try:
+            max_count = int(spec["max_count"]) if spec.get("max_count") is not None else None
+            max_amount = float(spec["max_amount"]) if spec.get("max_amount") is not None else None
+            window_hours = float(spec.get("window_hours") or DEFAULT_WINDOW_HOURS)
+        except (TypeError, ValueError):
+            raise ValueError(f"rule {i}: max_count, max_amount and window_hours must be numbers")
+        if max_count is None and max_amount is None:
+            raise ValueError(f"rule {i}: needs max_count or max_amount")
+        if window_hours <= 0:
+            raise ValueError(f"rule {i}: window_hours must be positive")
+        rules.append(VelocityRule(scope, str(txn_type).upper() if txn_type else None, max_count, max_amount,
+                                  window_hours, spec.get("name")))
+    return rules
+
+def _bucket(ts: Optional[float] = None) -> int:
+    return int((time.time() if ts is None else ts) // BUCKET_SECONDS)
+
+def _parse_ts(value: str) -> float:
+    ts = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return (ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts).timestamp()
+
+
+class _Window:
+    # One counter: a queue of [bucket, count, amount] oldest first plus the
+    # running totals, so a check is O(1) once expired buckets are dropped
+    __slots__ = ("slots", "count", "amount")
+
+    def __init__(self):
+        self.slots = deque()
+        self.count = 0
+        self.amount = 0.0
+
+    def expire(self, oldest: int):
+        while self.slots and self.slots[0][0] < oldest:
+            _, count, amount = self.slots.popleft()
+            self.count -= count
+            self.amount -= amount
+
+    def add(self, bucket: int, count: int, amount: float):
+        if self.slots and self.slots[-1][0] == bucket:
+            self.slots[-1][1] += count
+            self.slots[-1][2] += amount
+        elif not self.slots or self.slots[-1][0] < bucket:
+            self.slots.append([bucket, count, amount])
+        else:
+            # Rebuilt rows come in id order, which can trail the dates slightly
+            slot = next((s for s in self.slots if s[0] == bucket), None)
+            if slot is None:
+                self.slots = deque(sorted([*self.slots, [bucket, count, amount]], key=lambda s: s[0]))
+            else:
+                slot[1] += count
+                slot[2] += amount
+        self.count += count
+        self.amount += amount
+
+
+class VelocityLimiter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self.rules: List[VelocityRule] = []
+        self._loaded = False
+        # (rule index, account or customer id) -> counter
+        self._windows: Dict[Tuple[int, int], _Window] = {}
+        # account_id -> customer_id, for customer-scope rules
+        self._owners: Dict[int, int] = {}
+        self._stats = {"checks": 0, "hits": 0, "rebuilt_rows": 0, "owner_lookups": 0}
+        self._hits: Dict[str, int] = {}
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def ensure_loaded(self, rules: List[VelocityRule], client):
+        # First call in the process installs the rules and rebuilds the counters
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            if rules:
+                self._rebuild(rules, client)
+            self.rules = rules
+            self._loaded = True
+
+    def _rebuild(self, rules: List[VelocityRule], client):
+        now = time.time()
+        since = datetime.fromtimestamp(now - max(r.window_hours for r in rules) * 3600, timezone.utc).isoformat()
+        if any(r.scope == "customer" for r in rules):
+            accounts = iter_keyset(lambda: client.table("bm_accounts").select("account_id,customer_id"), "account_id")
+            self._owners.update({a["account_id"]: a["customer_id"] for a in accounts})
+        rows = iter_keyset(
+            lambda: client.table("bm_transactions").select("transaction_id,account_id,transaction_type,amount,transaction_date")
+            .gte("transaction_date", since),
+            "transaction_id", DEFAULT_PAGE_SIZE,
+        )
+        current = _bucket(now)
+        count = 0
+        for row in rows:
+            if not row.get("transaction_date"):
+                continue
+            bucket = _bucket(_parse_ts(row["transaction_date"]))
+            for index, key, rule in self._matches(rules, row["account_id"], row["transaction_type"]):
+                if bucket > current - rule.buckets:
+                    self._windows.setdefault(key, _Window()).add(bucket, 1, float(row.get("amount") or 0))
+            count += 1
+        self._stats["rebuilt_rows"] = count
+
+    def _matches(self, rules: List[VelocityRule], account_id: int, txn_type: str):
+        for index, rule in enumerate(rules):
+            if rule.txn_type is not None and rule.txn_type != txn_type:
+                continue
+            scope_id = account_id if rule.scope == "account" else self._owners.get(account_id)
+            if scope_id is not None:
+                yield index, (index, scope_id), rule
+
+    def note_account(self, account_id: int, customer_id: int):
+        # Called when an account is opened, so its first posting needs no owner lookup
+        self._owners[account_id] = customer_id
+
+    def missing_owners(self, account_ids: Iterable[int]) -> List[int]:
+        # Accounts whose owner customer-scope rules need but don't know yet; only
+        # accounts opened by another process since start-up miss here
+        if not any(r.scope == "customer" for r in self.rules):
+            return []
+        return sorted({a for a in account_ids if a not in self._owners})
+
+    def add_owners(self, rows: List[Dict]):
+        # rows: [{"account_id", "customer_id"}, ...] from one owner lookup
+        self._owners.update({r["account_id"]: r["customer_id"] for r in rows})
+        with self._lock:
+            self._stats["owner_lookups"] += 1
+
+    def resolve_owners(self, account_ids: Iterable[int], client):
+        missing = self.missing_owners(account_ids)
+        for start in range(0, len(missing), LOOKUP_SIZE):
+            resp = client.table("bm_accounts").select("account_id,customer_id") \
+                .in_("account_id", missing[start:start + LOOKUP_SIZE]).execute()
+            self.add_owners(resp.data or [])
+
+    def reserve(self, legs: List[Tuple[int, str, float]]) -> Optional[List[tuple]]:
+        # legs: (account_id, transaction_type, amount). Counts them against every
+        # matching rule, or raises VelocityLimitError and counts nothing.
+        # Returns a token for release() if the posting then fails.
+        if not self.rules:
+            return None
+        bucket = _bucket()
+        pending: Dict[Tuple[int, int], List] = {}
+        for account_id, txn_type, amount in legs:
+            for index, key, rule in self._matches(self.rules, account_id, txn_type):
+                entry = pending.setdefault(key, [rule, 0, 0.0])
+                entry[1] += 1
+                entry[2] += amount
+        with self._lock:
+            self._stats["checks"] += 1
+            windows = []
+            for key, (rule, count, amount) in pending.items():
+                window = self._windows.setdefault(key, _Window())
+                window.expire(bucket - rule.buckets + 1)
+                if (rule.max_count is not None and window.count + count > rule.max_count) or \
+                        (rule.max_amount is not None and window.amount + amount > rule.max_amount + 1e-9):
+                    self._stats["hits"] += 1
+                    self._hits[rule.name] = self._hits.get(rule.name, 0) + 1
+                    logger.warning("Velocity rule hit: %s [%s %d: %d postings, %.2f in window; this posting %d, %.2f]",
+                                   rule.name, rule.scope, key[1], window.count, window.amount, count, amount)
+                    raise VelocityLimitError(f"Velocity limit exceeded ({rule.name})")
+                windows.append((window, count, amount))
+            for window, count, amount in windows:
+                window.add(bucket, count, amount)
+        return [(window, bucket, count, amount) for window, count, amount in windows]
+
+    def release(self, token):
+        # Undo a reservation whose posting failed
+        if not token:
+            return
+        with self._lock:
+            for window, bucket, count, amount in token:
+                slot = next((s for s in reversed(window.slots) if s[0] == bucket), None)
+                if slot is None:
+                    continue
+                slot[1] -= count
+                slot[2] -= amount
+                window.count -= count
+                window.amount -= amount
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self._stats,
+                "rules": [r.name for r in self.rules],
+                "hits_by_rule": dict(self._hits),
+                "counters": len(self._windows),
+            }
+
+    def reset(self):
+        # Forget rules and counters; the next TransactionDAO reloads them (tests, benchmarks)
+        with self._load_lock, self._lock:
+            self.rules = []
+            self._loaded = False
+            self._windows.clear()
+            self._owners.clear()
+            self._hits.clear()
+            for k in self._stats:
+                self._stats[k] = 0
+
+
+_limiter = VelocityLimiter()
+
+def get_velocity_limiter() -> VelocityLimiter:
+    return _limiter
+
+def get_velocity_stats() -> Dict:
+    return _limiter.stats()
+
+def reset_velocity_limits():
+    _limiter.reset()
@@ -1,6 +1,8 @@
 # service/bm_account_service.py
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Union
 from src.dao.bm_account_dao import AccountDAO, AccountDAOError
+from src.dao.bm_pagination import DEFAULT_PAGE_SIZE
+from src.dao.bm_records import ColumnarResult
 
 class AccountServiceError(Exception):
     pass
@@ -15,20 +17,32 @@ class AccountService:
         except AccountDAOError as e:
             raise AccountServiceError(str(e))
 
+    def bulk_open_accounts(self, rows: List[Dict]) -> List[Dict]:
+        try:
+            return self.dao.bulk_open_accounts(rows)
+        except AccountDAOError as e:
+            raise AccountServiceError(str(e))
+
     def close_account(self, account_id: int) -> Optional[Dict]:
         try:
             return self.dao.close_account(account_id)
         except AccountDAOError as e:
             raise AccountServiceError(str(e))
 
-    def list_accounts(self, customer_id: int) -> List[Dict]:
+    def list_accounts(self, customer_id: int, columns: str = "*", compact: bool = False) -> Union[List[Dict], ColumnarResult]:
         try:
-            return self.dao.list_accounts_by_customer(customer_id)
+            return self.dao.list_accounts_by_customer(customer_id, columns, compact)
         except AccountDAOError as e:
             raise AccountServiceError(str(e))
     
-    def list_all_accounts(self) -> list:
+    def list_all_accounts(self, columns: str = "*", compact: bool = False) -> Union[list, ColumnarResult]:
+        try:
+            return self.dao.list_all_accounts(columns, compact)
+        except AccountDAOError as e:
+            raise AccountServiceError(str(e))
+
+    def iter_all_accounts(self, page_size: int = DEFAULT_PAGE_SIZE, prefetch: bool = False, columns: str = "*") -> Iterator[Dict]:
         try:
-            return self.dao.list_all_accounts()
+            yield from self.dao.iter_all_accounts(page_size, prefetch, columns)
         except AccountDAOError as e:
             raise AccountServiceError(str(e))
\ No newline at end of file
@@ -0,0 +1,124 @@
+# service/bm_amortization.py
+# EMI amortization schedules computed with NumPy over arrays of loans. Every
+# (loan, period) cell comes from the closed form of the reducing balance, so
+# there is no Python loop per installment:
+#   i = annual rate / 12 / 100, EMI = P * i * (1+i)^n / ((1+i)^n - 1)
+#   balance after k payments = P * (1+i)^k - EMI * ((1+i)^k - 1) / i
+# The EMI is charged rounded down to the cent (rounding up could pay a loan off
+# early) and the final installment settles the rest, so paying every row of a
+# schedule closes the loan under sql/009_loan_outstanding.sql.
+from typing import Dict, Iterable, List
+import numpy as np
+from src.dao.bm_loan_dao import DEFAULT_TENURE_MONTHS
+
+def _as_arrays(principals, annual_rates, months):
+    principal = np.asarray(principals, dtype=np.float64)
+    rate = np.asarray(annual_rates, dtype=np.float64) / 1200.0
+    tenure = np.asarray(months, dtype=np.int64)
+    if principal.shape != rate.shape or principal.shape != tenure.shape:
+        raise ValueError("principals, annual_rates and months must have the same length")
+    if (principal <= 0).any() or (rate < 0).any() or (tenure <= 0).any():
+        raise ValueError("Principal and tenure must be positive and rates non-negative")
+    return principal, rate, tenure
+
+def emi(principals, annual_rates, months) -> np.ndarray:
+    # Monthly installment per loan; zero-rate loans repay principal evenly
+    principal, rate, tenure = _as_arrays(principals, annual_rates, months)
+    growth = np.power(1.0 + rate, tenure)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payment = principal * rate * growth / (growth - 1.0)
+    return np.where(rate > 0, payment, principal / tenure)
+
+def installment(principals, annual_rates, months) -> np.ndarray:
+    # EMI as charged: rounded down to the cent
+    return np.floor(np.round(emi(principals, annual_rates, months) * 100.0, 6)) / 100.0
+
+def _grid(principal: np.ndarray, rate: np.ndarray, tenure: np.ndarray):
+    # (loans, max tenure) grids of interest, principal and closing balance per
+    # period, plus the mask of periods within each loan's tenure
+    payment = installment(principal, rate * 1200.0, tenure)
+    periods = np.arange(0, int(tenure.max()) + 1)
+    # Outstanding balance after k payments, column 0 = principal
+    growth = np.power(1.0 + rate[:, None], periods[None, :])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        accrued = np.where(rate[:, None] > 0, (growth - 1.0) / rate[:, None], periods[None, :])
+    balance = np.clip(principal[:, None] * growth - payment[:, None] * accrued, 0.0, None)
+    interest = balance[:, :-1] * rate[:, None]
+    principal_paid = balance[:, :-1] - balance[:, 1:]
+    # The final installment pays off whatever the rounded EMI left, so each loan ends at exactly zero
+    rows = np.arange(len(principal))
+    principal_paid[rows, tenure - 1] = balance[rows, tenure - 1]
+    balance[rows, tenure] = 0.0
+    mask = periods[None, 1:] <= tenure[:, None]
+    return interest, principal_paid, balance[:, 1:], mask
+
+def amortize(principals, annual_rates, months) -> Dict[str, np.ndarray]:
+    # Flat schedule columns for all loans: loan (index into the inputs), period
+    # (1-based), payment, interest, principal and balance (outstanding after it)
+    principal, rate, tenure = _as_arrays(principals, annual_rates, months)
+    if not len(principal):
+        return {k: np.empty(0) for k in ("loan", "period", "payment", "interest", "principal", "balance")}
+    interest, principal_paid, balance, mask = _grid(principal, rate, tenure)
+    loan_idx, col = np.nonzero(mask)
+    return {
+        "loan": loan_idx,
+        "period": col + 1,
+        "payment": interest[loan_idx, col] + principal_paid[loan_idx, col],
+        "interest": interest[loan_idx, col],
+        "principal": principal_paid[loan_idx, col],
+        "balance": balance[loan_idx, col],
+    }
+
+def due_months(start_dates: Iterable[str], loan_idx: np.ndarray, period: np.ndarray) -> np.ndarray:
+    # "YYYY-MM" due month of each installment: the month after the loan's start month, onwards
+    starts = np.array([str(d or "")[:7] or "1970-01" for d in start_dates], dtype="datetime64[M]")
+    return (starts[loan_idx] + period.astype("timedelta64[M]")).astype(str)
+
+def schedule_rows(loans: List[Dict]) -> List[Dict]:
+    # Row-per-installment schedule for bm_loans rows (amount, interest_rate, tenure_months, created_at)
+    if not loans:
+        return []
+    columns = amortize(
+        [l["amount"] for l in loans],
+        [l.get("interest_rate") or 0 for l in loans],
+        [l.get("tenure_months") or DEFAULT_TENURE_MONTHS for l in loans],
+    )
+    due = due_months([l.get("created_at") for l in loans], columns["loan"], columns["period"])
+    loan_ids = np.array([l["loan_id"] for l in loans])[columns["loan"]]
+    return [
+        {
+            "loan_id": int(loan_id),
+            "period": int(p),
+            "due_month": str(d),
+            "payment": round(float(pay), 2),
+            "interest": round(float(i), 2),
+            "principal": round(float(pr), 2),
+            "balance": round(float(b), 2),
+        }
+        for loan_id, p, d, pay, i, pr, b in zip(
+            loan_ids, columns["period"], due, columns["payment"], columns["interest"], columns["principal"], columns["balance"]
+        )
+    ]
+
+def summary_rows(loans: List[Dict]) -> List[Dict]:
+    # One row per loan: installment, tenure and lifetime interest/payment totals
+    if not loans:
+        return []
+    principal, rate, tenure = _as_arrays(
+        [l["amount"] for l in loans],
+        [l.get("interest_rate") or 0 for l in loans],
+        [l.get("tenure_months") or DEFAULT_TENURE_MONTHS for l in loans],
+    )
+    interest, _, _, mask = _grid(principal, rate, tenure)
+    total_interest = np.where(mask, interest, 0.0).sum(axis=1)
+    charged = installment(principal, rate * 1200.0, tenure)
+    return [
+        {
+            "loan_id": l["loan_id"],
+            "tenure_months": int(n),
+            "emi": round(float(e), 2),
+            "total_interest": round(float(i), 2),
+            "total_payment": round(float(p + i), 2),
+        }
+        for l, n, e, i, p in zip(loans, tenure, charged, total_interest, principal)
+    ]
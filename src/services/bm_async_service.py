@@ -0,0 +1,225 @@
+# service/bm_async_service.py
+# Async counterparts of the services. Independent queries are awaited together
+# through gather_bounded(), so a multi-entity view costs roughly its slowest
+# query instead of the sum of all of them.
+import asyncio
+from typing import Awaitable, Dict, List, Optional
+from src.config import get_async_concurrency
+from src.dao.bm_async_dao import (
+    AsyncAccountDAO, AsyncCustomerDAO, AsyncDashboardDAO, AsyncEmployeeDAO,
+    AsyncLoanDAO, AsyncLoanRepaymentDAO, AsyncTransactionDAO,
+)
+from src.dao.bm_account_dao import AccountDAOError
+from src.dao.bm_customer_dao import CustomerDAOError, DEFAULT_SEARCH_LIMIT
+from src.dao.bm_dashboard_dao import DashboardDAOError
+from src.dao.bm_employee_dao import EmployeeDAOError
+from src.dao.bm_loan_dao import DEFAULT_TENURE_MONTHS, LoanDAOError
+from src.dao.bm_loan_repayment_dao import LoanRepaymentDAOError
+from src.dao.bm_pagination import with_key
+from src.dao.bm_transaction_dao import TransactionDAOError
+from src.dao.bm_transaction_rollup_dao import TransactionRollupDAO, TransactionRollupDAOError
+from src.services.bm_account_service import AccountServiceError
+from src.services.bm_customer_service import CustomerServiceError
+from src.services.bm_dashboard_service import DashboardServiceError
+from src.services.bm_employee_service import EmployeeServiceError
+from src.services.bm_loan_service import LoanServiceError
+from src.services.bm_loan_repayment_service import LoanRepaymentServiceError
+from src.services.bm_transaction_service import TransactionServiceError
+
+async def gather_bounded(*aws: Awaitable, limit: Optional[int] = None) -> List:
+    # asyncio.gather with at most `limit` (default BM_ASYNC_CONCURRENCY) awaiting at once
+    semaphore = asyncio.Semaphore(limit or get_async_concurrency())
+
+    async def run(aw):
+        async with semaphore:
+            return await aw
+    return list(await asyncio.gather(*(run(aw) for aw in aws)))
+
+
+class AsyncCustomerService:
+    def __init__(self):
+        self.dao = AsyncCustomerDAO()
+        self.account_dao = AsyncAccountDAO()
+        self.loan_dao = AsyncLoanDAO()
+
+    async def create_customer(self, name: str, email: str, phone: Optional[str] = None, city: Optional[str] = None, address: Optional[str] = None) -> Dict:
+        try:
+            return await self.dao.create_customer(name, email, phone, city, address)
+        except CustomerDAOError as e:
+            raise CustomerServiceError(str(e))
+
+    async def get_customer(self, cust_id: int, columns: str = "*") -> Optional[Dict]:
+        return await self.dao.get_customer_by_id(cust_id, columns)
+
+    async def list_customers(self, limit: int = 100, columns: str = "*") -> List[Dict]:
+        return await self.dao.list_customers(limit, columns)
+
+    async def find_customers(self, query: str, match: str = "prefix", limit: int = DEFAULT_SEARCH_LIMIT, offset: int = 0, columns: str = "customer_id,name,email") -> List[Dict]:
+        try:
+            return await self.dao.find_customers(query, match, limit, offset, columns)
+        except CustomerDAOError as e:
+            raise CustomerServiceError(str(e))
+
+    async def get_customer_overview(self, cust_id: int) -> Dict:
+        # Customer, accounts and loans fetched concurrently
+        try:
+            customer, accounts, loans = await gather_bounded(
+                self.dao.get_customer_by_id(cust_id),
+                self.account_dao.list_accounts_by_customer(cust_id),
+                self.loan_dao.get_loans_by_customer(cust_id),
+            )
+        except (CustomerDAOError, AccountDAOError, LoanDAOError) as e:
+            raise CustomerServiceError(str(e))
+        return {"customer": customer, "accounts": accounts, "loans": loans}
+
+
+class AsyncAccountService:
+    def __init__(self):
+        self.dao = AsyncAccountDAO()
+
+    async def open_account(self, customer_id: int, account_type: str) -> Dict:
+        try:
+            return await self.dao.open_account(customer_id, account_type)
+        except AccountDAOError as e:
+            raise AccountServiceError(str(e))
+
+    async def close_account(self, account_id: int) -> Optional[Dict]:
+        try:
+            return await self.dao.close_account(account_id)
+        except AccountDAOError as e:
+            raise AccountServiceError(str(e))
+
+    async def list_accounts(self, customer_id: int, columns: str = "*") -> List[Dict]:
+        try:
+            return await self.dao.list_accounts_by_customer(customer_id, columns)
+        except AccountDAOError as e:
+            raise AccountServiceError(str(e))
+
+    async def list_all_accounts(self, columns: str = "*") -> List[Dict]:
+        try:
+            return await self.dao.list_all_accounts(columns)
+        except AccountDAOError as e:
+            raise AccountServiceError(str(e))
+
+
+class AsyncTransactionService:
+    def __init__(self):
+        self.dao = AsyncTransactionDAO()
+
+    async def deposit(self, account_id: int, amount: float) -> Dict:
+        try:
+            return await self.dao.deposit(account_id, amount)
+        except TransactionDAOError as e:
+            raise TransactionServiceError(str(e))
+
+    async def withdraw(self, account_id: int, amount: float) -> Dict:
+        try:
+            return await self.dao.withdraw(account_id, amount)
+        except TransactionDAOError as e:
+            raise TransactionServiceError(str(e))
+
+    async def transfer(self, from_account_id: int, to_account_id: int, amount: float) -> Dict:
+        try:
+            return await self.dao.transfer(from_account_id, to_account_id, amount)
+        except TransactionDAOError as e:
+            raise TransactionServiceError(str(e))
+
+    async def get_transaction_history(self, account_id: int, columns: str = "*") -> List[Dict]:
+        return await self.dao.get_transactions_by_account(account_id, columns)
+
+    async def get_histories(self, account_ids: List[int], columns: str = "*") -> Dict[int, List[Dict]]:
+        # Several accounts' histories fetched concurrently
+        histories = await gather_bounded(*(self.dao.get_transactions_by_account(a, columns) for a in account_ids))
+        return dict(zip(account_ids, histories))
+
+
+class AsyncLoanService:
+    def __init__(self):
+        self.dao = AsyncLoanDAO()
+
+    async def apply_for_loan(self, customer_id: int, loan_type: str, amount: float, interest_rate: float,
+                             tenure_months: int = DEFAULT_TENURE_MONTHS) -> Dict:
+        try:
+            return await self.dao.apply_loan(customer_id, loan_type, amount, interest_rate, tenure_months)
+        except LoanDAOError as e:
+            raise LoanServiceError(str(e))
+
+    async def get_loan_status(self, loan_id: int, columns: str = "*") -> Dict:
+        return await self.dao.get_loan_by_id(loan_id, columns)
+
+    async def get_loan_status_by_customer(self, customer_id: int, columns: str = "*") -> List[Dict]:
+        return await self.dao.get_loans_by_customer(customer_id, columns)
+
+    async def get_all_loans(self, columns: str = "*") -> List[Dict]:
+        try:
+            return await self.dao.get_all_loans(columns)
+        except LoanDAOError as e:
+            raise LoanServiceError(str(e))
+
+
+class AsyncLoanRepaymentService:
+    def __init__(self):
+        self.dao = AsyncLoanRepaymentDAO()
+        self.loan_dao = AsyncLoanDAO()
+
+    async def make_repayment(self, loan_id: int, amount: float, payment_date: Optional[str] = None) -> Dict:
+        try:
+            return await self.dao.create_repayment(loan_id, amount, payment_date)
+        except LoanRepaymentDAOError as e:
+            raise LoanRepaymentServiceError(str(e))
+
+    async def list_repayments_for_loan(self, loan_id: int, columns: str = "*") -> List[Dict]:
+        return await self.dao.get_repayments_by_loan(loan_id, columns)
+
+    async def list_all_repayments(self, columns: str = "*") -> List[Dict]:
+        try:
+            return await self.dao.list_all_repayments(columns)
+        except LoanRepaymentDAOError as e:
+            raise LoanRepaymentServiceError(str(e))
+
+    async def get_customer_repayments(self, customer_id: int, loan_columns: str = "*", repayment_columns: str = "*") -> Dict:
+        # Customer's loans, then every loan's repayments concurrently
+        try:
+            loans = await self.loan_dao.get_loans_by_customer(customer_id, with_key(loan_columns, "loan_id"))
+            repayments = await gather_bounded(*(self.dao.get_repayments_by_loan(l["loan_id"], repayment_columns) for l in loans))
+        except (LoanDAOError, LoanRepaymentDAOError) as e:
+            raise LoanRepaymentServiceError(str(e))
+        return {"loans": loans, "repayments": {l["loan_id"]: r for l, r in zip(loans, repayments)}}
+
+
+class AsyncEmployeeService:
+    def __init__(self):
+        self.dao = AsyncEmployeeDAO()
+
+    async def list_employees(self, limit=100, columns: str = "*") -> List[Dict]:
+        try:
+            return await self.dao.list_employees(limit, columns)
+        except EmployeeDAOError as e:
+            raise EmployeeServiceError(str(e))
+
+
+class AsyncDashboardService:
+    def __init__(self):
+        self.dao = AsyncDashboardDAO()
+        self.rollup_dao = TransactionRollupDAO()
+
+    async def get_summary(self, refresh_rollup: bool = True) -> Dict:
+        try:
+            if refresh_rollup:
+                # Multi-step read-modify-write; runs on the sync DAO in a worker thread
+                await asyncio.to_thread(self.rollup_dao.refresh)
+            return await self.dao.get_summary()
+        except (DashboardDAOError, TransactionRollupDAOError) as e:
+            raise DashboardServiceError(str(e))
+
+    async def load_dashboard(self, preview_table: Optional[str] = None, refresh_rollup: bool = True,
+                             preview_columns: str = "*") -> Dict:
+        # Summary and raw-data preview fetched concurrently
+        try:
+            calls = [self.get_summary(refresh_rollup)]
+            if preview_table:
+                calls.append(self.dao.preview_table(preview_table, columns=preview_columns))
+            results = await gather_bounded(*calls)
+        except DashboardDAOError as e:
+            raise DashboardServiceError(str(e))
+        return {"summary": results[0], "preview": results[1] if preview_table else None}
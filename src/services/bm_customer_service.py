@@ -1,5 +1,6 @@
-from typing import Optional, List, Dict
-from src.dao.bm_customer_dao import CustomerDAO, CustomerDAOError
+from typing import Optional, List, Dict, Set, Union
+from src.dao.bm_customer_dao import CustomerDAO, CustomerDAOError, DEFAULT_SEARCH_LIMIT
+from src.dao.bm_records import ColumnarResult, CustomerRecord
 
 
 class CustomerServiceError(Exception):
@@ -15,8 +16,20 @@ class CustomerService:
         except CustomerDAOError as e:
             raise CustomerServiceError(str(e))
 
-    def get_customer(self, cust_id: int) -> Optional[Dict]:
-        return self.dao.get_customer_by_id(cust_id)
+    def bulk_create_customers(self, rows: List[Dict]) -> List[Dict]:
+        try:
+            return self.dao.bulk_create_customers(rows)
+        except CustomerDAOError as e:
+            raise CustomerServiceError(str(e))
+
+    def existing_emails(self, emails: List[str]) -> Set[str]:
+        try:
+            return self.dao.existing_emails(emails)
+        except Exception as e:
+            raise CustomerServiceError(f"Failed to look up emails: {e}")
+
+    def get_customer(self, cust_id: int, columns: str = "*", compact: bool = False) -> Union[Dict, CustomerRecord, None]:
+        return self.dao.get_customer_by_id(cust_id, columns, compact)
 
     def update_customer(self, cust_id: int, phone: Optional[str] = None, city: Optional[str] = None, address: Optional[str] = None) -> Optional[Dict]:
         fields = {}
@@ -39,8 +52,14 @@ class CustomerService:
         except CustomerDAOError as e:
             raise CustomerServiceError(str(e))
 
-    def list_customers(self, limit: int = 100) -> List[Dict]:
-        return self.dao.list_customers(limit)
+    def list_customers(self, limit: int = 100, columns: str = "*", compact: bool = False) -> Union[List[Dict], ColumnarResult]:
+        return self.dao.list_customers(limit, columns, compact)
+
+    def search_customers(self, email: Optional[str] = None, city: Optional[str] = None, columns: str = "*") -> List[Dict]:
+        return self.dao.search_customers(email, city, columns)
 
-    def search_customers(self, email: Optional[str] = None, city: Optional[str] = None) -> List[Dict]:
-        return self.dao.search_customers(email, city)
\ No newline at end of file
+    def find_customers(self, query: str, match: str = "prefix", limit: int = DEFAULT_SEARCH_LIMIT, offset: int = 0, columns: str = "customer_id,name,email") -> List[Dict]:
+        try:
+            return self.dao.find_customers(query, match, limit, offset, columns)
+        except CustomerDAOError as e:
+            raise CustomerServiceError(str(e))
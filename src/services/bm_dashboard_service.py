@@ -0,0 +1,53 @@
+# service/bm_dashboard_service.py
+from typing import List, Dict
+from src.dao.bm_dashboard_dao import DashboardDAO, DashboardDAOError
+from src.dao.bm_transaction_rollup_dao import TransactionRollupDAO, TransactionRollupDAOError
+
+class DashboardServiceError(Exception):
+    pass
+
+class DashboardService:
+    def __init__(self):
+        self.dao = DashboardDAO()
+        self.rollup_dao = TransactionRollupDAO()
+
+    def get_summary(self, refresh_rollup: bool = True) -> Dict:
+        # The trend reads the monthly rollup; bring it up to date with new transactions first
+        try:
+            if refresh_rollup:
+                self.rollup_dao.refresh()
+            return self.dao.get_summary()
+        except (DashboardDAOError, TransactionRollupDAOError) as e:
+            raise DashboardServiceError(str(e))
+
+    def get_monthly_trend(self, refresh: bool = True) -> List[Dict]:
+        try:
+            if refresh:
+                self.rollup_dao.refresh()
+            return self.rollup_dao.get_rollup()
+        except TransactionRollupDAOError as e:
+            raise DashboardServiceError(str(e))
+
+    def refresh_monthly_rollup(self) -> Dict:
+        try:
+            return self.rollup_dao.refresh()
+        except TransactionRollupDAOError as e:
+            raise DashboardServiceError(str(e))
+
+    def rebuild_monthly_rollup(self) -> Dict:
+        try:
+            return self.rollup_dao.rebuild()
+        except TransactionRollupDAOError as e:
+            raise DashboardServiceError(str(e))
+
+    def verify_monthly_rollup(self) -> Dict:
+        try:
+            return self.rollup_dao.verify()
+        except TransactionRollupDAOError as e:
+            raise DashboardServiceError(str(e))
+
+    def preview_table(self, table: str, limit: int = 100, columns: str = "*") -> List[Dict]:
+        try:
+            return self.dao.preview_table(table, limit, columns)
+        except DashboardDAOError as e:
+            raise DashboardServiceError(str(e))
@@ -1,5 +1,6 @@
-from typing import List, Dict
+from typing import List, Dict, Union
 from src.dao.bm_employee_dao import EmployeeDAO, EmployeeDAOError
+from src.dao.bm_records import ColumnarResult
 
 class EmployeeServiceError(Exception):
     pass
@@ -8,9 +9,9 @@ class EmployeeService:
     def __init__(self):
         self.dao = EmployeeDAO()
 
-    def list_employees(self, limit=100) -> List[Dict]:
+    def list_employees(self, limit=100, columns: str = "*", compact: bool = False) -> Union[List[Dict], ColumnarResult]:
         try:
-            return self.dao.list_employees(limit)
+            return self.dao.list_employees(limit, columns, compact)
         except EmployeeDAOError as e:
             raise EmployeeServiceError(str(e))
 
@@ -1,6 +1,8 @@
 # service/bm_loan_repayment_service.py
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Union
 from src.dao.bm_loan_repayment_dao import LoanRepaymentDAO, LoanRepaymentDAOError
+from src.dao.bm_pagination import DEFAULT_PAGE_SIZE
+from src.dao.bm_records import ColumnarResult, RepaymentRecord
 
 class LoanRepaymentServiceError(Exception):
     pass
@@ -15,11 +17,11 @@ class LoanRepaymentService:
         except LoanRepaymentDAOError as e:
             raise LoanRepaymentServiceError(str(e))
 
-    def list_repayments_for_loan(self, loan_id: int) -> List[Dict]:
-        return self.dao.get_repayments_by_loan(loan_id)
+    def list_repayments_for_loan(self, loan_id: int, columns: str = "*", compact: bool = False) -> Union[List[Dict], ColumnarResult]:
+        return self.dao.get_repayments_by_loan(loan_id, columns, compact)
 
-    def get_repayment(self, repayment_id: int) -> Optional[Dict]:
-        return self.dao.get_repayment_by_id(repayment_id)
+    def get_repayment(self, repayment_id: int, columns: str = "*", compact: bool = False) -> Union[Dict, RepaymentRecord, None]:
+        return self.dao.get_repayment_by_id(repayment_id, columns, compact)
 
     def update_repayment_status(self, repayment_id: int, status: str) -> Optional[Dict]:
         try:
@@ -27,8 +29,14 @@ class LoanRepaymentService:
         except LoanRepaymentDAOError as e:
             raise LoanRepaymentServiceError(str(e))
         
-    def list_all_repayments(self) -> List[Dict]:
+    def list_all_repayments(self, columns: str = "*", compact: bool = False) -> Union[List[Dict], ColumnarResult]:
         try:
-            return self.dao.list_all_repayments()
+            return self.dao.list_all_repayments(columns, compact)
+        except LoanRepaymentDAOError as e:
+            raise LoanRepaymentServiceError(str(e))
+
+    def iter_all_repayments(self, page_size: int = DEFAULT_PAGE_SIZE, prefetch: bool = False, columns: str = "*") -> Iterator[Dict]:
+        try:
+            yield from self.dao.iter_all_repayments(page_size, prefetch, columns)
         except LoanRepaymentDAOError as e:
             raise LoanRepaymentServiceError(str(e))
\ No newline at end of file
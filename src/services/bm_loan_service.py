@@ -1,6 +1,14 @@
 # service/bm_loan_service.py
-from typing import List, Dict
-from src.dao.bm_loan_dao import LoanDAO, LoanDAOError
+from typing import Iterator, List, Dict, Union
+from src.dao.bm_loan_dao import DEFAULT_TENURE_MONTHS, LoanDAO, LoanDAOError
+from src.dao.bm_pagination import DEFAULT_PAGE_SIZE
+from src.dao.bm_records import ColumnarResult, LoanRecord
+from src.services.bm_amortization import schedule_rows, summary_rows
+
+# Loans amortized per NumPy pass when scheduling the whole portfolio
+AMORTIZATION_CHUNK_SIZE = 5000
+# Loan columns schedule_rows()/summary_rows() read
+AMORTIZATION_COLUMNS = "loan_id,amount,interest_rate,tenure_months,created_at"
 
 class LoanServiceError(Exception):
     pass
@@ -11,9 +19,10 @@ class LoanService:
         self.dao = LoanDAO()
 
     # apply for a loan
-    def apply_for_loan(self, customer_id: int, loan_type: str, amount: float, interest_rate: float) -> Dict:
+    def apply_for_loan(self, customer_id: int, loan_type: str, amount: float, interest_rate: float,
+                       tenure_months: int = DEFAULT_TENURE_MONTHS) -> Dict:
         try:
-            return self.dao.apply_loan(customer_id, loan_type, amount, interest_rate)
+            return self.dao.apply_loan(customer_id, loan_type, amount, interest_rate, tenure_months)
         except LoanDAOError as e:
             raise LoanServiceError(str(e))
         
@@ -24,17 +33,76 @@ class LoanService:
         except LoanDAOError as e:
             raise LoanServiceError(str(e))
         
+    # principal still owed on a loan, maintained on every repayment
+    def get_outstanding(self, loan_id: int) -> Dict:
+        loan = self.dao.get_outstanding(loan_id)
+        if not loan:
+            raise LoanServiceError("Loan not found")
+        return loan
+
+    # recompute outstanding balances from repayments; fix=True repairs mismatches
+    def reconcile_outstanding(self, fix: bool = False) -> Dict:
+        try:
+            return self.dao.reconcile_outstanding(fix)
+        except LoanDAOError as e:
+            raise LoanServiceError(str(e))
+
     # get loan by id
-    def get_loan_status(self, loan_id: int) -> Dict:
-        return self.dao.get_loan_by_id(loan_id)
+    def get_loan_status(self, loan_id: int, columns: str = "*", compact: bool = False) -> Union[Dict, LoanRecord, None]:
+        return self.dao.get_loan_by_id(loan_id, columns, compact)
 
     # get loans by customer
-    def get_loan_status_by_customer(self, customer_id: int) -> List[Dict]:
-        return self.dao.get_loans_by_customer(customer_id)
+    def get_loan_status_by_customer(self, customer_id: int, columns: str = "*", compact: bool = False) -> Union[List[Dict], ColumnarResult]:
+        return self.dao.get_loans_by_customer(customer_id, columns, compact)
     
     # get all loans
-    def get_all_loans(self) -> List[Dict]:
+    def get_all_loans(self, columns: str = "*", compact: bool = False) -> Union[List[Dict], ColumnarResult]:
+        try:
+            return self.dao.get_all_loans(columns, compact)
+        except LoanDAOError as e:
+            raise LoanServiceError(str(e))
+
+    # stream all loans page by page
+    def iter_all_loans(self, page_size: int = DEFAULT_PAGE_SIZE, prefetch: bool = False, columns: str = "*") -> Iterator[Dict]:
+        try:
+            yield from self.dao.iter_all_loans(page_size, prefetch, columns)
+        except LoanDAOError as e:
+            raise LoanServiceError(str(e))
+
+    # EMI schedule (period, due_month, payment, interest, principal, balance) of one loan
+    def get_amortization_schedule(self, loan_id: int) -> List[Dict]:
+        loan = self.dao.get_loan_by_id(loan_id, AMORTIZATION_COLUMNS)
+        if not loan:
+            raise LoanServiceError("Loan not found")
+        try:
+            return schedule_rows([loan])
+        except ValueError as e:
+            raise LoanServiceError(str(e))
+
+    # installment and lifetime totals for every loan, amortized in chunks of loans
+    def get_portfolio_amortization(self) -> List[Dict]:
+        try:
+            return [row for chunk in self._loan_chunks() for row in summary_rows(chunk)]
+        except ValueError as e:
+            raise LoanServiceError(str(e))
+
+    # full schedule of every loan, streamed one chunk of loans at a time
+    def iter_portfolio_schedule(self) -> Iterator[Dict]:
+        try:
+            for chunk in self._loan_chunks():
+                yield from schedule_rows(chunk)
+        except ValueError as e:
+            raise LoanServiceError(str(e))
+
+    def _loan_chunks(self) -> Iterator[List[Dict]]:
+        chunk = []
         try:
-            return self.dao.get_all_loans()
+            for loan in self.dao.iter_all_loans(columns=AMORTIZATION_COLUMNS):
+                chunk.append(loan)
+                if len(chunk) == AMORTIZATION_CHUNK_SIZE:
+                    yield chunk
+                    chunk = []
         except LoanDAOError as e:
-            raise LoanServiceError(str(e))
\ No newline at end of file
+            raise LoanServiceError(str(e))
+        if chunk:
+            yield chunk
@@ -0,0 +1,70 @@
+# service/bm_registry.py
+# Lazily built services for app.py and the CLI. A service module (and with it
+# the DAOs, the backend client, postgrest and NumPy) is imported the first time
+# the service is used, so a page or menu action only pays for what it touches.
+import importlib
+import threading
+from typing import Any, Dict
+
+# attribute name -> (module, class)
+SERVICES = {
+    "customer_service": ("src.services.bm_customer_service", "CustomerService"),
+    "account_service": ("src.services.bm_account_service", "AccountService"),
+    "transaction_service": ("src.services.bm_transaction_service", "TransactionService"),
+    "loan_service": ("src.services.bm_loan_service", "LoanService"),
+    "loan_repayment_service": ("src.services.bm_loan_repayment_service", "LoanRepaymentService"),
+    "employee_service": ("src.services.bm_employee_service", "EmployeeService"),
+    "dashboard_service": ("src.services.bm_dashboard_service", "DashboardService"),
+    "async_dashboard_service": ("src.services.bm_async_service", "AsyncDashboardService"),
+    "async_loan_repayment_service": ("src.services.bm_async_service", "AsyncLoanRepaymentService"),
+}
+
+# error class -> module defining it
+ERRORS = {
+    "CustomerServiceError": "src.services.bm_customer_service",
+    "AccountServiceError": "src.services.bm_account_service",
+    "TransactionServiceError": "src.services.bm_transaction_service",
+    "LoanServiceError": "src.services.bm_loan_service",
+    "LoanRepaymentServiceError": "src.services.bm_loan_repayment_service",
+    "EmployeeServiceError": "src.services.bm_employee_service",
+    "DashboardServiceError": "src.services.bm_dashboard_service",
+}
+
+
+class _LazyErrors:
+    # `except services.errors.CustomerServiceError` only resolves the class
+    # (importing its module) when an exception actually reaches the clause
+    def __getattr__(self, name: str):
+        module = ERRORS.get(name)
+        if module is None:
+            raise AttributeError(f"Unknown service error: {name}")
+        return getattr(importlib.import_module(module), name)
+
+
+class ServiceRegistry:
+    errors = _LazyErrors()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._instances: Dict[str, Any] = {}
+
+    def get(self, name: str):
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        if name not in SERVICES:
+            raise AttributeError(f"Unknown service: {name}")
+        module, cls = SERVICES[name]
+        with self._lock:
+            if name not in self._instances:
+                self._instances[name] = getattr(importlib.import_module(module), cls)()
+            return self._instances[name]
+
+    def __getattr__(self, name: str):
+        # Only called for names not found normally, i.e. the services
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self.get(name)
+
+    def built(self) -> list:
+        return sorted(self._instances)
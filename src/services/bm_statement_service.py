@@ -0,0 +1,153 @@
+# service/bm_statement_service.py
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Union
+import numpy as np
+from src.dao.bm_account_dao import AccountDAO, AccountDAOError
+from src.dao.bm_balance_checkpoint_dao import BalanceCheckpointDAO, BalanceCheckpointDAOError
+from src.dao.bm_transaction_dao import TransactionDAO, TransactionDAOError
+from src.services.bm_statement_writer import write_statements
+
+# Accounts whose transactions are fetched, computed and written per batch;
+# at most two batches are held in memory at once
+STATEMENT_CHUNK_SIZE = 500
+STATEMENT_FORMATS = ("csv", "json")
+
+DateLike = Union[str, date]
+
+class StatementServiceError(Exception):
+    pass
+
+def _day(value: DateLike) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value).strip())
+    except ValueError:
+        raise StatementServiceError(f"Invalid date: {value}")
+
+def _midnight(day: date) -> str:
+    return datetime.combine(day, dtime(0), tzinfo=timezone.utc).isoformat()
+
+def running_balances(rows: List[Dict], openings: Dict[int, float]):
+    # Sort a batch of transactions by (account, date, id) and compute every
+    # row's balance after it in one pass: opening + per-account cumulative sum.
+    # Returns (order, balances) where balances[k] belongs to rows[order[k]].
+    n = len(rows)
+    ids = np.fromiter((r["account_id"] for r in rows), dtype=np.int64, count=n)
+    txn_ids = np.fromiter((r["transaction_id"] for r in rows), dtype=np.int64, count=n)
+    dates = np.array([str(r.get("transaction_date") or "") for r in rows])
+    amounts = np.fromiter((r.get("amount") or 0 for r in rows), dtype=np.float64, count=n)
+    withdraw = np.fromiter((r.get("transaction_type") == "WITHDRAW" for r in rows), dtype=bool, count=n)
+    order = np.lexsort((txn_ids, dates, ids))
+    signed = np.where(withdraw, -amounts, amounts)[order]
+    sorted_ids = ids[order]
+    total = np.cumsum(signed)
+    starts = np.r_[0, np.flatnonzero(sorted_ids[1:] != sorted_ids[:-1]) + 1]
+    lengths = np.diff(np.r_[starts, n])
+    # Subtract the running total reached before each account's first row
+    before = np.repeat(total[starts] - signed[starts], lengths)
+    opening = np.repeat(np.array([openings.get(int(a), 0.0) for a in sorted_ids[starts]], dtype=np.float64), lengths)
+    return order, np.round(opening + total - before, 2)
+
+class StatementService:
+    def __init__(self):
+        self.account_dao = AccountDAO()
+        self.transaction_dao = TransactionDAO()
+        self.checkpoint_dao = BalanceCheckpointDAO()
+
+    def generate(self, start: DateLike, end: DateLike, out_dir: str, account_ids: Optional[List[int]] = None,
+                 fmt: str = "csv", workers: Optional[int] = None, chunk_size: int = STATEMENT_CHUNK_SIZE) -> Dict:
+        # One statement file per account for the days start..end inclusive.
+        # Opening balances come from one checkpoint-backed pass over all accounts
+        # (the replay since the checkpoint is streamed into per-account sums),
+        # transactions are streamed per batch of accounts, and files are written
+        # by a process pool (workers <= 1 writes in this process).
+        if fmt not in STATEMENT_FORMATS:
+            raise StatementServiceError(f"Unknown statement format: {fmt}")
+        first, last = _day(start), _day(end)
+        if last < first:
+            raise StatementServiceError("Statement end date is before its start date")
+        after, upto = _midnight(first), _midnight(last + timedelta(days=1))
+        os.makedirs(out_dir, exist_ok=True)
+        started = time.perf_counter()
+        try:
+            openings = {r["account_id"]: r["balance"] for r in self.checkpoint_dao.balances_as_of(after)}
+            if workers is None:
+                workers = os.cpu_count() or 1
+            pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+            files, transactions, pending = [], 0, []
+            try:
+                for accounts in self._account_batches(account_ids, chunk_size):
+                    jobs = self._build_batch(accounts, openings, after, upto, first, last, out_dir, fmt)
+                    transactions += sum(len(job[3]) for job in jobs)
+                    # Wait for the previous batch before queueing this one
+                    files += [path for f in pending for path in f.result()]
+                    if pool is None:
+                        files += write_statements(jobs)
+                        pending = []
+                    else:
+                        step = -(-len(jobs) // workers)
+                        pending = [pool.submit(write_statements, jobs[i:i + step]) for i in range(0, len(jobs), step)]
+                files += [path for f in pending for path in f.result()]
+            finally:
+                if pool is not None:
+                    pool.shutdown()
+        except (AccountDAOError, TransactionDAOError, BalanceCheckpointDAOError, OSError) as e:
+            raise StatementServiceError(f"Failed to generate statements: {e}")
+        seconds = time.perf_counter() - started
+        return {
+            "accounts": len(files),
+            "transactions": transactions,
+            "out_dir": out_dir,
+            "seconds": round(seconds, 3),
+            "statements_per_second": round(len(files) / seconds, 1) if seconds else 0.0,
+        }
+
+    def _account_batches(self, account_ids: Optional[List[int]], chunk_size: int) -> Iterator[List[Dict]]:
+        # Only the requested accounts are fetched when account_ids is given
+        accounts = self.account_dao.iter_all_accounts() if account_ids is None else self.account_dao.iter_accounts_by_ids(account_ids)
+        batch = []
+        for account in accounts:
+            batch.append(account)
+            if len(batch) == chunk_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _build_batch(self, accounts: List[Dict], openings: Dict[int, float], after: str, upto: str,
+                     first: date, last: date, out_dir: str, fmt: str) -> List[tuple]:
+        ids = [a["account_id"] for a in accounts]
+        rows = list(self.transaction_dao.iter_transactions_between(ids, after, upto))
+        by_account: Dict[int, list] = {a: [] for a in ids}
+        if rows:
+            order, balances = running_balances(rows, openings)
+            for k, balance in zip(order, balances):
+                r = rows[k]
+                by_account[r["account_id"]].append(
+                    (r["transaction_date"], r["transaction_id"], r["transaction_type"], r["amount"], float(balance))
+                )
+        jobs = []
+        for account in accounts:
+            account_id = account["account_id"]
+            lines = by_account[account_id]
+            opening = round(float(openings.get(account_id, 0.0)), 2)
+            header = {
+                "account_id": account_id,
+                "customer_id": account.get("customer_id"),
+                "account_type": account.get("account_type"),
+                "period_start": first.isoformat(),
+                "period_end": last.isoformat(),
+                "opening_balance": opening,
+                "closing_balance": lines[-1][4] if lines else opening,
+                "total_deposits": round(sum(l[3] for l in lines if l[2] == "DEPOSIT"), 2),
+                "total_withdrawals": round(sum(l[3] for l in lines if l[2] == "WITHDRAW"), 2),
+            }
+            path = os.path.join(out_dir, f"statement_{account_id}_{first.isoformat()}_{last.isoformat()}.{fmt}")
+            jobs.append((path, fmt, header, lines))
+        return jobs
@@ -0,0 +1,31 @@
+# service/bm_statement_writer.py
+# File writer run inside StatementService's worker processes. Kept free of
+# DAO/client imports so spawned workers start quickly.
+import csv
+import json
+from typing import Dict, List, Tuple
+
+COLUMNS = ("date", "transaction_id", "type", "amount", "balance")
+
+StatementRow = Tuple[str, int, str, float, float]
+
+def write_statement(path: str, fmt: str, header: Dict, rows: List[StatementRow]) -> str:
+    # header: account_id, customer_id, account_type, period_start, period_end,
+    # opening_balance, closing_balance, total_deposits, total_withdrawals
+    if fmt == "json":
+        # Render-ready table for a PDF/HTML template: metadata, columns, rows
+        table = {**header, "columns": list(COLUMNS), "rows": [list(r) for r in rows]}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(table, f)
+        return path
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        writer.writerow([header["period_start"], "", "OPENING BALANCE", "", header["opening_balance"]])
+        writer.writerows(rows)
+        writer.writerow([header["period_end"], "", "CLOSING BALANCE", "", header["closing_balance"]])
+    return path
+
+def write_statements(jobs: List[tuple]) -> List[str]:
+    # A slice of (path, fmt, header, rows) jobs per worker call, to amortise the pickling round trip
+    return [write_statement(*job) for job in jobs]
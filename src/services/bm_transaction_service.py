@@ -1,12 +1,43 @@
-from typing import List, Dict
-from src.dao.bm_transaction_dao import TransactionDAO, TransactionDAOError
+from datetime import date, datetime, time, timezone
+from typing import Iterator, List, Dict, Optional, Union
+import numpy as np
+from src.config import get_checkpoint_interval_days, get_posting_mode
+from src.dao.bm_balance_checkpoint_dao import BalanceCheckpointDAO, BalanceCheckpointDAOError, Timestamp
+from src.dao.bm_transaction_dao import (
+    HISTORY_COLUMNS, TransactionDAO, OptimisticTransactionDAO, TransactionDAOError, get_cas_stats,
+)
+from src.dao.bm_pagination import DEFAULT_PAGE_SIZE
+from src.dao.bm_records import ColumnarResult
+from src.dao.bm_velocity import get_velocity_stats
+
+# get_account_history(): rows per window unless the caller asks otherwise
+DEFAULT_HISTORY_LIMIT = 50
 
 class TransactionServiceError(Exception):
     pass
 
+def window_balances(rows: List[Dict], closing: float):
+    # rows newest first, closing = balance after rows[0]. Returns (balance after
+    # each row, balance before the last row) from one cumulative sum.
+    n = len(rows)
+    amounts = np.fromiter((r.get("amount") or 0 for r in rows), dtype=np.float64, count=n)
+    withdraw = np.fromiter((r.get("transaction_type") == "WITHDRAW" for r in rows), dtype=bool, count=n)
+    signed = np.where(withdraw, -amounts, amounts)
+    after = closing - (np.cumsum(signed) - signed)
+    return np.round(after, 2), round(closing - float(signed.sum()), 2)
+
+def _bound(value, end: bool) -> Optional[str]:
+    # Plain dates cover the whole day: midnight for a start, the last instant for an end
+    if value is None or isinstance(value, str):
+        return value
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, time.max if end else time.min)
+    return (value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)).isoformat()
+
 class TransactionService:
     def __init__(self):
-        self.dao = TransactionDAO()
+        self.dao = OptimisticTransactionDAO() if get_posting_mode() == "cas" else TransactionDAO()
+        self.checkpoint_dao = BalanceCheckpointDAO()
 
     def deposit(self, account_id: int, amount: float) -> Dict:
         try:
@@ -26,11 +57,98 @@ class TransactionService:
         except TransactionDAOError as e:
             raise TransactionServiceError(str(e))
 
-    def get_transaction_history(self, account_id: int) -> List[Dict]:
-        return self.dao.get_transactions_by_account(account_id)
+    # ops: [{"type": "deposit"|"withdraw", "account_id", "amount"} |
+    #       {"type": "transfer", "from_account_id", "to_account_id", "amount"}, ...]
+    def post_batch(self, ops: List[Dict]) -> Dict:
+        try:
+            return self.dao.post_batch(ops)
+        except TransactionDAOError as e:
+            raise TransactionServiceError(str(e))
+
+    def get_posting_stats(self) -> Dict:
+        # Version conflicts and retries seen by BM_POSTING_MODE=cas in this process
+        return get_cas_stats()
 
-    def get_all_transactions(self) -> List[Dict]:
+    def get_velocity_stats(self) -> Dict:
+        # Velocity rules (BM_VELOCITY_RULES) in force, checks and rule hits in this process
+        return get_velocity_stats()
+
+    def get_transaction_history(self, account_id: int, columns: str = "*", compact: bool = False) -> Union[List[Dict], ColumnarResult]:
+        return self.dao.get_transactions_by_account(account_id, columns, compact)
+
+    def get_account_history(self, account_id: int, cursor: Optional[Dict] = None, limit: int = DEFAULT_HISTORY_LIMIT,
+                            start: Union[str, date, None] = None, end: Union[str, date, None] = None,
+                            types: Optional[List[str]] = None, columns: str = HISTORY_COLUMNS) -> Dict:
+        # One window of the account's history, newest first:
+        #   {"rows": [... each with "balance" after it], "total": matching rows, "next_cursor": dict or None}
+        # Pass next_cursor back for the following (older) window. Balances are anchored
+        # on the current balance, or on the balance as of `end`, and carried in the
+        # cursor; with a type filter the window has gaps, so "balance" is None.
+        # A posting landing between the first window's two reads shows up on the next load.
+        if limit <= 0:
+            raise TransactionServiceError("limit must be positive")
+        start, end = _bound(start, False), _bound(end, True)
+        before = (cursor["transaction_date"], cursor["transaction_id"]) if cursor else None
         try:
-            return self.dao.get_all_transactions()
+            # One extra row tells whether an older window exists
+            rows, total = self.dao.get_account_history(account_id, limit + 1, before, start, end, types, columns)
+            if cursor:
+                closing, total = cursor.get("balance"), cursor.get("total")
+            elif types:
+                closing = None
+            elif end:
+                closing = self.checkpoint_dao.balance_as_of(account_id, end)["balance"]
+            else:
+                closing = self.dao.get_balance(account_id)
+        except (TransactionDAOError, BalanceCheckpointDAOError) as e:
+            raise TransactionServiceError(str(e))
+        more = len(rows) > limit
+        rows = rows[:limit]
+        opening = None
+        if closing is not None and rows:
+            balances, opening = window_balances(rows, closing)
+            for row, balance in zip(rows, balances.tolist()):
+                row["balance"] = balance
+        else:
+            for row in rows:
+                row["balance"] = None
+        next_cursor = None
+        if more:
+            last = rows[-1]
+            next_cursor = {"transaction_date": last["transaction_date"], "transaction_id": last["transaction_id"],
+                           "balance": opening, "total": total}
+        return {"rows": rows, "total": total, "next_cursor": next_cursor}
+
+    def get_all_transactions(self, columns: str = "*", compact: bool = False) -> Union[List[Dict], ColumnarResult]:
+        try:
+            return self.dao.get_all_transactions(columns, compact)
         except TransactionDAOError as e:
-            raise TransactionServiceError(str(e))
\ No newline at end of file
+            raise TransactionServiceError(str(e))
+
+    def iter_all_transactions(self, page_size: int = DEFAULT_PAGE_SIZE, prefetch: bool = False, columns: str = "*") -> Iterator[Dict]:
+        try:
+            yield from self.dao.iter_all_transactions(page_size, prefetch, columns)
+        except TransactionDAOError as e:
+            raise TransactionServiceError(str(e))
+
+    def create_checkpoints(self, until: Optional[Timestamp] = None) -> List[Dict]:
+        # Catch up on every BM_CHECKPOINT_INTERVAL_DAYS boundary since the last checkpoint
+        try:
+            return self.checkpoint_dao.create_due_checkpoints(get_checkpoint_interval_days(), until)
+        except BalanceCheckpointDAOError as e:
+            raise TransactionServiceError(str(e))
+
+    def list_checkpoints(self) -> List[Dict]:
+        return self.checkpoint_dao.list_checkpoints()
+
+    def balance_as_of(self, account_id: int, ts: Timestamp) -> Dict:
+        try:
+            return self.checkpoint_dao.balance_as_of(account_id, ts)
+        except BalanceCheckpointDAOError as e:
+            raise TransactionServiceError(str(e))
+
+    def balances_as_of(self, ts: Timestamp) -> List[Dict]:
+        try:
+            return self.checkpoint_dao.balances_as_of(ts)
+        except BalanceCheckpointDAOError as e:
+            raise TransactionServiceError(str(e))
@@ -0,0 +1,57 @@
+# tests/test_loan_repayments.py
+# Repayments against the EMI schedule on the SQLite stand-in, which mirrors
+# sql/009_loan_outstanding.sql.
+import pytest
+from src.config import close_supabase, set_supabase
+from src.dao.bm_sqlite_client import SQLiteClient
+from src.services.bm_customer_service import CustomerService
+from src.services.bm_loan_repayment_service import LoanRepaymentService, LoanRepaymentServiceError
+from src.services.bm_loan_service import LoanService
+
+@pytest.fixture
+def loans():
+    set_supabase(SQLiteClient())
+    customer = CustomerService().create_customer("Borrower", "borrower@example.com")
+    yield customer["customer_id"], LoanService(), LoanRepaymentService()
+    close_supabase()
+
+@pytest.mark.parametrize("amount, rate, months", [
+    (100000, 12, 12),
+    (127609.01, 7.25, 231),
+    (47020.41, 0, 200),
+    (2500, 24.99, 1),
+])
+def test_paying_the_schedule_closes_the_loan(loans, amount, rate, months):
+    customer_id, loan_service, repayments = loans
+    loan = loan_service.apply_for_loan(customer_id, "Personal", amount, rate, months)
+    schedule = loan_service.get_amortization_schedule(loan["loan_id"])
+    assert len(schedule) == months
+    for row in schedule:
+        result = repayments.make_repayment(loan["loan_id"], row["payment"])
+        assert result["interest"] == pytest.approx(row["interest"], abs=0.01)
+        assert result["principal"] == pytest.approx(row["principal"], abs=0.01)
+        assert result["outstanding"] == pytest.approx(row["balance"], abs=0.01)
+    assert result["outstanding"] == 0
+    assert result["loan_status"] == "CLOSED"
+    assert loan_service.reconcile_outstanding()["ok"]
+
+def test_repayment_beyond_payoff_is_rejected(loans):
+    customer_id, loan_service, repayments = loans
+    loan = loan_service.apply_for_loan(customer_id, "Personal", 1000, 12, 12)
+    # 1000 principal plus a month's interest at 1%
+    with pytest.raises(LoanRepaymentServiceError, match="payoff amount of 1010.0"):
+        repayments.make_repayment(loan["loan_id"], 1010.01)
+    result = repayments.make_repayment(loan["loan_id"], 1010)
+    assert (result["outstanding"], result["loan_status"]) == (0, "CLOSED")
+
+def test_status_change_reverses_the_principal_part(loans):
+    customer_id, loan_service, repayments = loans
+    loan = loan_service.apply_for_loan(customer_id, "Personal", 100000, 12, 12)
+    paid = repayments.make_repayment(loan["loan_id"], 8884.88)
+    assert (paid["interest"], paid["principal"], paid["outstanding"]) == (1000, 7884.88, 92115.12)
+    pending = repayments.update_repayment_status(paid["repayment_id"], "PENDING")
+    assert pending["principal"] is None
+    assert loan_service.get_outstanding(loan["loan_id"])["outstanding"] == 100000
+    repayments.update_repayment_status(paid["repayment_id"], "PAID")
+    assert loan_service.get_outstanding(loan["loan_id"])["outstanding"] == 92115.12
+    assert loan_service.reconcile_outstanding()["ok"]